@@ -1,8 +1,7 @@
 import logging
-from langchain_groq import ChatGroq
-from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage
 from agents.utils.prompt_definitions import AI_FEATURE_IDEATION_PROMPT
+from agents.utils.llm_registry import get_llm
 from config import settings
 import json
 
@@ -15,19 +14,7 @@ class AIFeatureIdeationAgent:
 
         logger.debug(f"Initializing AIFeatureIdeationAgent with model_api: {model_api} and model_name: {model_name}")
 
-        if model_api == "groq":
-            self.llm = ChatGroq(api_key=settings.model_api_key, temperature=settings.temperature, model_name=model_name)
-            logger.debug("Using ChatGroq model for AI Feature Ideation.")
-        elif model_api == "openai":
-            self.llm = ChatOpenAI(
-                api_key=settings.openai_api_key,
-                temperature=settings.temperature,
-                model_name=model_name
-            )
-            logger.debug("Using ChatOpenAI model for AI Feature Ideation.")
-        else:
-            logger.error("Unsupported model API for AI Feature Ideation Agent.")
-            raise ValueError("Unsupported model API")
+        self.llm = get_llm(model_api, model_name)
 
     async def ideate_features(self, feature_gaps: list, product_info: str) -> list:
         logger.debug(f"Ideating features based on gaps: {feature_gaps}")
@@ -1,9 +1,8 @@
 import logging
 import json
-from langchain_groq import ChatGroq
-from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage
 from agents.utils.prompt_definitions import DEVELOPER_AGENT_PROMPT
+from agents.utils.llm_registry import get_llm
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -15,21 +14,9 @@ class DeveloperAgent:
 
         logger.debug(f"Initializing DeveloperAgent with model_api: {model_api} and model_name: {model_name}")
 
-        if model_api == "groq":
-            self.llm = ChatGroq(api_key=settings.model_api_key, temperature=settings.temperature, model_name=model_name)
-            logger.debug("Using ChatGroq model for Developer Agent.")
-        elif model_api == "openai":
-            self.llm = ChatOpenAI(
-                api_key=settings.openai_api_key,
-                temperature=settings.temperature,
-                model_name=model_name
-            )
-            logger.debug("Using ChatOpenAI model for Developer Agent.")
-        else:
-            logger.error("Unsupported model API for Developer Agent.")
-            raise ValueError("Unsupported model API")
+        self.llm = get_llm(model_api, model_name)
 
-    async def assess_feasibility_and_effort(self, features: str) -> dict:
+    async def assess_feasibility_and_effort(self, features: str) -> list:
         logger.debug(f"Assessing feasibility and effort for feature: {features}")
         prompt = DEVELOPER_AGENT_PROMPT.format(features=features)
         messages = [
@@ -61,4 +48,31 @@ class DeveloperAgent:
                     "feasibility_report": "Could not parse feasibility report.",
                     "development_effort": "Unknown"
                 }
-            ]
\ No newline at end of file
+            ]
+
+    async def assess_feature(self, feature: dict) -> dict:
+        """
+        Assesses a single feature in its own LLM call.
+
+        :param feature: Prioritized feature (with "feature" and "description" keys).
+        :return: Feasibility report for the feature, tagged with the feature name.
+        :raises ValueError: If the response is not a JSON report.
+        """
+        feature_name = feature.get("feature") or feature.get("feature_name") or "Unnamed feature"
+        logger.debug(f"Assessing feasibility and effort for single feature: {feature_name}")
+        prompt = DEVELOPER_AGENT_PROMPT.format(features=json.dumps([feature]))
+        messages = [
+            HumanMessage(content=prompt),
+        ]
+        response = await self.llm.ainvoke(messages)
+        response_content = response.content.strip()
+
+        logger.debug(f"Received raw response for feature {feature_name}: {response_content}")
+
+        feasibility_data = json.loads(response_content)
+        if isinstance(feasibility_data, list) and feasibility_data:
+            feasibility_data = feasibility_data[0]
+        if not isinstance(feasibility_data, dict):
+            raise ValueError(f"Unexpected feasibility response format for feature: {feature_name}")
+
+        return {"feature": feature_name, **feasibility_data}
@@ -3,8 +3,6 @@ import logging
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 
-from langchain_groq import ChatGroq
-from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage
 from agents.utils.prompt_definitions import (
     PROJECT_MANAGER_PROMPT,
@@ -12,6 +10,7 @@ from agents.utils.prompt_definitions import (
     PRIORITIZATION_PROMPT  # Imported the new prompt
 )
 from agents.utils.prompt_provider import PromptProvider
+from agents.utils.llm_registry import get_llm
 from config import settings 
 from typing import List, Dict
 import json
@@ -27,33 +26,7 @@ class ProductManagerAgent:
 
         logger.debug(f"Initializing ProductManagerAgent with model_api: {model_api} and model_name: {model_name}")
 
-        if model_api == "groq":
-            logger.debug("Initializing ChatGroq model.")
-            try:
-                self.llm = ChatGroq(
-                    api_key=settings.model_api_key,
-                    temperature=settings.temperature,
-                    model_name=model_name
-                )
-                logger.debug("ChatGroq model initialized successfully.")
-            except Exception as e:
-                logger.error(f"Error initializing ChatGroq model: {e}")
-                raise e
-        elif model_api == "openai":
-            logger.debug("Initializing ChatOpenAI model.")
-            try:
-                self.llm = ChatOpenAI(
-                    api_key=settings.openai_api_key,
-                    temperature=settings.temperature,
-                    model_name=model_name
-                )
-                logger.debug("ChatOpenAI model initialized successfully.")
-            except Exception as e:
-                logger.error(f"Error initializing ChatOpenAI model: {e}")
-                raise e
-        else:
-            logger.error("Unsupported model API")
-            raise ValueError("Unsupported model API")
+        self.llm = get_llm(model_api, model_name)
         logger.debug("ProductManagerAgent initialization complete.")
 
     async def define_evaluation_scope(self, evaluation_context: str) -> str:
@@ -5,34 +5,22 @@ import json
 logging.basicConfig(level=logging.DEBUG)  # Set logging level to DEBUG
 logger = logging.getLogger(__name__)  # Create a logger
 
-from langchain_groq import ChatGroq
-from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage, AIMessage
 from agents.utils.prompt_definitions import USER_AGENT_PROMPT
 from agents.utils.prompt_provider import PromptProvider
+from agents.utils.llm_registry import get_llm
 from config import settings  # Importing settings from config.py
 
 class UserAgent:
-    def __init__(self, agent_characteristics: dict):
+    def __init__(self, agent_characteristics: dict, name: str = None):
         self.characteristics = agent_characteristics
+        self.name = name
         model_api = settings.model_api  # Retrieved from config.py
         model_name = settings.model_name  # Retrieved from config.py
 
         logger.debug(f"Initializing UserAgent with model_api: {model_api} and model_name: {model_name}")  # Debug log
 
-        if model_api == "groq":
-            self.llm = ChatGroq(api_key=settings.model_api_key, temperature=settings.temperature, model_name=model_name)
-            logger.debug("Using ChatGroq model")  # Debug log
-        elif model_api == "openai":
-            self.llm = ChatOpenAI(
-                api_key=settings.openai_api_key,
-                temperature=settings.temperature,
-                model_name=model_name
-            )
-            logger.debug("Using ChatOpenAI model")
-        else:
-            logger.error("Unsupported model API")
-            raise ValueError("Unsupported model API")
+        self.llm = get_llm(model_api, model_name)
 
     async def simulate_interaction(self, product_info: str) -> str:
         logger.debug(f"Simulating interactionproduct_info: {product_info}")
@@ -0,0 +1,329 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Sequence
+
+import pymysql
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from agents.utils.token_budget import LLM_CACHE_HIT
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_cache_bypass: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def no_llm_cache():
+    """
+    Disables the LLM response cache for every call made inside the block, e.g.:
+
+        with no_llm_cache():
+            response = await llm.ainvoke(messages)
+    """
+    token = _cache_bypass.set(True)
+    try:
+        yield
+    finally:
+        _cache_bypass.reset(token)
+
+
+def _serialize(return_val: Sequence) -> str:
+    return json.dumps([dumps(generation) for generation in return_val])
+
+
+def _deserialize(payload: str) -> RETURN_VAL_TYPE:
+    return [loads(generation) for generation in json.loads(payload)]
+
+
+def _mark_cache_hit(return_val: RETURN_VAL_TYPE) -> RETURN_VAL_TYPE:
+    # Copies, so the cached generations stay unmarked
+    return [
+        generation.model_copy(update={"generation_info": {**(generation.generation_info or {}), LLM_CACHE_HIT: True}})
+        for generation in return_val
+    ]
+
+
+class MemoryCacheTier:
+    """
+    In-process LRU with a per-entry time to live.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[RETURN_VAL_TYPE]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: RETURN_VAL_TYPE):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCacheTier:
+    """
+    SQLite-backed tier shared by every gunicorn worker on the same host. Each operation opens its own
+    connection and closes it when done (sqlite3's connection context manager only commits).
+    """
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_response_cache ("
+                "cache_key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key: str) -> Optional[str]:
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT response FROM llm_response_cache WHERE cache_key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl_seconds),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, payload: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_response_cache (cache_key, response, created_at) VALUES (?, ?, ?)",
+                (key, payload, time.time()),
+            )
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM llm_response_cache")
+
+
+class MySQLCacheTier:
+    """
+    MySQL-backed tier shared by every worker and host. Uses the LLMResponseCache table.
+    The cache may be consulted from synchronous chains, so it uses short-lived PyMySQL connections
+    rather than the aiomysql pool.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+
+    def _connect(self):
+        return pymysql.connect(
+            host=settings.mysql_host,
+            port=settings.mysql_port,
+            user=settings.mysql_user,
+            password=settings.mysql_password,
+            db=settings.mysql_db,
+            autocommit=True,
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT response FROM LLMResponseCache WHERE cache_key = %s AND created_at >= %s",
+                    (key, time.time() - self.ttl_seconds),
+                )
+                row = cur.fetchone()
+                return row[0] if row else None
+        finally:
+            conn.close()
+
+    def set(self, key: str, payload: str):
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "REPLACE INTO LLMResponseCache (cache_key, response, created_at) VALUES (%s, %s, %s)",
+                    (key, payload, time.time()),
+                )
+        finally:
+            conn.close()
+
+    def clear(self):
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM LLMResponseCache")
+        finally:
+            conn.close()
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Content-addressed cache for chat model responses, keyed by a hash of (model, temperature, messages).
+
+    Lookups go to the in-memory LRU first and then to the optional persistent tier; persistent hits are
+    promoted into memory. Plugged into every pooled client by the LLM registry, so it covers both
+    `ainvoke` calls and synchronous chains such as the Figma summarize chain. Served generations are
+    flagged in their generation_info so token accounting can tell them from real calls.
+    """
+
+    def __init__(self, memory_tier: MemoryCacheTier, persistent_tier=None):
+        self.memory_tier = memory_tier
+        self.persistent_tier = persistent_tier
+        self._counters = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "bypassed": 0, "writes": 0}
+        self._counter_lock = threading.Lock()
+
+    @staticmethod
+    def _model_signature(llm_string: str) -> str:
+        # llm_string is "<serialized model>---<call params>". The serialized model can contain object
+        # reprs (e.g. the pooled http clients) that differ between processes, so only keep the parts
+        # that determine the response.
+        serialized, _, params = llm_string.rpartition("---")
+        try:
+            kwargs = json.loads(serialized).get("kwargs", {})
+        except (ValueError, AttributeError):
+            return llm_string
+        return json.dumps(
+            {
+                "model": kwargs.get("model_name") or kwargs.get("model"),
+                "temperature": kwargs.get("temperature"),
+                "params": params,
+            },
+            sort_keys=True,
+        )
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        signature = self._model_signature(llm_string)
+        return hashlib.sha256(f"{signature}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def _count(self, counter: str):
+        with self._counter_lock:
+            self._counters[counter] += 1
+
+    def _lookup_memory(self, key: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.memory_tier.get(key)
+        if value is not None:
+            self._count("memory_hits")
+        return value
+
+    def _lookup_persistent(self, key: str) -> Optional[RETURN_VAL_TYPE]:
+        if self.persistent_tier is None:
+            return None
+        try:
+            payload = self.persistent_tier.get(key)
+            if payload is None:
+                return None
+            value = _deserialize(payload)
+        except Exception as e:
+            logger.warning(f"LLM cache persistent lookup failed: {e}")
+            return None
+        self.memory_tier.set(key, value)
+        self._count("persistent_hits")
+        return value
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if _cache_bypass.get():
+            self._count("bypassed")
+            return None
+        key = self._key(prompt, llm_string)
+        value = self._lookup_memory(key)
+        if value is None:
+            value = self._lookup_persistent(key)
+        if value is None:
+            self._count("misses")
+            return None
+        return _mark_cache_hit(value)
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if _cache_bypass.get():
+            self._count("bypassed")
+            return None
+        key = self._key(prompt, llm_string)
+        value = self._lookup_memory(key)
+        if value is None and self.persistent_tier is not None:
+            value = await asyncio.to_thread(self._lookup_persistent, key)
+        if value is None:
+            self._count("misses")
+            return None
+        return _mark_cache_hit(value)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE):
+        if _cache_bypass.get():
+            return
+        key = self._key(prompt, llm_string)
+        self.memory_tier.set(key, return_val)
+        self._count("writes")
+        if self.persistent_tier is not None:
+            try:
+                self.persistent_tier.set(key, _serialize(return_val))
+            except Exception as e:
+                logger.warning(f"LLM cache persistent write failed: {e}")
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE):
+        if _cache_bypass.get():
+            return
+        if self.persistent_tier is None:
+            self.update(prompt, llm_string, return_val)
+        else:
+            await asyncio.to_thread(self.update, prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any):
+        self.memory_tier.clear()
+        if self.persistent_tier is not None:
+            self.persistent_tier.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counter_lock:
+            counters = dict(self._counters)
+        lookups = counters["memory_hits"] + counters["persistent_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["persistent_hits"]
+        return {
+            **counters,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory_tier),
+            "persistent_backend": settings.llm_cache_persistent_backend,
+        }
+
+
+def _build_persistent_tier():
+    backend = settings.llm_cache_persistent_backend.lower()
+    if backend == "none":
+        return None
+    elif backend == "disk":
+        return DiskCacheTier(settings.llm_cache_disk_path, settings.llm_cache_ttl_seconds)
+    elif backend == "mysql":
+        return MySQLCacheTier(settings.llm_cache_ttl_seconds)
+    else:
+        raise ValueError(f"Unsupported LLM cache backend: {settings.llm_cache_persistent_backend}")
+
+
+llm_response_cache = LLMResponseCache(
+    memory_tier=MemoryCacheTier(settings.llm_cache_max_entries, settings.llm_cache_ttl_seconds),
+    persistent_tier=_build_persistent_tier(),
+)
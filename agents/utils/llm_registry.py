@@ -0,0 +1,190 @@
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_groq import ChatGroq
+from langchain_openai import ChatOpenAI
+
+from agents.utils.llm_cache import llm_response_cache
+from agents.utils.token_budget import token_usage_callback
+from config import settings
+from tracing import llm_tracing_callback
+
+logger = logging.getLogger(__name__)
+
+LLMKey = Tuple[str, str, float]
+
+
+class LLMClientRegistry:
+    """
+    Process-wide registry of chat model clients keyed by (provider, model, temperature).
+
+    Every client handed out by the registry shares the same pooled httpx transports, so TLS
+    sessions and keep-alive connections survive across requests instead of being rebuilt
+    each time an agent or controller needs an LLM.
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        timeout: float,
+    ):
+        """
+        :param max_connections: Upper bound on concurrent connections per transport.
+        :param max_keepalive_connections: Number of idle connections kept open for reuse.
+        :param keepalive_expiry: Seconds an idle connection stays in the pool.
+        :param timeout: Request timeout in seconds.
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout)
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[httpx.AsyncClient] = None
+        self._clients: Dict[LLMKey, BaseChatModel] = {}
+        self._borrow_counts: Dict[LLMKey, int] = {}
+        self._lock = threading.Lock()
+
+    def _get_http_clients(self) -> Tuple[httpx.Client, httpx.AsyncClient]:
+        if self._http_client is None:
+            self._http_client = httpx.Client(limits=self.limits, timeout=self.timeout)
+        if self._http_async_client is None:
+            self._http_async_client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+        return self._http_client, self._http_async_client
+
+    def _build_client(self, provider: str, model_name: str, temperature: float) -> BaseChatModel:
+        http_client, http_async_client = self._get_http_clients()
+        cache = llm_response_cache if settings.llm_cache_enabled else False
+        if provider == "groq":
+            return ChatGroq(
+                api_key=settings.model_api_key,
+                temperature=temperature,
+                model_name=model_name,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                cache=cache,
+                callbacks=[token_usage_callback, llm_tracing_callback],
+            )
+        elif provider == "openai":
+            return ChatOpenAI(
+                api_key=settings.openai_api_key,
+                temperature=temperature,
+                model_name=model_name,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                cache=cache,
+                callbacks=[token_usage_callback, llm_tracing_callback],
+            )
+        else:
+            logger.error(f"Unsupported model API: {provider}")
+            raise ValueError(f"Unsupported model API: {provider}")
+
+    def get_llm(
+        self,
+        provider: Optional[str] = None,
+        model_name: Optional[str] = None,
+        temperature: Optional[float] = None,
+    ) -> BaseChatModel:
+        """
+        Returns the shared client for (provider, model, temperature), creating it on first use.
+        Arguments left as None fall back to the configured defaults.
+
+        :param provider: Model API ("groq" or "openai").
+        :param model_name: Model name.
+        :param temperature: Sampling temperature.
+        :return: Chat model instance backed by the shared connection pool.
+        """
+        key = (
+            (provider or settings.model_api).lower(),
+            model_name or settings.model_name,
+            float(settings.temperature if temperature is None else temperature),
+        )
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                logger.info(f"Creating pooled LLM client for {key}")
+                client = self._build_client(*key)
+                self._clients[key] = client
+            self._borrow_counts[key] = self._borrow_counts.get(key, 0) + 1
+        return client
+
+    def warm_up(self):
+        """
+        Creates the default client and its transports ahead of the first request.
+        """
+        self.get_llm()
+        logger.info("LLM client registry warmed up.")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Reports the registered clients, how often each was borrowed, and connection pool usage.
+        """
+        with self._lock:
+            clients = [
+                {
+                    "provider": provider,
+                    "model_name": model_name,
+                    "temperature": temperature,
+                    "borrow_count": self._borrow_counts.get((provider, model_name, temperature), 0),
+                }
+                for provider, model_name, temperature in self._clients
+            ]
+        return {
+            "clients": clients,
+            "pool_limits": {
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections,
+                "keepalive_expiry": self.limits.keepalive_expiry,
+            },
+            "sync_pool": self._pool_usage(self._http_client),
+            "async_pool": self._pool_usage(self._http_async_client),
+        }
+
+    @staticmethod
+    def _pool_usage(http_client) -> Dict[str, int]:
+        # httpx does not expose pool statistics publicly; read them from the httpcore pool.
+        pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+    async def close(self):
+        """
+        Closes the pooled transports and resets the borrow counts. Clients created afterwards get
+        fresh ones.
+        """
+        with self._lock:
+            self._clients.clear()
+            self._borrow_counts.clear()
+            http_client, self._http_client = self._http_client, None
+            http_async_client, self._http_async_client = self._http_async_client, None
+        if http_client is not None:
+            http_client.close()
+        if http_async_client is not None:
+            await http_async_client.aclose()
+        logger.info("Closed LLM client registry.")
+
+
+llm_registry = LLMClientRegistry(
+    max_connections=settings.llm_pool_max_connections,
+    max_keepalive_connections=settings.llm_pool_max_keepalive_connections,
+    keepalive_expiry=settings.llm_pool_keepalive_expiry,
+    timeout=settings.llm_request_timeout,
+)
+
+
+def get_llm(
+    provider: Optional[str] = None,
+    model_name: Optional[str] = None,
+    temperature: Optional[float] = None,
+) -> BaseChatModel:
+    """
+    Borrows a pooled chat model from the process-wide registry.
+    """
+    return llm_registry.get_llm(provider=provider, model_name=model_name, temperature=temperature)
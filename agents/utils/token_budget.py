@@ -0,0 +1,257 @@
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import tiktoken
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage, get_buffer_string
+from langchain_core.outputs import LLMResult
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Encoding used when tiktoken does not know the configured model (e.g. Groq's Llama models)
+DEFAULT_ENCODING = "cl100k_base"
+
+# generation_info flag the LLM response cache sets on the generations it serves
+LLM_CACHE_HIT = "llm_cache_hit"
+
+
+@lru_cache(maxsize=None)
+def _encoding_for(model_name: str) -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """
+    Counts the tokens of a text with the tiktoken encoding of the model (cl100k_base for models
+    tiktoken does not know).
+    """
+    if not text:
+        return 0
+    return len(_encoding_for(model_name or settings.model_name).encode(text, disallowed_special=()))
+
+
+class TokenBudget:
+    """
+    Token budget for the variable content a workflow node puts into its prompts.
+
+    Each `select`/`truncate` call consumes from the remaining budget, so the order of the calls sets
+    which input is cut first: lists go through priority selection (items are kept in priority order
+    while they fit, the rest are dropped) and texts are truncated at a token boundary.
+    """
+
+    def __init__(self, max_tokens: Optional[int], model_name: Optional[str] = None):
+        """
+        :param max_tokens: Token budget; None disables enforcement.
+        :param model_name: Model whose tokenizer is used for counting.
+        """
+        self.max_tokens = max_tokens
+        self.encoding = _encoding_for(model_name or settings.model_name)
+        self.used = 0
+        self.dropped_items = 0
+        self.truncated = False
+
+    @classmethod
+    def for_node(cls, node_name: str) -> "TokenBudget":
+        return cls(settings.node_token_budgets.get(node_name))
+
+    @property
+    def remaining(self) -> Optional[int]:
+        if self.max_tokens is None:
+            return None
+        return max(self.max_tokens - self.used, 0)
+
+    @property
+    def trimmed(self) -> bool:
+        return self.truncated or self.dropped_items > 0
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=())) if text else 0
+
+    def truncate(self, text: str) -> str:
+        """
+        Returns the text cut to the remaining budget.
+        """
+        tokens = self.encoding.encode(text or "", disallowed_special=())
+        if self.remaining is not None and len(tokens) > self.remaining:
+            tokens = tokens[:self.remaining]
+            text = self.encoding.decode(tokens)
+            self.truncated = True
+        self.used += len(tokens)
+        return text
+
+    def select(self, items: Sequence[Any], render: Callable[[Any], str] = str) -> List[Any]:
+        """
+        Keeps the items, in priority order, whose rendered text still fits in the remaining budget.
+
+        :param items: Items sorted by priority, highest first.
+        :param render: Renders an item the way it appears in the prompt.
+        """
+        selected = []
+        for item in items:
+            cost = self.count(render(item))
+            if self.remaining is not None and cost > self.remaining:
+                self.dropped_items += 1
+                continue
+            self.used += cost
+            selected.append(item)
+        return selected
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "budget": self.max_tokens,
+            "input_tokens": self.used,
+            "dropped_items": self.dropped_items,
+            "truncated": self.truncated,
+        }
+
+
+class NodeTokenUsage:
+    """
+    Prompt and completion tokens of the LLM calls made while a workflow node runs.
+    """
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = 0
+        # Calls answered by the LLM response cache, and the tokens they would have cost
+        self.cached_calls = 0
+        self.cached_tokens = 0
+        self.budget: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def add(self, prompt_tokens: int, completion_tokens: int):
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.calls += 1
+
+    def add_cached(self, tokens: int):
+        with self._lock:
+            self.cached_tokens += tokens
+            self.cached_calls += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        usage = {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "calls": self.calls,
+            "cached_calls": self.cached_calls,
+            "cached_tokens": self.cached_tokens,
+        }
+        if self.budget is not None:
+            usage["budget"] = self.budget
+        return usage
+
+
+_current_usage: ContextVar[Optional[NodeTokenUsage]] = ContextVar("node_token_usage", default=None)
+
+
+@contextmanager
+def track_token_usage():
+    """
+    Collects the token usage of every LLM call made inside the block, including calls made from
+    tasks started inside it:
+
+        with track_token_usage() as usage:
+            await agent.ideate_features(...)
+        usage.as_dict()
+    """
+    usage = NodeTokenUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def record_budget(budget: TokenBudget):
+    """
+    Attaches a node's budget outcome to the usage being tracked, if any.
+    """
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.budget = budget.summary()
+
+
+def is_cache_hit(response: LLMResult) -> bool:
+    """
+    Whether the response was served by the LLM response cache (see agents/utils/llm_cache.py).
+    """
+    return any(
+        (candidate.generation_info or {}).get(LLM_CACHE_HIT)
+        for candidates in response.generations
+        for candidate in candidates
+    )
+
+
+def reported_token_usage(response: LLMResult) -> Optional[Tuple[int, int]]:
+    """
+    Returns the (prompt, completion) tokens reported by the provider for a call, or None if the
+    response carries no usage.
+    """
+    reported = (response.llm_output or {}).get("token_usage") or {}
+    if reported.get("prompt_tokens") is not None and reported.get("completion_tokens") is not None:
+        return reported["prompt_tokens"], reported["completion_tokens"]
+    generation = response.generations[0][0] if response.generations and response.generations[0] else None
+    usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+    if usage_metadata:
+        return usage_metadata.get("input_tokens", 0), usage_metadata.get("output_tokens", 0)
+    return None
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """
+    Callback attached to every pooled chat model. Adds each call's token usage to the usage tracked
+    by `track_token_usage`; the provider's reported usage is used when present, otherwise prompt and
+    completion are counted with tiktoken. Calls answered by the LLM response cache cost nothing and
+    are recorded as cached instead (the cached response still carries the original call's usage).
+    """
+
+    # Run in the caller's context so the tracked usage is visible
+    run_inline = True
+
+    def __init__(self):
+        self._prompt_estimates: Dict[UUID, int] = {}
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], *, run_id: UUID, **kwargs: Any
+    ):
+        if _current_usage.get() is not None:
+            self._prompt_estimates[run_id] = sum(count_tokens(get_buffer_string(batch)) for batch in messages)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        prompt_estimate = self._prompt_estimates.pop(run_id, 0)
+        usage = _current_usage.get()
+        if usage is None:
+            return
+
+        reported = reported_token_usage(response)
+        if reported is not None:
+            prompt_tokens, completion_tokens = reported
+        else:
+            prompt_tokens = prompt_estimate
+            completion_tokens = sum(
+                count_tokens(candidate.text) for candidates in response.generations for candidate in candidates
+            )
+        if is_cache_hit(response):
+            usage.add_cached(prompt_tokens + completion_tokens)
+        else:
+            usage.add(prompt_tokens, completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._prompt_estimates.pop(run_id, None)
+
+
+token_usage_callback = TokenUsageCallback()
@@ -0,0 +1,14 @@
+import os
+
+# Benchmarks run offline: give the settings that have no default placeholder values so config.py
+# loads without a .env or database. Variables already set in the environment are kept.
+for _name in (
+    "MYSQL_USER",
+    "MYSQL_PASSWORD",
+    "MYSQL_DB",
+    "AZURE_STORAGE_CONNECTION_STRING",
+    "AZURE_STORAGE_CONTAINER_NAME",
+    "MODEL_API_KEY",
+    "OPENAI_API_KEY",
+):
+    os.environ.setdefault(_name, "benchmark")
@@ -0,0 +1,342 @@
+"""
+Local stand-ins for the RAG pipeline's external dependencies, for offline benchmarks:
+
+- SyntheticCorpus: deterministic product documentation generated on the fly from a seed
+- HashEmbeddings: deterministic feature-hashing embedder (no model download or inference)
+- LocalBlobStorageService / InMemoryDocumentationSourceRepository / InMemoryIngestionLedgerRepository:
+  drop-in replacements for the Azure and MySQL backed classes RAGService uses
+- write_synthetic_figma_file / RecordedFigmaServer: Figma files and a local HTTP stand-in for the
+  Figma files API that serves them (recorded or synthetic)
+"""
+import json
+import os
+import random
+import re
+import zlib
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from aiohttp import web
+from langchain_core.embeddings import Embeddings
+
+from models.documentation_source import DocumentationSourceSchema
+
+SYLLABLES = (
+    "ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "bra", "cle", "dro", "fin", "gla", "hel",
+    "jor", "kit", "lum", "mor", "nix", "pla", "qua", "ros", "sul", "tor", "ven", "wal", "xen", "yor", "zam",
+)
+
+_TOKEN = re.compile(r"\w+")
+
+
+class SyntheticCorpus:
+    """
+    Documentation sources for `products` products with `sources_per_product` sources each. Every
+    product has its own topic words, mixed with words shared by all products, so searches have
+    relevant and irrelevant documents to tell apart. Text is generated on demand from (seed,
+    source id), so any size of corpus can be streamed without being held in memory.
+    """
+
+    def __init__(
+        self,
+        products: int,
+        sources_per_product: int,
+        words_per_source: int,
+        vocabulary_size: int = 20_000,
+        topic_words: int = 300,
+        seed: int = 0,
+    ):
+        self.products = products
+        self.sources_per_product = sources_per_product
+        self.words_per_source = words_per_source
+        self.seed = seed
+        rng = random.Random(seed)
+        vocabulary = set()
+        while len(vocabulary) < vocabulary_size:
+            vocabulary.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+        self.vocabulary = sorted(vocabulary)
+        self.topics = {
+            product_id: rng.sample(self.vocabulary, topic_words)
+            for product_id in range(1, products + 1)
+        }
+
+    @property
+    def source_count(self) -> int:
+        return self.products * self.sources_per_product
+
+    def product_of(self, source_id: int) -> int:
+        return 1 + (source_id - 1) // self.sources_per_product
+
+    def sources(self, product_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": source_id,
+                "product_id": self.product_of(source_id),
+                "type": "landing_page",
+                "url": f"https://bench.local/sources/{source_id}",
+                "storage_url": f"local://bench/{source_id}",
+                "file_size": None,
+                "content_type": "text/plain",
+                "fetched_at": None,
+                "created_at": None,
+                "updated_at": None,
+            }
+            for source_id in range(1, self.source_count + 1)
+            if product_id is None or self.product_of(source_id) == product_id
+        ]
+
+    def iter_lines(self, source_id: int, words: Optional[int] = None) -> Iterator[str]:
+        rng = random.Random(self.seed * 1_000_003 + source_id)
+        topic = self.topics[self.product_of(source_id)]
+        remaining = self.words_per_source if words is None else words
+        while remaining > 0:
+            count = min(remaining, rng.randint(6, 24))
+            line = " ".join(
+                rng.choice(topic) if rng.random() < 0.4 else rng.choice(self.vocabulary) for _ in range(count)
+            )
+            remaining -= count
+            # Paragraph breaks every few lines give the chunker natural boundaries
+            yield line + (".\n\n" if rng.random() < 0.2 else ".\n")
+
+    def iter_bytes(self, source_id: int, piece_size: int) -> Iterator[bytes]:
+        buffer = bytearray()
+        for line in self.iter_lines(source_id):
+            buffer += line.encode("utf-8")
+            while len(buffer) >= piece_size:
+                yield bytes(buffer[:piece_size])
+                del buffer[:piece_size]
+        if buffer:
+            yield bytes(buffer)
+
+    def queries(self, count: int, words: int = 6) -> List[Tuple[int, str]]:
+        """
+        (product id, query) pairs, each query made of the product's topic words.
+        """
+        rng = random.Random(self.seed + 7)
+        queries = []
+        for _ in range(count):
+            product_id = rng.randint(1, self.products)
+            queries.append((product_id, " ".join(rng.sample(self.topics[product_id], words))))
+        return queries
+
+
+@lru_cache(maxsize=1_000_000)
+def _bucket(token: str, dimension: int) -> Tuple[int, float]:
+    digest = zlib.crc32(token.encode("utf-8"))
+    return digest % dimension, 1.0 if digest & 0x80000000 else -1.0
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Deterministic bag-of-words embedder: each word is hashed to a signed dimension and the sum is
+    L2-normalized. Texts sharing words get similar vectors, so retrieval behaves plausibly, at a
+    fraction of a model's cost and with identical results on every run.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> List[float]:
+        buckets = [_bucket(token, self.dimension) for token in _TOKEN.findall(text.lower())]
+        if not buckets:
+            return [0.0] * self.dimension
+        indexes, signs = zip(*buckets)
+        vector = np.bincount(indexes, weights=signs, minlength=self.dimension)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class LocalBlobStorageService:
+    """
+    Serves the corpus' sources under their local:// storage URLs, with BlobStorageService's read API.
+    """
+
+    def __init__(self, corpus: SyntheticCorpus):
+        self.corpus = corpus
+
+    @staticmethod
+    def _source_id(blob_url: str) -> int:
+        return int(blob_url.rsplit("/", 1)[1])
+
+    async def get_blob_fingerprint_by_url(self, blob_url: str) -> Optional[str]:
+        return f"synthetic:{self.corpus.seed}:{self.corpus.words_per_source}:{self._source_id(blob_url)}"
+
+    async def stream_blob_by_url(self, blob_url: str, chunk_size: int = 4 * 1024 * 1024) -> AsyncIterator[bytes]:
+        for piece in self.corpus.iter_bytes(self._source_id(blob_url), chunk_size):
+            yield piece
+
+    async def download_blob_by_url(self, blob_url: str) -> bytes:
+        return b"".join([piece async for piece in self.stream_blob_by_url(blob_url)])
+
+    async def close(self):
+        pass
+
+
+class InMemoryDocumentationSourceRepository:
+    """
+    The corpus' sources, with the DocumentationSourceRepository methods RAGService uses.
+    """
+
+    def __init__(self, corpus: SyntheticCorpus):
+        self.corpus = corpus
+
+    async def get_sources_by_product_id(self, product_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self.corpus.sources(product_id)
+
+    async def get_by_id(self, documentation_source_id: int) -> Optional[DocumentationSourceSchema]:
+        if not 1 <= documentation_source_id <= self.corpus.source_count:
+            return None
+        product_sources = self.corpus.sources(self.corpus.product_of(documentation_source_id))
+        source = next(source for source in product_sources if source["id"] == documentation_source_id)
+        return DocumentationSourceSchema(**source)
+
+
+class InMemoryIngestionLedgerRepository:
+    """
+    IngestionLedgerRepository kept in a dict.
+    """
+
+    def __init__(self):
+        self.entries: Dict[int, Dict[str, Any]] = {}
+
+    async def get_by_product_id(self, product_id: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+        return {
+            source_id: dict(entry)
+            for source_id, entry in self.entries.items()
+            if product_id is None or entry["product_id"] == product_id
+        }
+
+    async def upsert(self, source_id, product_id, content_hash, fingerprint, embedding_model, chunk_ids) -> bool:
+        self.entries[source_id] = {
+            "source_id": source_id,
+            "product_id": product_id,
+            "content_hash": content_hash,
+            "fingerprint": fingerprint,
+            "embedding_model": embedding_model,
+            "chunk_ids": list(chunk_ids),
+        }
+        return True
+
+    async def delete(self, source_id: int) -> bool:
+        return self.entries.pop(source_id, None) is not None
+
+
+def _synthetic_figma_node(rng: random.Random, node_id: str, depth: int, frame_ids: List[str]) -> Dict[str, Any]:
+    node_type = "GROUP" if depth < 3 and rng.random() < 0.3 else rng.choice(["TEXT", "RECTANGLE", "VECTOR", "COMPONENT"])
+    node: Dict[str, Any] = {
+        "id": node_id,
+        "name": f"{node_type.title()} {node_id}",
+        "type": node_type,
+        # Layout and style fields make up most of a real file and are dropped by the extraction
+        "absoluteBoundingBox": {"x": rng.random() * 1000, "y": rng.random() * 1000, "width": 120.0, "height": 40.0},
+        "fills": [{"type": "SOLID", "color": {"r": rng.random(), "g": rng.random(), "b": rng.random(), "a": 1}}],
+        "effects": [],
+        "constraints": {"vertical": "TOP", "horizontal": "LEFT"},
+    }
+    if node_type == "TEXT":
+        node["characters"] = " ".join(rng.choice(SYLLABLES) * rng.randint(1, 3) for _ in range(rng.randint(1, 8)))
+        node["style"] = {"fontFamily": "Inter", "fontSize": 14, "lineHeightPx": 20.0}
+    elif rng.random() < 0.3:
+        node["interactions"] = [{
+            "trigger": {"type": "ON_CLICK"},
+            "action": {"type": "NODE", "destinationId": rng.choice(frame_ids), "navigation": "NAVIGATE"},
+        }]
+    if node_type == "GROUP":
+        node["children"] = [
+            _synthetic_figma_node(rng, f"{node_id}.{index}", depth + 1, frame_ids) for index in range(rng.randint(2, 6))
+        ]
+    return node
+
+
+def write_synthetic_figma_file(path: str, pages: int, frames_per_page: int, nodes_per_frame: int, seed: int = 0) -> int:
+    """
+    Writes a Figma file (GET /v1/files/:key response) with the given shape, one frame at a time so
+    files larger than memory can be generated, with prototype links between frames.
+
+    :return: The file size in bytes.
+    """
+    rng = random.Random(seed)
+    frame_ids = [f"{page}:{frame}" for page in range(1, pages + 1) for frame in range(1, frames_per_page + 1)]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"name": "Synthetic", "version": "1", "document": {"id": "0:0", "name": "Document", "type": "DOCUMENT", "children": [')
+        for page in range(1, pages + 1):
+            f.write(", " if page > 1 else "")
+            f.write(f'{{"id": "{page}:0", "name": "Page {page}", "type": "CANVAS", "children": [')
+            for frame in range(1, frames_per_page + 1):
+                frame_node = {
+                    "id": f"{page}:{frame}",
+                    "name": f"Screen {page}-{frame}",
+                    "type": "FRAME",
+                    "children": [
+                        _synthetic_figma_node(rng, f"{page}:{frame}:{index}", 0, frame_ids)
+                        for index in range(nodes_per_frame)
+                    ],
+                }
+                f.write(", " if frame > 1 else "")
+                json.dump(frame_node, f)
+            f.write('], "backgroundColor": {"r": 1, "g": 1, "b": 1, "a": 1}}')
+        f.write(']}, "components": {}, "styles": {}, "schemaVersion": 0}')
+    return os.path.getsize(path)
+
+
+class RecordedFigmaServer:
+    """
+    Local stand-in for the Figma files API: serves `<directory>/<file key>.json` at
+    GET /v1/files/<file key>, streamed in `chunk_size` pieces like a large real response. Point
+    settings.figma_api_base_url at `base_url` to fetch from it.
+
+        async with RecordedFigmaServer(directory) as server:
+            settings.figma_api_base_url = server.base_url
+    """
+
+    def __init__(self, directory: str, chunk_size: int = 64 * 1024, host: str = "127.0.0.1", port: int = 0):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _serve_file(self, request: web.Request) -> web.StreamResponse:
+        path = os.path.join(self.directory, f"{os.path.basename(request.match_info['file_key'])}.json")
+        if not os.path.exists(path):
+            return web.json_response({"status": 404, "err": "Not found"}, status=404)
+        response = web.StreamResponse(headers={"Content-Type": "application/json"})
+        await response.prepare(request)
+        with open(path, "rb") as f:
+            while piece := f.read(self.chunk_size):
+                await response.write(piece)
+        await response.write_eof()
+        return response
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/v1/files/{file_key}", self._serve_file)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Resolve the port picked by the OS when port=0
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "RecordedFigmaServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
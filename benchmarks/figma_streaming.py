@@ -0,0 +1,136 @@
+"""
+Offline benchmark of Figma file extraction: loading the whole response with response.json() versus
+parsing it as it downloads (services/figma_stream_parser.py).
+
+A local stand-in for the Figma files API (benchmarks/fakes.py RecordedFigmaServer) serves a recorded
+Figma file, or a synthetic one of the requested shape, and each mode fetches it and runs the
+first-level extraction in a fresh process. Reported per mode: elapsed time, peak RSS and its growth
+over the process' baseline, and a digest of the extraction so both modes can be checked to agree.
+
+    python -m benchmarks.figma_streaming [--file recorded.json | --pages 4 --frames-per-page 50 --nodes-per-frame 200] \\
+        --output figma_streaming.json
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+MODES = ("json", "stream")
+FILE_KEY = "benchmark"
+
+
+def _peak_rss_bytes() -> int:
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+async def _run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    # Imported here so every case starts from a clean process
+    from benchmarks.fakes import RecordedFigmaServer
+    from config import settings
+    from services.data_fetching_service import DataFetchingService
+    from services.figma_data_transformer import FigmaDataTransformer
+    from services.figma_stream_parser import iter_figma_events
+
+    transformer = FigmaDataTransformer()
+    data_fetching_service = DataFetchingService()
+    async with RecordedFigmaServer(case["directory"], chunk_size=case["serve_chunk_bytes"]) as server:
+        settings.figma_api_base_url = server.base_url
+        baseline_rss = _peak_rss_bytes()
+        started = time.perf_counter()
+        if case["mode"] == "json":
+            data = await data_fetching_service.fetch_figma_design("benchmark", FILE_KEY)
+            extracted = transformer._first_level_transfer(data)
+            del data
+        else:
+            events = iter_figma_events(data_fetching_service.stream_figma_design("benchmark", FILE_KEY))
+            extracted = await transformer._first_level_transfer_stream(events)
+        seconds = time.perf_counter() - started
+
+    peak_rss = _peak_rss_bytes()
+    return {
+        "mode": case["mode"],
+        "seconds": round(seconds, 3),
+        "peak_rss_bytes": peak_rss,
+        "rss_growth_bytes": peak_rss - baseline_rss,
+        "screens": len(extracted["screens"]),
+        "digest": hashlib.sha256(json.dumps(extracted, sort_keys=True).encode("utf-8")).hexdigest(),
+    }
+
+
+def _run_in_subprocess(case: Dict[str, Any]) -> Dict[str, Any]:
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.figma_streaming", "--case", json.dumps(case)],
+        capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        return {**case, "error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="Recorded Figma file (GET /v1/files/:key response); synthetic when omitted")
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--frames-per-page", type=int, default=50)
+    parser.add_argument("--nodes-per-frame", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--serve-chunk-bytes", type=int, default=64 * 1024, help="Piece size the stand-in server writes")
+    parser.add_argument("--output", default="figma_streaming.json")
+    parser.add_argument("--case", help=argparse.SUPPRESS)  # Internal: run one case and print its result
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(asyncio.run(_run_case(json.loads(args.case)))))
+        return
+
+    from benchmarks.fakes import write_synthetic_figma_file
+
+    directory = tempfile.mkdtemp(prefix="figma-benchmark-")
+    try:
+        path = os.path.join(directory, f"{FILE_KEY}.json")
+        if args.file:
+            shutil.copyfile(args.file, path)
+        else:
+            write_synthetic_figma_file(path, args.pages, args.frames_per_page, args.nodes_per_frame, seed=args.seed)
+        file_bytes = os.path.getsize(path)
+
+        results = []
+        for mode in MODES:
+            print(f"Running {mode} on {file_bytes} bytes...", file=sys.stderr)
+            results.append(_run_in_subprocess({"mode": mode, "directory": directory, "serve_chunk_bytes": args.serve_chunk_bytes}))
+            print(json.dumps(results[-1]), file=sys.stderr)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    digests = {result.get("digest") for result in results}
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "file": args.file or "synthetic",
+            "file_bytes": file_bytes,
+        },
+        "results": results,
+        "outputs_match": len(digests) == 1 and None not in digests,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    if not report["outputs_match"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
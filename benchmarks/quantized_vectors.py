@@ -0,0 +1,106 @@
+"""
+Benchmark of reduced-precision vector storage (services/quantized_vectors.py).
+
+Builds a synthetic clustered corpus of unit-length embeddings, finds the exact float32 nearest
+neighbours of a set of queries, and reports for float16 and int8, with and without exact re-scoring:
+the memory held by the index compared to float32 vectors, recall@k against the exact neighbours,
+and the mean search latency.
+
+    python -m benchmarks.quantized_vectors --vectors 100000 --dimension 384 --k 10
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from services.quantized_vectors import PRECISIONS, QuantizedIndex, rescore
+
+
+def synthetic_corpus(vectors: int, dimension: int, queries: int, clusters: int, seed: int):
+    """
+    Unit-length vectors scattered around random cluster centres, like sentence embeddings of
+    documents on a handful of topics; queries are perturbed corpus vectors.
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dimension)).astype(np.float32)
+    corpus = centres[rng.integers(clusters, size=vectors)] + 0.5 * rng.normal(size=(vectors, dimension)).astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    query_vectors = corpus[rng.integers(vectors, size=queries)] + 0.1 * rng.normal(size=(queries, dimension)).astype(np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    return corpus, query_vectors
+
+
+def exact_neighbours(corpus: np.ndarray, queries: np.ndarray, k: int) -> List[List[int]]:
+    norms = np.einsum("ij,ij->i", corpus, corpus)
+    neighbours = []
+    for query in queries:
+        distances = norms - 2.0 * (corpus @ query)
+        top = np.argpartition(distances, k - 1)[:k]
+        neighbours.append(top[np.argsort(distances[top])].tolist())
+    return neighbours
+
+
+def recall_at_k(found: List[List[int]], expected: List[List[int]], k: int) -> float:
+    return float(np.mean([len(set(f[:k]) & set(e[:k])) / k for f, e in zip(found, expected)]))
+
+
+def run(vectors: int, dimension: int, queries: int, k: int, rescore_factor: int, clusters: int, seed: int) -> Dict[str, Any]:
+    corpus, query_vectors = synthetic_corpus(vectors, dimension, queries, clusters, seed)
+    expected = exact_neighbours(corpus, query_vectors, k)
+    float32_bytes = corpus.nbytes
+    report: Dict[str, Any] = {
+        "corpus": {"vectors": vectors, "dimension": dimension, "queries": queries, "k": k, "clusters": clusters, "seed": seed},
+        "float32_bytes": float32_bytes,
+        "results": [],
+    }
+
+    for precision in PRECISIONS:
+        started = time.perf_counter()
+        index = QuantizedIndex.build(corpus, precision)
+        build_seconds = time.perf_counter() - started
+        for factor in sorted({0, rescore_factor}):
+            started = time.perf_counter()
+            found = []
+            for query in query_vectors:
+                _, positions = index.search(query[None, :], max(k, k * factor))
+                positions = positions[0].tolist()
+                found.append(rescore(corpus, query, positions, k) if factor else positions)
+            search_seconds = time.perf_counter() - started
+            recall = recall_at_k(found, expected, k)
+            report["results"].append({
+                "precision": precision,
+                "rescore_factor": factor,
+                "index_bytes": index.nbytes,
+                "memory_saved": round(1 - index.nbytes / float32_bytes, 4),
+                # Exact float32 search has recall 1 by definition
+                f"recall@{k}": round(recall, 4),
+                f"recall@{k}_change": round(recall - 1.0, 4),
+                "build_seconds": round(build_seconds, 3),
+                "mean_search_ms": round(1000 * search_seconds / queries, 3),
+            })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.vectors, args.dimension, args.queries, args.k, args.rescore_factor, args.clusters, args.seed)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Offline benchmark of the RAGService ingestion and retrieval path.
+
+For each corpus size (in chunks) and vector store configuration, a fresh process ingests a
+synthetic corpus through RAGService.load_knowledge_base, with local stand-ins for blob storage and
+the repositories and a deterministic hash embedder (see benchmarks/fakes.py), then runs product
+searches. Reported per case: ingest throughput, p50/p99 query latency, index size on disk and peak
+RSS. Results are written as JSON; pass a previous results file with --compare to get the relative
+change of every metric.
+
+    python -m benchmarks.rag_benchmark --sizes 1000 10000 100000 --stores chroma faiss:flat faiss:hnsw \\
+        --output rag_benchmark.json [--compare previous.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+# Metrics compared between runs, and whether higher is better
+METRICS = {
+    "ingest_chunks_per_second": True,
+    "query_p50_ms": False,
+    "query_p99_ms": False,
+    "index_bytes": False,
+    "peak_rss_bytes": False,
+}
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    ordered = sorted(values)
+    position = min(len(ordered) - 1, max(0, round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[position]
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def _calibrate_words_per_chunk(corpus, chunker) -> float:
+    words = 20_000
+    chunks = sum(1 for _ in chunker.iter_chunks(corpus.iter_lines(1, words=words)))
+    return words / max(chunks, 1)
+
+
+async def _run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    # Imported here so the parent process stays light and every case starts from a clean process
+    from benchmarks.fakes import (
+        HashEmbeddings,
+        InMemoryDocumentationSourceRepository,
+        InMemoryIngestionLedgerRepository,
+        LocalBlobStorageService,
+        SyntheticCorpus,
+    )
+    from config import settings
+    from services.RAGService import RAGService
+    from services.text_chunker import StreamingTokenChunker
+
+    work_directory = tempfile.mkdtemp(prefix="rag-benchmark-")
+    try:
+        backend, _, index_type = case["store"].partition(":")
+        settings.vector_store_backend = backend
+        settings.faiss_index_directory = os.path.join(work_directory, "faiss")
+        if index_type:
+            settings.faiss_index_type = index_type
+        # Measure the vector store path itself, not the caches in front of it
+        settings.embedding_cache_enabled = False
+        settings.retrieval_cache_enabled = False
+        settings.embedding_multi_process = False
+
+        sources = case["products"] * case["sources_per_product"]
+        probe = SyntheticCorpus(case["products"], case["sources_per_product"], 0, seed=case["seed"])
+        chunker = StreamingTokenChunker(settings.chunk_size_tokens, settings.chunk_overlap_tokens, settings.chunk_tokenizer_encoding)
+        words_per_source = int(_calibrate_words_per_chunk(probe, chunker) * case["chunks"] / sources)
+        corpus = SyntheticCorpus(case["products"], case["sources_per_product"], words_per_source, seed=case["seed"])
+
+        rag_service = RAGService(
+            None,
+            chroma_persist_directory=os.path.join(work_directory, "chroma"),
+            embeddings=HashEmbeddings(case["dimension"]),
+            blob_storage_service=LocalBlobStorageService(corpus),
+            documentation_source_repo=InMemoryDocumentationSourceRepository(corpus),
+            ingestion_ledger_repo=InMemoryIngestionLedgerRepository(),
+        )
+
+        started = time.perf_counter()
+        stats = await rag_service.load_knowledge_base()
+        ingest_seconds = time.perf_counter() - started
+
+        latencies = []
+        for product_id, query in corpus.queries(case["queries"]):
+            started = time.perf_counter()
+            await rag_service.search(product_id, query, k=case["k"])
+            latencies.append(1000 * (time.perf_counter() - started))
+        await rag_service.close()
+
+        return {
+            **case,
+            "sources": sources,
+            "chunks_embedded": stats["chunks_embedded"],
+            "failed_sources": stats["failed"],
+            "ingest_seconds": round(ingest_seconds, 3),
+            "ingest_chunks_per_second": round(stats["chunks_embedded"] / ingest_seconds, 2) if ingest_seconds else 0.0,
+            "query_p50_ms": round(_percentile(latencies, 50), 3),
+            "query_p99_ms": round(_percentile(latencies, 99), 3),
+            "query_mean_ms": round(sum(latencies) / len(latencies), 3),
+            "index_bytes": _directory_size(work_directory),
+            # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+            "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024),
+        }
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+
+def _run_in_subprocess(case: Dict[str, Any]) -> Dict[str, Any]:
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.rag_benchmark", "--case", json.dumps(case)],
+        capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        return {**case, "error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _case_key(result: Dict[str, Any]) -> str:
+    return f"{result['store']}@{result['chunks']}"
+
+
+def compare(results: List[Dict[str, Any]], previous: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Relative change of each metric against a previous results file, per case present in both.
+    Positive "improvement" means better, whichever direction the metric goes.
+    """
+    previous_results = {_case_key(result): result for result in previous.get("results", []) if "error" not in result}
+    comparison = {}
+    for result in results:
+        before = previous_results.get(_case_key(result))
+        if before is None or "error" in result:
+            continue
+        comparison[_case_key(result)] = {}
+        for metric, higher_is_better in METRICS.items():
+            if not before.get(metric):
+                continue
+            change = (result[metric] - before[metric]) / before[metric]
+            comparison[_case_key(result)][metric] = {
+                "before": before[metric],
+                "after": result[metric],
+                "change": round(change, 4),
+                "improvement": round(change if higher_is_better else -change, 4),
+            }
+    return comparison
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000], help="Corpus sizes in chunks (up to 1000000)")
+    parser.add_argument("--stores", nargs="+", default=["chroma", "faiss:flat", "faiss:hnsw"],
+                        help='Vector stores as "chroma" or "faiss:<index type>"')
+    parser.add_argument("--products", type=int, default=10)
+    parser.add_argument("--sources-per-product", type=int, default=4)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="rag_benchmark.json")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    parser.add_argument("--case", help=argparse.SUPPRESS)  # Internal: run one case and print its result
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(asyncio.run(_run_case(json.loads(args.case)))))
+        return
+
+    results = []
+    for chunks in args.sizes:
+        for store in args.stores:
+            case = {
+                "store": store, "chunks": chunks, "products": args.products,
+                "sources_per_product": args.sources_per_product, "dimension": args.dimension,
+                "queries": args.queries, "k": args.k, "seed": args.seed,
+            }
+            print(f"Running {store} with {chunks} chunks...", file=sys.stderr)
+            results.append(_run_in_subprocess(case))
+            print(json.dumps(results[-1]), file=sys.stderr)
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            report["comparison"] = compare(results, json.load(f))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report.get("comparison", report["results"]), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import Any, Dict, List, Optional
 from secrets import token_urlsafe
 
 class Settings(BaseSettings):
@@ -17,6 +18,90 @@ class Settings(BaseSettings):
     temperature: float = 0.5
     model_api_key: str
     openai_api_key: str
+
+    # Shared LLM client pool (see agents/utils/llm_registry.py)
+    llm_pool_max_connections: int = 20
+    llm_pool_max_keepalive_connections: int = 10
+    llm_pool_keepalive_expiry: float = 30.0  # Seconds an idle connection is kept open
+    llm_request_timeout: float = 120.0
+
+    # LLM response cache (see agents/utils/llm_cache.py)
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 1024
+    llm_cache_ttl_seconds: float = 3600.0
+    llm_cache_persistent_backend: str = "none"  # Options: "none", "disk", "mysql"
+    llm_cache_disk_path: str = "llm_cache.sqlite3"
+
+    # Evaluation workflow
+    persona_simulation_concurrency: int = 4  # Personas simulated at the same time per evaluation
+    evaluation_job_concurrency: int = 2  # Background evaluation jobs running at the same time per worker
+    evaluation_job_max_pending: int = 20  # Running plus queued jobs before new ones are rejected
+    feasibility_assessment_mode: str = "batch"  # Options: "batch" (one prompt), "per_feature" (one call per feature)
+    feasibility_assessment_concurrency: int = 4
+    feasibility_assessment_max_retries: int = 1  # Extra attempts for a feature whose assessment fails
+    workflow_graph_endpoint_enabled: bool = False  # Opt-in GET /workflow/graph
+    workflow_checkpointer: str = "none"  # Options: "none", "mysql", "sqlite" (see workflow/checkpointer.py)
+    workflow_checkpoint_sqlite_path: str = "checkpoints.sqlite3"
+    # Token budget (tiktoken count) for the variable content each node puts into its prompts;
+    # nodes left out are not limited (see agents/utils/token_budget.py)
+    node_token_budgets: Dict[str, int] = {
+        "fetch_product_info": 3000,
+        "interaction_simulation": 3000,
+        "ai_feature_ideation": 3500,
+        "feature_suggestion_prioritization": 2500,
+        "technical_feasibility_assessment": 2500,
+        "final_report_generation": 4000,
+    }
+
+    # Embedding model shared by every RAGService in the process (see services/embedding_registry.py)
+    embedding_model: str = "huggingface"  # Options: "huggingface", "groq"
+    embedding_model_kwargs: Dict[str, Any] = {}  # e.g. {"model_name": "sentence-transformers/all-MiniLM-L6-v2"}
+    embedding_warm_up_text: str = "warm up"
+    embedding_batch_size: int = 32  # Encoder batch size
+    embedding_multi_process: bool = False  # Encode on a sentence-transformers multi-process pool (one process per core/device)
+    embedding_multi_process_devices: List[str] = []  # e.g. ["cpu", "cpu", "cpu", "cpu"]; empty uses sentence-transformers' default
+    embedding_cache_enabled: bool = True  # Persistent chunk embedding cache (see services/embedding_cache.py)
+    embedding_cache_directory: str = "embedding_cache"
+    embedding_cache_max_entries: int = 100_000  # Vectors kept per embedding model; the least recently used are evicted
+    ingestion_write_batch_size: int = 256  # Chunks embedded and written to the vector store per round during ingestion
+    ingestion_download_concurrency: int = 4  # Documentation sources downloaded and chunked at the same time
+    ingestion_queue_batches: int = 4  # Chunk batches waiting to be embedded before downloads pause
+    chunk_size_tokens: int = 256  # Documentation chunk size (see services/text_chunker.py)
+    chunk_overlap_tokens: int = 50
+    chunk_tokenizer_encoding: str = "cl100k_base"  # tiktoken encoding used to measure chunks
+    blob_stream_chunk_bytes: int = 1024 * 1024  # Download piece size when streaming blobs into the chunker
+    figma_api_base_url: str = "https://api.figma.com"  # Point at a local stand-in to replay recorded files
+    figma_stream_chunk_bytes: int = 256 * 1024  # Read size when parsing Figma files as they download (see services/figma_stream_parser.py)
+    figma_summary_concurrency: int = 4  # Map-reduce summarization calls in flight per Figma design
+    figma_summary_requests_per_second: float = 0.5  # Rate limit shared by all Figma summarization calls
+    figma_summary_max_burst: int = 5  # Calls that may start at once after the limiter has been idle
+    figma_summary_reduce_max_tokens: int = 3000  # Summary tokens collapsed by one reduce call
+    # Retrieval options per workflow node: k, mmr, fetch_k (MMR candidates), lambda_mult (see workflow/retrieval.py)
+    node_retrieval: Dict[str, Dict[str, Any]] = {
+        "fetch_product_info": {"k": 10, "mmr": True, "fetch_k": 40, "lambda_mult": 0.5},
+        "ai_feature_ideation": {"k": 3, "mmr": False},
+    }
+    # Vector store backend (see services/vector_store.py)
+    vector_store_backend: str = "chroma"  # Options: "chroma", "faiss"
+    faiss_index_directory: str = "faiss_index"  # One index per product, memory-mapped on load
+    faiss_index_type: str = "flat"  # Options: "flat" (exact), "ivf", "hnsw", "float16", "int8" (compact NumPy vectors)
+    faiss_ivf_nlist: int = 100  # Upper bound on IVF lists; capped so every list gets enough training vectors
+    faiss_ivf_nprobe: int = 10
+    faiss_hnsw_m: int = 32
+    faiss_hnsw_ef_search: int = 64
+    faiss_rescore_factor: int = 4  # float16/int8: re-score k * factor candidates exactly against float32 vectors (0 disables)
+    # Retrieval result cache (see services/retrieval_cache.py)
+    retrieval_cache_enabled: bool = True
+    retrieval_cache_max_entries: int = 2048
+    retrieval_cache_max_bytes: int = 64 * 1024 * 1024
+    retrieval_cache_ttl_seconds: float = 600.0  # Bounds staleness after another worker re-indexes a product (Chroma; FAISS keys follow the index file)
+    indexing_job_concurrency: int = 1  # Documentation sources chunked and embedded at the same time per worker
+    indexing_job_max_pending: int = 100
+
+    # OpenTelemetry tracing (see tracing.py)
+    tracing_exporter: str = "none"  # Options: "none", "console", "otlp", "memory" (in-process, for tests)
+    tracing_otlp_endpoint: Optional[str] = None  # Defaults to the OTLP exporter's own endpoint
+    tracing_service_name: str = "evaluation-service"
     
     class Config:
         env_file = ".env"
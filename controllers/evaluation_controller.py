@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Form, Body
-from typing import Dict, Optional
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from typing import Dict, List, Optional
 from services.Evaluation import EvaluationService
 from repositories.EvaluationRepository import EvaluationRepository
 from services.RAGService import RAGService
@@ -7,17 +8,22 @@ from services.UserAgentService import UserAgentService
 from agents.product_manager_agent import ProductManagerAgent
 from agents.ai_features_ideation_agent import AIFeatureIdeationAgent
 from agents.developer_agent import DeveloperAgent
-from agents.user_agent import UserAgent
-from database import transaction
+from database import transaction, transaction_scope, PooledConnection
+from models.Evaluation import EvaluationStatus
+from services.evaluation_job_runner import evaluation_job_runner, JobQueueFullError
+from workflow.graph_registry import evaluation_graph_registry
+from workflow.evaluation_workflow import get_checkpointed_state
 from config import settings
 from logging_config import setup_logging
 import logging
 from fastapi.encoders import jsonable_encoder
 from services.chat_service import ChatService
-from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
+from agents.utils.llm_registry import get_llm
+from agents.utils.llm_cache import no_llm_cache
+from services.streaming_metrics import streaming_metrics
 
 import json
+import time
 
 # Setup logging
 setup_logging()
@@ -25,28 +31,41 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-def get_llm():
-    if settings.model_api == "groq":
-        return ChatGroq(
-            api_key=settings.model_api_key,
-            temperature=settings.temperature,
-            model_name=settings.model_name
-        )
-    elif settings.model_api == "openai":
-        return ChatOpenAI(
-            api_key=settings.openai_api_key,
-            temperature=settings.temperature,
-            model_name=settings.model_name
-        )
-    else:
-        raise ValueError(f"Unsupported model API: {settings.model_api}")
+
+async def load_personas(
+    user_agent_service: UserAgentService,
+    user_agent_definition_id: Optional[int],
+    user_agent_definition_ids: Optional[List[int]],
+) -> List[Dict]:
+    # Collect the personas to evaluate; the single-id form field is still accepted
+    persona_ids = list(dict.fromkeys(
+        ([user_agent_definition_id] if user_agent_definition_id is not None else []) + (user_agent_definition_ids or [])
+    ))
+    if not persona_ids:
+        raise HTTPException(status_code=422, detail="At least one user agent definition id is required")
+
+    # Fetch user agent definitions; the workflow builds a UserAgent for each of them
+    personas = []
+    for persona_id in persona_ids:
+        user_agent_definition = await user_agent_service.fetch_user_agent_definition(persona_id)
+        if not user_agent_definition:
+            raise HTTPException(status_code=404, detail=f"User agent definition {persona_id} not found")
+
+        # Access characteristics from the dictionary
+        personas.append({
+            "id": persona_id,
+            "name": user_agent_definition.get('name'),
+            "characteristics": user_agent_definition['characteristics'],
+        })
+    return personas
 
 @router.post("/trigger-evaluation", response_model=Dict)
 async def trigger_evaluation(
     name: str = Form(...),
     product_id: int = Form(...),
-    user_agent_definition_id: int = Form(...),
     evaluation_type: str = Form(...),
+    user_agent_definition_id: Optional[int] = Form(None),
+    user_agent_definition_ids: Optional[List[int]] = Form(None),
     db_con=Depends(transaction),
 ):
     # Initialize repositories and services
@@ -57,23 +76,14 @@ async def trigger_evaluation(
     ai_feature_ideation_agent = AIFeatureIdeationAgent()
     developer_agent = DeveloperAgent()
 
-    
-    # Fetch user agent definition
-    user_agent_definition = await user_agent_service.fetch_user_agent_definition(user_agent_definition_id)
-    print("Printifn sample user agent definition", user_agent_definition)
-    
-    if not user_agent_definition:
-        raise HTTPException(status_code=404, detail="User agent definition not found")
-    
-    # Access characteristics from the dictionary
-    user_agent = UserAgent(agent_characteristics=user_agent_definition['characteristics'])
+    personas = await load_personas(user_agent_service, user_agent_definition_id, user_agent_definition_ids)
     
     # Initialize EvaluationService 
     evaluation_service = EvaluationService(
         evaluation_repository=evaluation_repository,
         rag_service=rag_service,
         product_manager_agent=product_manager_agent,
-        user_agent=user_agent,
+        personas=personas,
         ai_feature_ideation_agent=ai_feature_ideation_agent,
         developer_agent=developer_agent
     )
@@ -91,29 +101,120 @@ async def trigger_evaluation(
 
     return jsonable_encoder(result)
 
-@router.post("/create-persona-chat", response_model=Dict)
-async def create_persona_chat(
-    data: Dict = Body(...),
-    db_con=Depends(transaction),
+
+@router.post("/evaluations/jobs", response_model=Dict, status_code=202)
+async def submit_evaluation_job(
+    name: str = Form(...),
+    product_id: int = Form(...),
+    evaluation_type: str = Form(...),
+    user_agent_definition_id: Optional[int] = Form(None),
+    user_agent_definition_ids: Optional[List[int]] = Form(None),
 ):
-    persona = data.get("persona")
-    business_idea = data.get("businessIdea")
+    """
+    Creates the evaluation and runs its workflow in the background. Poll
+    GET /evaluations/{evaluation_id} for the status and result.
+    """
+    if not evaluation_job_runner.has_capacity():
+        raise HTTPException(status_code=503, detail="Too many evaluations in progress, retry later")
 
-    # Initialize LLM for customer persona interaction
-    llm = get_llm()
+    # Borrow pooled connections per query so the job does not hold one for the whole workflow
+    db = PooledConnection()
+    personas = await load_personas(UserAgentService(db), user_agent_definition_id, user_agent_definition_ids)
 
-    # Step 1: Refine the business idea
-    refinement_prompt = f"""
+    evaluation_service = EvaluationService(
+        evaluation_repository=EvaluationRepository(db),
+        rag_service=RAGService(db),
+        product_manager_agent=ProductManagerAgent(agent_characteristics=None),
+        personas=personas,
+        ai_feature_ideation_agent=AIFeatureIdeationAgent(),
+        developer_agent=DeveloperAgent()
+    )
+    evaluation_id = await evaluation_service.create_evaluation(name=name, product_id=product_id)
+    logger.info("Created new evaluation with ID: %s", evaluation_id)
+
+    try:
+        evaluation_job_runner.submit(
+            evaluation_id,
+            lambda: evaluation_service.run_evaluation_job(evaluation_id, evaluation_type)
+        )
+    except JobQueueFullError as e:
+        await evaluation_service.evaluation_repository.save_result(evaluation_id, EvaluationStatus.FAILED, None, str(e))
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return {"evaluation_id": evaluation_id, "status": EvaluationStatus.START.value}
+
+
+@router.post("/evaluations/{evaluation_id}/resume", response_model=Dict, status_code=202)
+async def resume_evaluation(evaluation_id: int):
+    """
+    Resumes a failed or interrupted evaluation from its last checkpoint in the background;
+    nodes that already completed are not run again.
+    """
+    db = PooledConnection()
+    evaluation_repository = EvaluationRepository(db)
+    evaluation = await evaluation_repository.get_by_id(evaluation_id)
+    if not evaluation:
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+    status = evaluation.status.value if isinstance(evaluation.status, EvaluationStatus) else evaluation.status
+    if status == EvaluationStatus.COMPLETED.value:
+        raise HTTPException(status_code=409, detail="Evaluation is already completed")
+    if evaluation_job_runner.is_active(evaluation_id):
+        raise HTTPException(status_code=409, detail="Evaluation is already running")
+    if await get_checkpointed_state(evaluation_id) is None:
+        raise HTTPException(status_code=409, detail="Evaluation has no checkpoint to resume from")
+    if not evaluation_job_runner.has_capacity():
+        raise HTTPException(status_code=503, detail="Too many evaluations in progress, retry later")
+
+    evaluation_service = EvaluationService(
+        evaluation_repository=evaluation_repository,
+        rag_service=RAGService(db),
+        product_manager_agent=ProductManagerAgent(agent_characteristics=None),
+        ai_feature_ideation_agent=AIFeatureIdeationAgent(),
+        developer_agent=DeveloperAgent()
+    )
+    try:
+        evaluation_job_runner.submit(
+            evaluation_id,
+            lambda: evaluation_service.run_evaluation_job(evaluation_id, resume=True)
+        )
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return {"evaluation_id": evaluation_id, "status": EvaluationStatus.IN_PROGRESS.value}
+
+
+@router.get("/evaluations/{evaluation_id}", response_model=Dict)
+async def get_evaluation(
+    evaluation_id: int,
+    db_con=Depends(transaction),
+):
+    evaluation = await EvaluationRepository(db_con[0]).get_by_id(evaluation_id)
+    if not evaluation:
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+
+    status = evaluation.status.value if isinstance(evaluation.status, EvaluationStatus) else evaluation.status
+    return jsonable_encoder({
+        "id": evaluation.id,
+        "name": evaluation.name,
+        "product_id": evaluation.product_id,
+        "status": status,
+        "job_active": evaluation_job_runner.is_active(evaluation_id),
+        "result": json.loads(evaluation.result) if evaluation.result else None,
+        "error": evaluation.error,
+        "created_at": evaluation.created_at,
+        "updated_at": evaluation.updated_at,
+    })
+
+def build_refinement_prompt(business_idea: str) -> str:
+    return f"""
 Please refine the following business idea in clear, concise language, adding necessary details to ensure clarity and focus:
 Don't assume anything and write more, just rephrase and write the same. 
 {business_idea}
 """
-    refined_idea_response = await llm.ainvoke([{"role": "user", "content": refinement_prompt}])
-    refined_business_idea = refined_idea_response.content.strip()
 
-    # Step 2: Customer persona interaction
-    # Create the customer persona prompt
-    customer_persona_prompt = f"""
+
+def build_customer_persona_prompt(persona: Dict, refined_business_idea: str) -> str:
+    return f"""
 You are an AI assistant embodying the following customer persona:
 Name: {persona['name']}
 Summary: {persona['summary']}
@@ -148,12 +249,9 @@ Remember to be honest and detailed in your feedback, expressing your thoughts an
 
 """
 
-    # Get customer feedback
-    customer_feedback_response = await llm.ainvoke([{"role": "user", "content": customer_persona_prompt}])
-    customer_feedback = customer_feedback_response.content.strip()
-
 
-    business_expert_prompt = f"""
+def build_business_expert_prompt(customer_feedback: str, refined_business_idea: str) -> str:
+    return f"""
 You are a business strategy expert known for providing out-of-the-box solutions and unconventional ideas. 
 Given the customer feedback below and the refined business idea, provide a comprehensive analysis and actionable recommendations for the business owner.
 
@@ -208,6 +306,55 @@ Note:
 3. Also, provide ideas that are outside of the business idea to encourage the user to consider pivoting.
 """
 
+
+def build_chat_messages(session_info: Dict, chat_history: List[Dict], message: str) -> List[Dict]:
+    business_expert_prompt = f"""
+    You are a business strategy expert providing advice on the following business idea:
+
+    Business Idea: {session_info['business_idea']}
+
+    Initial Business Analysis:
+    {session_info['initial_response']}
+
+    You are now in a conversation with the business owner. Provide expert advice, insights, and answers to their questions based on the business idea, customer persona, and initial analysis. Be concise, practical, and insightful in your responses.
+
+    Current conversation:
+    """
+
+    # Prepare messages for LLM
+    messages = [{"role": "system", "content": business_expert_prompt}]
+    messages.extend([{"role": "user" if msg["is_user"] else "assistant", "content": msg["content"]} for msg in chat_history])
+    messages.append({"role": "user", "content": message})
+    return messages
+
+
+@router.post("/create-persona-chat", response_model=Dict)
+async def create_persona_chat(
+    data: Dict = Body(...),
+    db_con=Depends(transaction),
+):
+    persona = data.get("persona")
+    business_idea = data.get("businessIdea")
+
+    # Initialize LLM for customer persona interaction
+    llm = get_llm()
+
+    # Step 1: Refine the business idea
+    refinement_prompt = build_refinement_prompt(business_idea)
+    refined_idea_response = await llm.ainvoke([{"role": "user", "content": refinement_prompt}])
+    refined_business_idea = refined_idea_response.content.strip()
+
+    # Step 2: Customer persona interaction
+    # Create the customer persona prompt
+    customer_persona_prompt = build_customer_persona_prompt(persona, refined_business_idea)
+
+    # Get customer feedback
+    customer_feedback_response = await llm.ainvoke([{"role": "user", "content": customer_persona_prompt}])
+    customer_feedback = customer_feedback_response.content.strip()
+
+
+    business_expert_prompt = build_business_expert_prompt(customer_feedback, refined_business_idea)
+
     # Get business expert analysis
     business_expert_response = await llm.ainvoke([{"role": "user", "content": business_expert_prompt}])
     business_expert_report = business_expert_response.content.strip()
@@ -262,27 +409,12 @@ async def chat(
     
     message = data.get("message")
 
-    # Prepare the business expert prompt
-    business_expert_prompt = f"""
-    You are a business strategy expert providing advice on the following business idea:
-
-    Business Idea: {session_info['business_idea']}
-
-    Initial Business Analysis:
-    {session_info['initial_response']}
-
-    You are now in a conversation with the business owner. Provide expert advice, insights, and answers to their questions based on the business idea, customer persona, and initial analysis. Be concise, practical, and insightful in your responses.
-
-    Current conversation:
-    """
-
-    # Prepare messages for LLM
-    messages = [{"role": "system", "content": business_expert_prompt}]
-    messages.extend([{"role": "user" if msg["is_user"] else "assistant", "content": msg["content"]} for msg in chat_history])
-    messages.append({"role": "user", "content": message})
+    # Prepare the business expert prompt and messages for LLM
+    messages = build_chat_messages(session_info, chat_history, message)
 
-    # Get response from LLM
-    response = await llm.ainvoke(messages)
+    # Get response from LLM; follow-up questions should always get a fresh answer
+    with no_llm_cache():
+        response = await llm.ainvoke(messages)
 
     # Save the new message and response
     await chat_service.save_chat_message(session_id, message, is_user=True)
@@ -294,3 +426,190 @@ async def chat(
         return {"response": response.content, "message": "This was your last question. Chat limit reached."}
     else:
         return {"response": response.content, "remaining_messages": remaining_messages - 1}
+
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class TokenStream:
+    """
+    Streams LLM tokens as SSE events, collecting the assembled text and measuring the
+    time from the start of the request to the first token.
+    """
+
+    def __init__(self, llm, endpoint: str, started_at: float):
+        """
+        :param started_at: time.perf_counter() taken when the request handler was entered, since
+            the body generator only starts once the response is being sent.
+        """
+        self.llm = llm
+        self.endpoint = endpoint
+        self.started_at = started_at
+        self.time_to_first_token: Optional[float] = None
+
+    async def stream(self, messages: List[Dict], stage: str, parts: List[str]):
+        async for chunk in self.llm.astream(messages):
+            if not chunk.content:
+                continue
+            if self.time_to_first_token is None:
+                self.time_to_first_token = time.perf_counter() - self.started_at
+                streaming_metrics.record_time_to_first_token(self.endpoint, self.time_to_first_token)
+                logger.info("Time to first token for %s: %.3fs", self.endpoint, self.time_to_first_token)
+            parts.append(chunk.content)
+            yield sse_event("token", {"stage": stage, "content": chunk.content})
+
+    @property
+    def time_to_first_token_ms(self) -> Optional[float]:
+        return self.time_to_first_token * 1000 if self.time_to_first_token is not None else None
+
+
+@router.post("/create-persona-chat/stream")
+async def create_persona_chat_stream(
+    data: Dict = Body(...),
+):
+    """
+    Server-Sent Events variant of /create-persona-chat. Emits a `stage` event before the refinement,
+    persona feedback and expert report steps, `token` events as tokens arrive, and a final `done`
+    event once the session has been saved.
+    """
+    started_at = time.perf_counter()
+    persona = data.get("persona")
+    business_idea = data.get("businessIdea")
+    llm = get_llm()
+
+    async def event_stream():
+        token_stream = TokenStream(llm, "create-persona-chat", started_at)
+        try:
+            # Step 1: Refine the business idea
+            yield sse_event("stage", {"stage": "refinement"})
+            parts = []
+            async for event in token_stream.stream(
+                [{"role": "user", "content": build_refinement_prompt(business_idea)}], "refinement", parts
+            ):
+                yield event
+            refined_business_idea = "".join(parts).strip()
+
+            # Step 2: Customer persona interaction
+            yield sse_event("stage", {"stage": "persona_feedback"})
+            customer_persona_prompt = build_customer_persona_prompt(persona, refined_business_idea)
+            parts = []
+            async for event in token_stream.stream(
+                [{"role": "user", "content": customer_persona_prompt}], "persona_feedback", parts
+            ):
+                yield event
+            customer_feedback = "".join(parts).strip()
+
+            # Step 3: Business expert analysis
+            yield sse_event("stage", {"stage": "expert_report"})
+            business_expert_prompt = build_business_expert_prompt(customer_feedback, refined_business_idea)
+            parts = []
+            async for event in token_stream.stream(
+                [{"role": "user", "content": business_expert_prompt}], "expert_report", parts
+            ):
+                yield event
+            business_expert_report = "".join(parts).strip()
+
+            try:
+                business_expert_report_json = json.loads(business_expert_report)
+            except json.JSONDecodeError:
+                business_expert_report_json = {"error": "Failed to parse business expert report JSON"}
+
+            # The request's connection is released before the body streams, so save on a fresh one
+            async with transaction_scope() as (conn, _):
+                session_id = await ChatService(conn).save_chat_session(
+                    persona['id'],
+                    refined_business_idea,
+                    customer_persona_prompt,
+                    business_expert_report
+                )
+
+            yield sse_event("done", {
+                "session_id": session_id,
+                "refined_business_idea": refined_business_idea,
+                "business_expert_report": business_expert_report_json,
+                "time_to_first_token_ms": token_stream.time_to_first_token_ms
+            })
+        except Exception as e:
+            logger.error("Streaming persona chat failed: %s", str(e))
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.post("/chat/{session_id}/stream")
+async def chat_stream(
+    session_id: int,
+    data: Dict = Body(...),
+    db_con=Depends(transaction),
+):
+    """
+    Server-Sent Events variant of /chat/{session_id}. The assembled answer is saved once the
+    stream ends and reported in the final `done` event.
+    """
+    started_at = time.perf_counter()
+    chat_service = ChatService(db_con[0])
+
+    # Get chat session information
+    session_info = await chat_service.get_chat_session(session_id)
+    if not session_info:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+
+    # Get chat history
+    chat_history = await chat_service.get_chat_history(session_id)
+    message = data.get("message")
+    llm = get_llm()
+
+    async def event_stream():
+        # Check if the chat limit has been reached
+        if len(chat_history) >= 21:  # 1 initial prompt + 10 user messages + 10 AI responses
+            yield sse_event("done", {"response": "Chat limit reached. You can ask a maximum of 10 questions."})
+            return
+
+        token_stream = TokenStream(llm, "chat", started_at)
+        try:
+            yield sse_event("stage", {"stage": "response"})
+            parts = []
+            async for event in token_stream.stream(
+                build_chat_messages(session_info, chat_history, message), "response", parts
+            ):
+                yield event
+            response_content = "".join(parts)
+
+            # Save the new message and response on a fresh connection
+            async with transaction_scope() as (conn, _):
+                stream_chat_service = ChatService(conn)
+                await stream_chat_service.save_chat_message(session_id, message, is_user=True)
+                await stream_chat_service.save_chat_message(session_id, response_content, is_user=False)
+
+            done = {"response": response_content, "time_to_first_token_ms": token_stream.time_to_first_token_ms}
+            remaining_messages = 10 - (len(chat_history) - 1) // 2
+            if remaining_messages <= 1:
+                done["message"] = "This was your last question. Chat limit reached."
+            else:
+                done["remaining_messages"] = remaining_messages - 1
+            yield sse_event("done", done)
+        except Exception as e:
+            logger.error("Streaming chat failed for session %s: %s", session_id, str(e))
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get("/chat/stream-metrics", response_model=Dict)
+async def chat_stream_metrics():
+    return streaming_metrics.summary()
+
+
+@router.get("/workflow/graph", response_class=PlainTextResponse)
+async def get_workflow_graph():
+    """
+    Returns the evaluation graph as Mermaid source, rendered locally. Disabled unless
+    workflow_graph_endpoint_enabled is set.
+    """
+    if not settings.workflow_graph_endpoint_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return evaluation_graph_registry.draw_mermaid()
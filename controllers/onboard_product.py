@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from typing import Dict, Any
 from schemas.product_onboarding import ProductOnboardingRequest, ProductOnboardingResponse, OnboardingResult
 from services.blob_storage_service import BlobStorageService
 from services.product_onboarding_service import ProductOnboardingService
+from services.indexing_job_runner import indexing_job_runner, queue_indexing, queue_unindexed_sources
+from repositories.DocumentationSourceRepository import DocumentationSourceRepository
 from database import get_db_conn, transaction
+from fastapi.encoders import jsonable_encoder
 import os
 import logging
 
@@ -12,11 +15,16 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.post("/product/onboard", response_model=ProductOnboardingResponse)
-async def onboard_product(onboarding_request: ProductOnboardingRequest, db_con=Depends(transaction)):
+async def onboard_product(
+    onboarding_request: ProductOnboardingRequest, background_tasks: BackgroundTasks, db_con=Depends(transaction)
+):
     """
-    Endpoint to onboard a new product.
+    Endpoint to onboard a new product. Each stored source is chunked, embedded and persisted by a
+    background indexing job, queued once the request's transaction has committed so the job (and
+    its QUEUED status update on another connection) sees the new row.
 
     :param onboarding_request: Details required to onboard the product.
+    :param background_tasks: Runs after the response, once the transaction dependency has exited.
     :param db_transaction: Database transaction dependency.
     :return: Results of the onboarding process.
     """
@@ -47,6 +55,8 @@ async def onboard_product(onboarding_request: ProductOnboardingRequest, db_con=D
     # Format the results
     formatted_results = []
     for url, result in results_dict.items():
+        if result.get('status') == 'success' and result.get('id'):
+            background_tasks.add_task(queue_indexing, result['id'])
         formatted_result = OnboardingResult(
             url=url,
             status=result.get('status'),
@@ -57,3 +67,46 @@ async def onboard_product(onboarding_request: ProductOnboardingRequest, db_con=D
         formatted_results.append(formatted_result)
 
     return ProductOnboardingResponse(results=formatted_results)
+
+
+@router.get("/product/{product_id}/sources/indexing-status")
+async def get_indexing_status(product_id: int, db_con=Depends(transaction)):
+    """
+    Indexing job status of each documentation source of a product.
+    """
+    statuses = await DocumentationSourceRepository(db_con[0]).get_indexing_statuses(product_id)
+    for status in statuses:
+        status["job_active"] = indexing_job_runner.is_active(status["id"])
+    return jsonable_encoder({"product_id": product_id, "sources": statuses})
+
+
+@router.post("/product/sources/{source_id}/reindex", status_code=202)
+async def reindex_source(source_id: int, db_con=Depends(transaction)):
+    """
+    Queues the indexing job of a source again, e.g. after it failed.
+    """
+    source = await DocumentationSourceRepository(db_con[0]).get_by_id(source_id)
+    if not source:
+        raise HTTPException(status_code=404, detail="Documentation source not found")
+    if not await queue_indexing(source_id):
+        raise HTTPException(status_code=503, detail="Indexing queue is full, retry later")
+    return {"source_id": source_id, "indexing_status": "QUEUED"}
+
+
+@router.post("/product/{product_id}/reindex", status_code=202)
+async def reindex_product(product_id: int, include_indexed: bool = False):
+    """
+    Queues the indexing job of every source of a product that was never indexed, or of every
+    source with include_indexed. Sources that did not fit in the queue are marked FAILED and are
+    picked up by calling this again.
+    """
+    counts = await queue_unindexed_sources(product_id, include_indexed)
+    return {"product_id": product_id, **counts}
+
+
+@router.post("/product/sources/backfill", status_code=202)
+async def backfill_sources():
+    """
+    Queues the indexing job of every source, across all products, that was never indexed.
+    """
+    return await queue_unindexed_sources()
@@ -1,4 +1,5 @@
 from config import settings
+from contextlib import asynccontextmanager
 import aiomysql
 
 db_pool = None
@@ -44,3 +45,34 @@ async def transaction():
                 await conn.rollback()  # Rollback on error
                 raise e
 
+
+# Context-manager form of transaction() for work that runs outside a request's dependency scope,
+# e.g. the body of a streaming response, which is sent after the request dependencies have exited.
+transaction_scope = asynccontextmanager(transaction)
+
+
+@asynccontextmanager
+async def _pooled_cursor(*cursor_args):
+    if db_pool is None:
+        await init_db()
+    async with db_pool.acquire() as conn:
+        async with conn.cursor(*cursor_args) as cur:
+            yield cur
+
+
+class PooledConnection:
+    """
+    Stand-in for an aiomysql connection that borrows a pooled connection for each cursor and
+    returns it as soon as the cursor block exits. Lets long-running work such as background
+    evaluation jobs use the repositories without pinning a connection for its whole duration.
+    The pool runs with autocommit, so commit() and rollback() are no-ops.
+    """
+
+    def cursor(self, *cursor_args):
+        return _pooled_cursor(*cursor_args)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
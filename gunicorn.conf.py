@@ -0,0 +1,12 @@
+# Import the app in the master so the embedding model loaded in when_ready is shared copy-on-write
+# by the forked workers instead of being loaded once per worker. Nothing else that holds a socket,
+# thread or file handle (tracing exporter, checkpointer connection, pools) is created at import time;
+# the app lifespan creates those in each worker.
+preload_app = True
+
+
+def when_ready(server):
+    # Only load the weights here; each worker runs the warm-up encode during its lifespan startup,
+    # since torch thread pools started before the fork are not usable in the children.
+    from services.embedding_registry import embedding_registry
+    embedding_registry.load()
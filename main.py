@@ -1,3 +1,5 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.responses import HTMLResponse
 from fastapi.requests import Request
@@ -6,8 +8,43 @@ from controllers.user_controller import router as user_router
 from controllers.user_agent_controller import router as user_agent_router
 from controllers.evaluation_controller import router as evaluation_router
 from controllers.onboard_product import router as product_onboarding_router
+from agents.utils.llm_registry import llm_registry
+from agents.utils.llm_cache import llm_response_cache
+from services.retrieval_cache import retrieval_cache
+from services.embedding_cache import embedding_cache
+from services.evaluation_job_runner import evaluation_job_runner
+from services.indexing_job_runner import indexing_job_runner
+from workflow.graph_registry import evaluation_graph_registry
+from services.embedding_registry import embedding_registry
+from workflow.checkpointer import create_checkpointer
+from tracing import instrument_app, setup_tracing, shutdown_tracing
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Exporters and database connections are created here, in each worker, rather than at import
+    # time in the gunicorn master, so no gRPC channel or sqlite3 connection is shared across the fork
+    setup_tracing()
+    evaluation_graph_registry.configure(create_checkpointer())
+    # Build the shared LLM clients before the first request needs them
+    llm_registry.warm_up()
+    # Compile the evaluation graph once instead of on every evaluation
+    evaluation_graph_registry.warm_up()
+    # Load the embedding model once per process (already loaded when gunicorn preloads it) and run a warm-up encode
+    await asyncio.to_thread(embedding_registry.warm_up)
+    yield
+    await evaluation_job_runner.shutdown()
+    await indexing_job_runner.shutdown()
+    embedding_registry.close()
+    embedding_cache.close()
+    await llm_registry.close()
+    shutdown_tracing()
+
+
+app = FastAPI(lifespan=lifespan)
+# Spans for every route, LLM call, workflow node, MySQL query and blob/RAG operation; the exporter
+# is set up in the lifespan
+instrument_app(app)
 
 
 app.include_router(user_router, prefix="/api/users")
@@ -26,4 +63,39 @@ async def index(request: Request):
 
 @app.get("/health", response_class=JSONResponse)
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/llm-pool/stats", response_class=JSONResponse)
+async def llm_pool_stats():
+    return llm_registry.stats()
+
+
+@app.get("/llm-cache/stats", response_class=JSONResponse)
+async def llm_cache_stats():
+    return llm_response_cache.stats()
+
+
+@app.get("/embedding-models/stats", response_class=JSONResponse)
+async def embedding_model_stats():
+    return embedding_registry.stats()
+
+
+@app.get("/embedding-cache/stats", response_class=JSONResponse)
+async def embedding_cache_stats():
+    return embedding_cache.stats()
+
+
+@app.get("/retrieval-cache/stats", response_class=JSONResponse)
+async def retrieval_cache_stats():
+    return retrieval_cache.stats()
+
+
+@app.get("/evaluation-jobs/stats", response_class=JSONResponse)
+async def evaluation_job_stats():
+    return evaluation_job_runner.stats()
+
+
+@app.get("/indexing-jobs/stats", response_class=JSONResponse)
+async def indexing_job_stats():
+    return indexing_job_runner.stats()
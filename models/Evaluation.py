@@ -9,6 +9,7 @@ class EvaluationStatus(Enum):
     START = "START"
     IN_PROGRESS = "IN_PROGRESS"
     COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
 
 
 @dataclass
@@ -17,6 +18,8 @@ class Evaluation:
     name: str = ""
     status: EvaluationStatus = EvaluationStatus.START
     product_id: int = 0
+    result: Optional[str] = None  # JSON-encoded workflow result
+    error: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
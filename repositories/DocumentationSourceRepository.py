@@ -113,4 +113,60 @@ class DocumentationSourceRepository:
                 return results
         except Exception as e:
             logger.error(f"Error retrieving sources for Product ID {product_id}: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    async def update_indexing_status(self, documentation_source_id: int, status: str, error: Optional[str] = None) -> bool:
+        """
+        Records the indexing job status of a source (QUEUED, INDEXING, INDEXED or FAILED).
+        """
+        query = """
+        UPDATE DocumentationSources
+        SET indexing_status = %s, indexing_error = %s, indexed_at = IF(%s = 'INDEXED', NOW(), indexed_at)
+        WHERE id = %s;
+        """
+        try:
+            async with self.db_con.cursor() as cur:
+                await cur.execute(query, (status, error, status, documentation_source_id))
+                return cur.rowcount > 0
+        except Exception as e:
+            logger.error(f"Error updating indexing status of DocumentationSource ID {documentation_source_id}: {e}")
+            raise e
+
+    async def get_indexing_statuses(self, product_id: int) -> List[Dict[str, Any]]:
+        """
+        Returns the indexing status of every source of a product.
+        """
+        query = """
+        SELECT id, type, url, indexing_status, indexing_error, indexed_at
+        FROM DocumentationSources WHERE product_id = %s;
+        """
+        try:
+            async with self.db_con.cursor(aiomysql.DictCursor) as cur:
+                await cur.execute(query, (product_id,))
+                return list(await cur.fetchall())
+        except Exception as e:
+            logger.error(f"Error fetching indexing statuses for Product ID {product_id}: {e}")
+            raise e
+
+    async def get_unindexed_source_ids(self, product_id: Optional[int] = None) -> List[int]:
+        """
+        Returns the ids of sources that have no ingestion ledger entry (never embedded), for one
+        product or for all products.
+        """
+        query = """
+        SELECT s.id FROM DocumentationSources s
+        LEFT JOIN DocumentationSourceIngestions i ON i.source_id = s.id
+        WHERE i.source_id IS NULL
+        """
+        params = ()
+        if product_id is not None:
+            query += " AND s.product_id = %s"
+            params = (product_id,)
+
+        try:
+            async with self.db_con.cursor() as cur:
+                await cur.execute(query, params)
+                return [row[0] for row in await cur.fetchall()]
+        except Exception as e:
+            logger.error(f"Error fetching unindexed sources for Product ID {product_id}: {e}")
+            raise e
@@ -27,6 +27,16 @@ class EvaluationRepository:
             await cur.execute(query, (evaluation.status.value, evaluation.id))
             return cur.rowcount > 0
 
+    async def save_result(self, evaluation_id: int, status: EvaluationStatus, result: Optional[str], error: Optional[str] = None) -> bool:
+        query = """
+        UPDATE Evaluations 
+        SET status = %s, result = %s, error = %s, updated_at = NOW()
+        WHERE id = %s;
+        """
+        async with self.db_con.cursor() as cur:
+            await cur.execute(query, (status.value, result, error, evaluation_id))
+            return cur.rowcount > 0
+
     async def create(self, evaluation: Evaluation) -> int:
         print("Printing the status: " + str(evaluation.status))
         # Ensure the status is valid
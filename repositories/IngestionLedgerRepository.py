@@ -0,0 +1,79 @@
+from typing import Dict, List, Optional, Any
+import aiomysql
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class IngestionLedgerRepository:
+    """
+    Ledger of what has been embedded for each documentation source: the blob fingerprint and content
+    hash it was ingested from, the embedding model used, and the ids of its chunks in the vector store.
+    """
+
+    def __init__(self, db_con):
+        self.db_con = db_con
+
+    @staticmethod
+    def _from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+        row["chunk_ids"] = json.loads(row["chunk_ids"]) if row.get("chunk_ids") else []
+        return row
+
+    async def get_by_product_id(self, product_id: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Returns the ledger entries keyed by source id, for one product or for all products.
+        """
+        query = "SELECT * FROM DocumentationSourceIngestions"
+        params = ()
+        if product_id is not None:
+            query += " WHERE product_id = %s"
+            params = (product_id,)
+
+        try:
+            async with self.db_con.cursor(aiomysql.DictCursor) as cur:
+                await cur.execute(query, params)
+                rows = await cur.fetchall()
+                return {row["source_id"]: self._from_row(row) for row in rows}
+        except Exception as e:
+            logger.error(f"Error fetching ingestion ledger for Product ID {product_id}: {e}")
+            raise e
+
+    async def upsert(
+        self,
+        source_id: int,
+        product_id: int,
+        content_hash: str,
+        fingerprint: Optional[str],
+        embedding_model: str,
+        chunk_ids: List[str],
+    ) -> bool:
+        query = """
+        REPLACE INTO DocumentationSourceIngestions
+            (source_id, product_id, content_hash, fingerprint, embedding_model, chunk_ids, chunk_count, ingested_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, NOW());
+        """
+        try:
+            async with self.db_con.cursor() as cur:
+                await cur.execute(query, (
+                    source_id,
+                    product_id,
+                    content_hash,
+                    fingerprint,
+                    embedding_model,
+                    json.dumps(chunk_ids),
+                    len(chunk_ids),
+                ))
+                return cur.rowcount > 0
+        except Exception as e:
+            logger.error(f"Error saving ingestion ledger entry for source ID {source_id}: {e}")
+            raise e
+
+    async def delete(self, source_id: int) -> bool:
+        query = "DELETE FROM DocumentationSourceIngestions WHERE source_id = %s;"
+        try:
+            async with self.db_con.cursor() as cur:
+                await cur.execute(query, (source_id,))
+                return cur.rowcount > 0
+        except Exception as e:
+            logger.error(f"Error deleting ingestion ledger entry for source ID {source_id}: {e}")
+            raise e
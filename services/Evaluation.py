@@ -1,34 +1,48 @@
 from models.Evaluation import Evaluation, EvaluationStatus
 from repositories.EvaluationRepository import EvaluationRepository
 from services.RAGService import RAGService
-from agents.user_agent import UserAgent
 from agents.ai_features_ideation_agent import AIFeatureIdeationAgent
 from agents.developer_agent import DeveloperAgent
 from agents.product_manager_agent import ProductManagerAgent
-from workflow.evaluation_workflow import run_evaluation_workflow
-from typing import Optional
+from workflow.evaluation_workflow import run_evaluation_workflow, resume_evaluation_workflow
+from typing import Dict, List, Optional
 
+import asyncio
+import json
 import logging
 from logging_config import setup_logging
+from tracing import start_span
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
 class EvaluationService:
+    # Workflow state keys persisted as the evaluation result
+    RESULT_KEYS = (
+        "evaluation_scope",
+        "interaction_result",
+        "interaction_results",
+        "ideated_features",
+        "prioritized_features",
+        "feasibility_reports",
+        "final_report",
+        "token_usage",
+    )
+
     def __init__(
         self,
         evaluation_repository: EvaluationRepository,
         rag_service: RAGService,
         product_manager_agent: ProductManagerAgent,
-        user_agent: UserAgent,
         ai_feature_ideation_agent: AIFeatureIdeationAgent,
-        developer_agent: DeveloperAgent
+        developer_agent: DeveloperAgent,
+        personas: Optional[List[Dict]] = None
     ):
         self.evaluation_repository = evaluation_repository
         self.rag_service = rag_service
         self.product_manager_agent = product_manager_agent
-        self.user_agent = user_agent
+        self.personas = personas or []
         self.ai_feature_ideation_agent = ai_feature_ideation_agent
         self.developer_agent = developer_agent
 
@@ -76,8 +90,8 @@ class EvaluationService:
             logger.error("Evaluation not found for ID: %s", evaluation_id)
             raise ValueError("Evaluation not found")
 
-        # Initialize agentsproduct_manager_agent
-        user_agent = self.user_agent
+        # Personas taking part in the evaluation
+        personas = self.personas
 
         # Additional agents
         ai_feature_ideation_agent = self.ai_feature_ideation_agent
@@ -88,14 +102,65 @@ class EvaluationService:
         # Trigger the LangGraph workflow
         workflow_result = await run_evaluation_workflow(
             evaluation, evaluation_type, self.rag_service,
-            product_manager_agent, user_agent,
+            product_manager_agent, personas,
             ai_feature_ideation_agent, developer_agent
         )
 
-        # Update evaluation status based on workflow result
+        await self._save_workflow_result(evaluation_id, workflow_result)
+        return workflow_result
+
+    async def resume_workflow(self, evaluation_id: int) -> Optional[dict]:
+        """
+        Resumes the evaluation's workflow from its last checkpoint and stores the result.
+        """
+        logger.info("Resuming evaluation workflow for ID: %s", evaluation_id)
+        workflow_result = await resume_evaluation_workflow(
+            evaluation_id, self.rag_service, self.product_manager_agent,
+            self.ai_feature_ideation_agent, self.developer_agent
+        )
+        await self._save_workflow_result(evaluation_id, workflow_result)
+        return workflow_result
+
+    async def _save_workflow_result(self, evaluation_id: int, workflow_result: Optional[dict]):
+        # Update evaluation status and store the result
         if workflow_result:
-            evaluation.status = EvaluationStatus.COMPLETED
-            await self.evaluation_repository.update(evaluation)
+            await self.evaluation_repository.save_result(
+                evaluation_id, EvaluationStatus.COMPLETED, self.serialize_result(workflow_result)
+            )
             logger.debug("Workflow completed for evaluation ID: %s", evaluation_id)
+        else:
+            # Otherwise the evaluation would stay IN_PROGRESS forever
+            logger.error("Workflow returned no result for evaluation ID: %s", evaluation_id)
+            await self.evaluation_repository.save_result(
+                evaluation_id, EvaluationStatus.FAILED, None, "Workflow returned no result"
+            )
 
-        return workflow_result
+    @classmethod
+    def serialize_result(cls, workflow_result: dict) -> str:
+        return json.dumps({key: workflow_result.get(key) for key in cls.RESULT_KEYS}, default=str)
+
+    async def run_evaluation_job(self, evaluation_id: int, evaluation_type: Optional[str] = None, resume: bool = False):
+        """
+        Runs the workflow for an already created evaluation as a background job, moving it to
+        IN_PROGRESS and then COMPLETED, or FAILED with the error message. With resume=True the
+        workflow continues from its last checkpoint instead of starting over.
+        """
+        try:
+            with start_span("evaluation.job", **{"evaluation.id": evaluation_id, "evaluation.resume": resume}):
+                await self._run_evaluation_job(evaluation_id, evaluation_type, resume)
+        except asyncio.CancelledError:
+            logger.warning("Evaluation job cancelled for ID %s", evaluation_id)
+            await self.evaluation_repository.save_result(evaluation_id, EvaluationStatus.FAILED, None, "cancelled at shutdown")
+            raise
+        except Exception as e:
+            logger.error("Evaluation job failed for ID %s: %s", evaluation_id, str(e))
+            await self.evaluation_repository.save_result(evaluation_id, EvaluationStatus.FAILED, None, str(e))
+        finally:
+            await self.rag_service.close()
+
+    async def _run_evaluation_job(self, evaluation_id: int, evaluation_type: Optional[str], resume: bool):
+        await self.set_evaluation_in_progress(evaluation_id)
+        if resume:
+            await self.resume_workflow(evaluation_id)
+        else:
+            await self.trigger_workflow(evaluation_id=evaluation_id, evaluation_type=evaluation_type)
@@ -1,46 +1,98 @@
 import os
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, AsyncIterable, AsyncIterator, Optional, Tuple
 
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.text_splitter import CharacterTextSplitter
+import chromadb
+from langchain_core.embeddings import Embeddings
 from langchain.vectorstores import Chroma
 from langchain.schema import Document
 import numpy as np
 
 from repositories.DocumentationSourceRepository import DocumentationSourceRepository
+from repositories.IngestionLedgerRepository import IngestionLedgerRepository
 from services.blob_storage_service import BlobStorageService
+from services.embedding_cache import embedding_cache
+from services.embedding_registry import embedding_registry
+from services.retrieval_cache import retrieval_cache
+from services.text_chunker import StreamingTokenChunker
+from services.vector_store import CHROMA_COLLECTION_NAME, ChromaVectorStore, VectorStore, get_faiss_vector_store
+from tracing import start_span
+from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Query used when a caller wants a product's documents without a more specific question
+DEFAULT_PRODUCT_QUERY = "Product overview: what the product is, its main features, target users and how it is used."
+
 class RAGService:
     def __init__(
         self,
         db_con,
-        embedding_model: str = "huggingface",
+        embedding_model: Optional[str] = None,
         embedding_kwargs: Optional[Dict[str, Any]] = None,
         chroma_persist_directory: str = "chroma_db",
+        embeddings: Optional[Embeddings] = None,
+        blob_storage_service: Optional[BlobStorageService] = None,
+        documentation_source_repo: Optional[DocumentationSourceRepository] = None,
+        ingestion_ledger_repo: Optional[IngestionLedgerRepository] = None,
     ):
         """
-        Initializes the RAGService with Blob Storage, Documentation Repository, Embedding Model, and Chroma vector store.
+        Initializes the RAGService with Blob Storage, Documentation Repository, Embedding Model, and the vector
+        store selected by settings.vector_store_backend.
         :param db_con: Database connection for DocumentationSourceRepository.
-        :param embedding_model: Model name for embeddings (e.g., "huggingface", "groq").
+        :param embedding_model: Model name for embeddings (e.g., "huggingface", "groq"); defaults to settings.embedding_model.
         :param embedding_kwargs: Additional keyword arguments for the embedding model.
         :param chroma_persist_directory: Directory to persist Chroma vector store data.
+        :param embeddings: Embedding instance to use; defaults to the process-wide shared model.
+        :param blob_storage_service: Blob storage to read sources from; defaults to Azure Blob Storage from the environment.
+        :param documentation_source_repo: Defaults to a DocumentationSourceRepository on db_con.
+        :param ingestion_ledger_repo: Defaults to an IngestionLedgerRepository on db_con.
         """
-        self.blob_storage_service = BlobStorageService(
+        self.blob_storage_service = blob_storage_service or BlobStorageService(
             connection_string=os.getenv('AZURE_STORAGE_CONNECTION_STRING'),
             container_name=os.getenv('AZURE_STORAGE_CONTAINER_NAME')
         )
-        self.documentation_source_repo = DocumentationSourceRepository(db_con)
+        self.documentation_source_repo = documentation_source_repo or DocumentationSourceRepository(db_con)
+        self.ingestion_ledger_repo = ingestion_ledger_repo or IngestionLedgerRepository(db_con)
         self.embedding_model_name = embedding_model
-        self.embedding_kwargs = embedding_kwargs or {}
+        self.embedding_kwargs = embedding_kwargs
+        self.embeddings = embeddings
         self.chroma_persist_directory = chroma_persist_directory
-        self.vector_store = self.initialize_chroma()
+        self.chunker = StreamingTokenChunker(
+            settings.chunk_size_tokens, settings.chunk_overlap_tokens, settings.chunk_tokenizer_encoding
+        )
+        self.vector_store = self.initialize_vector_store()
+        self.model_id = embedding_registry.model_id(embedding_model, embedding_kwargs)
+        # Results cached by one RAGService are valid for another with the same store and model
+        self.cache_namespace = ":".join((
+            settings.vector_store_backend,
+            settings.faiss_index_directory if settings.vector_store_backend.lower() == "faiss" else chroma_persist_directory,
+            self.model_id,
+        ))
 
-    def initialize_chroma(self) -> Chroma:
+    def initialize_vector_store(self) -> VectorStore:
+        """
+        Returns the configured vector store: Chroma, or the process-wide per-product FAISS indexes.
+        :return: VectorStore instance.
+        """
+        backend = settings.vector_store_backend.lower()
+        if backend == "chroma":
+            client = chromadb.PersistentClient(path=self.chroma_persist_directory)
+            collection = client.get_or_create_collection(CHROMA_COLLECTION_NAME, embedding_function=None)
+            return ChromaVectorStore(self.initialize_chroma(client), collection)
+        elif backend == "faiss":
+            logger.info(f"Using FAISS vector store in {settings.faiss_index_directory} ({settings.faiss_index_type} indexes).")
+            return get_faiss_vector_store()
+        else:
+            raise ValueError(f"Unsupported vector store backend: {settings.vector_store_backend}")
+
+    def initialize_chroma(self, client: Optional[chromadb.ClientAPI] = None) -> Chroma:
         """
         Initializes or loads the Chroma vector store.
+        :param client: chromadb client to use; LangChain creates one for the persist directory when omitted.
         :return: Chroma vector store instance.
         """
         logger.info(f"Initializing Chroma vector store with persist directory: {self.chroma_persist_directory}")
@@ -50,13 +102,17 @@ class RAGService:
                 logger.info(f"Loading existing Chroma vector store from {self.chroma_persist_directory}.")
                 vector_store = Chroma(
                     persist_directory=self.chroma_persist_directory,
-                    embedding_function=embeddings
+                    embedding_function=embeddings,
+                    client=client,
+                    collection_name=CHROMA_COLLECTION_NAME,
                 )
             else:
                 logger.info("Creating a new Chroma vector store.")
                 vector_store = Chroma(
                     persist_directory=self.chroma_persist_directory,
-                    embedding_function=embeddings
+                    embedding_function=embeddings,
+                    client=client,
+                    collection_name=CHROMA_COLLECTION_NAME,
                 )
                 logger.info("Chroma vector store initialized successfully.")
             return vector_store
@@ -64,25 +120,33 @@ class RAGService:
             logger.error(f"Error initializing Chroma vector store: {e}")
             raise e
 
-    def get_embedding_instance(self) -> HuggingFaceEmbeddings:
+    def get_embedding_instance(self) -> Embeddings:
         """
-        Returns an instance of the embedding model based on the specified model name.
+        Returns the embedding model: the instance passed in, or the process-wide shared model for
+        the specified model name and kwargs (loaded once per process, not per request).
         :return: Embedding instance.
         """
-        if self.embedding_model_name.lower() == "huggingface":
-            return HuggingFaceEmbeddings(**self.embedding_kwargs)
-        elif self.embedding_model_name.lower() == "groq":
-            # Placeholder for GroqEmbeddings, replace with actual implementation if available
-            from langchain.embeddings import GroqEmbeddings
-            return GroqEmbeddings(**self.embedding_kwargs)
-        else:
-            raise ValueError(f"Unsupported embedding model: {self.embedding_model_name}")
+        if self.embeddings is None:
+            self.embeddings = embedding_registry.get(self.embedding_model_name, self.embedding_kwargs)
+        return self.embeddings
 
-    async def load_knowledge_base(self, product_id: Optional[int] = None):
+    async def load_knowledge_base(self, product_id: Optional[int] = None, force: bool = False) -> Dict[str, Any]:
         """
-        Loads documents from Azure Blob Storage, associates them with product IDs, splits them into chunks,
-        generates embeddings, and stores them in Chroma. If a product_id is specified, only loads sources for that product.
+        Incrementally ingests documentation sources from Azure Blob Storage into the vector store. If a product_id is
+        specified, only sources for that product are considered.
+
+        Every source has an entry in the ingestion ledger recording the blob fingerprint and content hash it
+        was ingested from, the embedding model, and its chunk ids. A source whose blob fingerprint matches
+        the ledger costs one metadata lookup and is neither downloaded nor embedded; a changed source only
+        embeds chunks that are new, and its chunks that disappeared are deleted. Chunk ids are derived
+        from (source id, chunk hash), so writes are upserts and never duplicate vectors.
+
+        Sources are downloaded and chunked concurrently (see _ingest_sources) while their chunks are
+        embedded. A source that fails is logged, counted as failed and retried on the next load.
         :param product_id: (Optional) The product ID to filter documentation sources.
+        :param force: Re-ingest every source regardless of the ledger.
+        :return: Counts of unchanged, ingested, failed and removed sources and of embedded and deleted chunks,
+                 and embedding throughput (embed_seconds, chunks_per_second).
         """
         try:
             sources = await self.documentation_source_repo.get_sources_by_product_id(product_id)
@@ -91,34 +155,282 @@ class RAGService:
             else:
                 logger.info(f"Loading all documentation sources ({len(sources)} sources).")
 
-            all_documents = []
+            ledger = await self.ingestion_ledger_repo.get_by_product_id(product_id)
+            stats = self._new_ingestion_stats()
+
+            items = []
             for source in sources:
-                blob_url = source.get('storage_url')
-                current_product_id = source.get('product_id')
-                if not current_product_id:
-                    logger.warning(f"Skipping blob '{blob_url}' as it lacks 'product_id'.")
+                if not source.get('product_id'):
+                    logger.warning(f"Skipping blob '{source.get('storage_url')}' as it lacks 'product_id'.")
                     continue
+                items.append((source, ledger.pop(source['id'], None)))
+            await self._ingest_sources(items, force, stats, skip_failures=True)
 
-                logger.debug(f"Downloading blob: {blob_url}")
-                blob_content = await self.blob_storage_service.download_blob_by_url(blob_url)
-                # Assuming blob_content is bytes, decode to string
-                text_content = blob_content.decode('utf-8')
-                documents = self.split_text(text_content, current_product_id)
-                all_documents.extend(documents)
-                logger.info(f"Prepared {len(documents)} documents from blob '{blob_url}' (Product ID: {current_product_id}).")
-
-            if all_documents:
-                logger.info(f"Adding {len(all_documents)} documents to Chroma vector store.")
-                self.vector_store.add_documents(all_documents)
-                self.vector_store.persist()
-                logger.info(f"Chroma vector store persisted to {self.chroma_persist_directory}.")
-            else:
-                logger.info("No documents to add to Chroma vector store.")
+            # Sources deleted since they were ingested
+            for source_id, entry in ledger.items():
+                if entry["chunk_ids"]:
+                    await asyncio.to_thread(self.vector_store.delete, entry["product_id"], entry["chunk_ids"])
+                    retrieval_cache.bump_version(entry["product_id"])
+                    stats["chunks_deleted"] += len(entry["chunk_ids"])
+                await self.ingestion_ledger_repo.delete(source_id)
+                stats["removed"] += 1
+                logger.info(f"Removed chunks of deleted documentation source ID: {source_id}")
+
+            stats["chunks_per_second"] = self._throughput(stats)
+            if stats["chunks_embedded"] or stats["chunks_deleted"]:
+                await asyncio.to_thread(self.vector_store.persist)
+                logger.info("Vector store persisted.")
+            logger.info(f"Knowledge base loaded for Product ID {product_id}: {stats}")
+            return stats
 
         except Exception as e:
             logger.error(f"Error loading knowledge base: {e}")
             raise e
 
+    async def index_source(self, documentation_source_id: int) -> Dict[str, Any]:
+        """
+        Ingests a single documentation source (chunk, embed, persist), e.g. right after it was onboarded.
+        Goes through the ingestion ledger like load_knowledge_base, so an unchanged source costs one
+        metadata lookup.
+        :param documentation_source_id: ID of the DocumentationSources row.
+        :return: Ingestion counts, as returned by load_knowledge_base.
+        """
+        source = await self.documentation_source_repo.get_by_id(documentation_source_id)
+        if source is None:
+            raise ValueError(f"DocumentationSource {documentation_source_id} not found")
+
+        ledger = await self.ingestion_ledger_repo.get_by_product_id(source.product_id)
+        stats = self._new_ingestion_stats()
+        await self._ingest_sources([(source.model_dump(), ledger.get(source.id))], False, stats)
+        stats["chunks_per_second"] = self._throughput(stats)
+        if stats["chunks_embedded"] or stats["chunks_deleted"]:
+            await asyncio.to_thread(self.vector_store.persist)
+        logger.info(f"Indexed documentation source ID {documentation_source_id}: {stats}")
+        return stats
+
+    @staticmethod
+    def _new_ingestion_stats() -> Dict[str, Any]:
+        return {
+            "unchanged": 0, "ingested": 0, "failed": 0, "removed": 0, "chunks_embedded": 0, "chunks_deleted": 0,
+            "embed_seconds": 0.0, "chunks_per_second": 0.0,
+        }
+
+    @staticmethod
+    def _throughput(stats: Dict[str, Any]) -> float:
+        return round(stats["chunks_embedded"] / stats["embed_seconds"], 2) if stats["embed_seconds"] else 0.0
+
+    async def _ingest_sources(
+        self,
+        items: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]],
+        force: bool,
+        stats: Dict[str, Any],
+        skip_failures: bool = False,
+    ):
+        """
+        Ingests sources through a producer/consumer pipeline: up to settings.ingestion_download_concurrency
+        sources are downloaded and chunked at once (producers), and their batches of new chunks go through
+        a bounded queue to one consumer that embeds and writes them. Downloads of the next sources overlap
+        the embedding of earlier ones, while the queue bounds how many chunks wait in memory.
+        :param items: (source, ledger entry) pairs.
+        :param skip_failures: Log and count a failing source instead of raising.
+        """
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.ingestion_queue_batches)
+        consumer = asyncio.create_task(self._embedding_consumer(write_queue, stats))
+        semaphore = asyncio.Semaphore(settings.ingestion_download_concurrency)
+
+        async def produce(source: Dict[str, Any], entry: Optional[Dict[str, Any]]):
+            async with semaphore:
+                try:
+                    await self._ingest_source(source, entry, force, stats, write_queue)
+                except Exception as e:
+                    if not skip_failures:
+                        raise
+                    stats["failed"] += 1
+                    logger.error(f"Skipping documentation source ID {source['id']} ({source.get('storage_url')}): {e}")
+
+        try:
+            await asyncio.gather(*(produce(source, entry) for source, entry in items))
+            await write_queue.put(None)
+            await consumer
+        finally:
+            if not consumer.done():
+                consumer.cancel()
+
+    async def _embedding_consumer(self, write_queue: asyncio.Queue, stats: Dict[str, Any]):
+        while True:
+            item = await write_queue.get()
+            if item is None:
+                return
+            documents, ids, source_id, product_id, done = item
+            try:
+                stats["embed_seconds"] += await self._embed_and_write(documents, ids, source_id, product_id)
+                retrieval_cache.bump_version(product_id)
+                if not done.done():
+                    done.set_result(None)
+            except Exception as e:
+                if not done.done():
+                    done.set_exception(e)
+
+    async def _embed_and_write(self, documents: List[Document], ids: List[str], source_id: int, product_id: int) -> float:
+        """
+        Embeds documents and upserts them into the vector store in rounds of settings.ingestion_write_batch_size
+        chunks, so only one round of vectors is held in memory however large the source is. Embedding runs in a
+        worker thread with the configured encoder batch size (and multi-process pool, if enabled).
+        :return: Seconds spent embedding and writing.
+        """
+        embeddings = self.get_embedding_instance()
+        write_batch_size = settings.ingestion_write_batch_size
+        started = time.perf_counter()
+        for offset in range(0, len(documents), write_batch_size):
+            batch = documents[offset:offset + write_batch_size]
+            batch_ids = ids[offset:offset + write_batch_size]
+            texts = [doc.page_content for doc in batch]
+            with start_span("rag.embed", **{
+                "rag.source_id": source_id,
+                "rag.chunks": len(batch),
+                "rag.chars": sum(len(text) for text in texts),
+            }) as span:
+                batch_started = time.perf_counter()
+                vectors, cached = await asyncio.to_thread(self._encode, embeddings, texts)
+                span.set_attribute("rag.cached_chunks", cached)
+                await asyncio.to_thread(self.vector_store.upsert, product_id, batch_ids, vectors, batch)
+                batch_seconds = time.perf_counter() - batch_started
+                span.set_attribute("rag.chunks_per_second", len(batch) / batch_seconds if batch_seconds else 0.0)
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Embedded {len(documents)} chunks of source ID {source_id} in {elapsed:.2f}s "
+            f"({len(documents) / elapsed if elapsed else 0.0:.1f} chunks/s)."
+        )
+        return elapsed
+
+    def _encode(self, embeddings: Embeddings, texts: List[str]) -> Tuple[List[List[float]], int]:
+        """
+        Embeds texts, taking the vectors of texts seen before from the persistent embedding cache and
+        running the model only on the others. Blocking; call it from a worker thread.
+        :return: One vector per text, and how many came from the cache.
+        """
+        if not settings.embedding_cache_enabled:
+            return embedding_registry.encode(embeddings, texts), 0
+        vectors = embedding_cache.lookup(self.model_id, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            encoded = embedding_registry.encode(embeddings, missing_texts)
+            embedding_cache.store(self.model_id, missing_texts, encoded)
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+        return vectors, len(texts) - len(missing)
+
+    @staticmethod
+    def chunk_id(source_id: int, chunk: str) -> str:
+        """
+        Stable vector store id of a chunk, derived from its source and its content.
+        """
+        chunk_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{source_id}:{chunk_hash}".encode("utf-8")).hexdigest()
+
+    async def _ingest_source(
+        self,
+        source: Dict[str, Any],
+        entry: Optional[Dict[str, Any]],
+        force: bool,
+        stats: Dict[str, Any],
+        write_queue: asyncio.Queue,
+    ):
+        source_id = source['id']
+        blob_url = source.get('storage_url')
+        current_product_id = source.get('product_id')
+        model_id = self.model_id
+        same_model = entry is not None and entry["embedding_model"] == model_id
+
+        # One metadata lookup decides whether an already ingested source changed
+        fingerprint = await self.blob_storage_service.get_blob_fingerprint_by_url(blob_url)
+        if same_model and not force and fingerprint is not None and entry["fingerprint"] == fingerprint:
+            logger.debug(f"Documentation source {source_id} unchanged, skipping.")
+            stats["unchanged"] += 1
+            return
+
+        previous_ids = set(entry["chunk_ids"]) if entry else set()
+        # Vectors from another model are re-embedded; the upsert overwrites them under the same ids
+        embedded_ids = previous_ids if same_model and not force else set()
+        content_hasher = hashlib.sha256()
+
+        async def blob_stream():
+            logger.debug(f"Streaming blob: {blob_url}")
+            async for piece in self.blob_storage_service.stream_blob_by_url(blob_url, settings.blob_stream_chunk_bytes):
+                content_hasher.update(piece)
+                yield piece
+
+        # The blob is chunked as it downloads; new chunks are handed to the embedding consumer in
+        # bounded batches, so neither the blob nor its chunks are ever held in memory at once
+        chunk_ids, seen_ids, pending = [], set(), []
+        written_ids: List[str] = []
+        writes: List[asyncio.Future] = []
+
+        async def submit():
+            ids = [document.metadata["chunk_id"] for document in pending]
+            done = asyncio.get_running_loop().create_future()
+            await write_queue.put((list(pending), ids, source_id, current_product_id, done))
+            written_ids.extend(ids)
+            writes.append(done)
+            pending.clear()
+
+        try:
+            async for document in self.iter_blob_documents(blob_stream(), current_product_id):
+                chunk_id = self.chunk_id(source_id, document.page_content)
+                if chunk_id in seen_ids:
+                    continue
+                seen_ids.add(chunk_id)
+                chunk_ids.append(chunk_id)
+                if chunk_id in embedded_ids:
+                    continue
+                document.metadata.update({"source_id": source_id, "chunk_id": chunk_id})
+                pending.append(document)
+                if len(pending) >= settings.ingestion_write_batch_size:
+                    await submit()
+            if pending:
+                await submit()
+            await asyncio.gather(*writes)
+        except Exception:
+            # Vectors of a partly ingested source are not in the ledger; once its queued batches are
+            # done, remove them again
+            await asyncio.gather(*writes, return_exceptions=True)
+            orphan_ids = [chunk_id for chunk_id in written_ids if chunk_id not in previous_ids]
+            if orphan_ids:
+                await asyncio.to_thread(self.vector_store.delete, current_product_id, orphan_ids)
+                retrieval_cache.bump_version(current_product_id)
+            raise
+
+        stale_ids = list(previous_ids - seen_ids)
+        if stale_ids:
+            await asyncio.to_thread(self.vector_store.delete, current_product_id, stale_ids)
+            retrieval_cache.bump_version(current_product_id)
+
+        content_hash = content_hasher.hexdigest()
+        await self.ingestion_ledger_repo.upsert(
+            source_id, current_product_id, content_hash, fingerprint, model_id, chunk_ids
+        )
+        if not written_ids and not stale_ids and same_model and entry["content_hash"] == content_hash:
+            # Re-uploaded with identical content: only the fingerprint changed
+            stats["unchanged"] += 1
+            return
+        stats["ingested"] += 1
+        stats["chunks_embedded"] += len(written_ids)
+        stats["chunks_deleted"] += len(stale_ids)
+        logger.info(
+            f"Ingested blob '{blob_url}' (Product ID: {current_product_id}): {len(written_ids)} chunks embedded, "
+            f"{len(chunk_ids) - len(written_ids)} reused, {len(stale_ids)} deleted."
+        )
+
+    def iter_blob_documents(self, byte_chunks: AsyncIterable[bytes], product_id: int) -> AsyncIterator[Document]:
+        """
+        Chunks a blob's content as it streams in, yielding Documents associated with the given product_id.
+        :param byte_chunks: The blob's content as UTF-8 byte pieces.
+        :param product_id: The product ID associated with the text.
+        :return: Async iterator of Document objects.
+        """
+        return self.chunker.aiter_documents(byte_chunks, {"type": "product_info", "product_id": product_id})
+
     def split_text(self, text: str, product_id: int) -> List[Document]:
         """
         Splits text into chunks suitable for embedding and associates each chunk with the given product_id.
@@ -126,13 +438,6 @@ class RAGService:
         :param product_id: The product ID associated with the text.
         :return: List of Document objects.
         """
-        text_splitter = CharacterTextSplitter(
-            separator="\n",
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len
-        )
-        split_text = text_splitter.split_text(text)
         return [
             Document(
                 page_content=chunk,
@@ -141,23 +446,87 @@ class RAGService:
                     "product_id": product_id
                 }
             )
-            for chunk in split_text
+            for chunk in self.chunker.iter_chunks([text])
         ]
 
-    async def get_documents_by_product_id(self, product_id: int) -> List[Document]:
+    async def search(
+        self,
+        product_id: int,
+        query: str,
+        k: int = 10,
+        mmr: bool = False,
+        fetch_k: Optional[int] = None,
+        lambda_mult: float = 0.5,
+    ) -> List[Document]:
+        """
+        Similarity search for a query restricted to one product's chunks (a product_id metadata filter in
+        Chroma, the product's own index in FAISS), so other products' chunks never come back.
+        :param product_id: The product ID whose documents are searched.
+        :param query: The query text.
+        :param k: Number of documents to return.
+        :param mmr: Use maximal marginal relevance, trading some relevance for diversity.
+        :param fetch_k: Candidates considered by MMR (defaults to 4 * k).
+        :param lambda_mult: MMR relevance/diversity balance (1 = relevance only).
+        :return: List of relevant Document objects, best first.
+        """
+        with start_span("rag.search", **{"rag.product_id": product_id, "rag.k": k, "rag.mmr": mmr}) as span:
+            cache_key = None
+            if settings.retrieval_cache_enabled:
+                # The version in the key is read before searching, so results of a search that races
+                # a write are stored under the old version and never served
+                cache_key = retrieval_cache.key(
+                    self.cache_namespace, product_id, query, store_version=self.vector_store.version(product_id),
+                    k=k, mmr=mmr, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=("product_id", product_id),
+                )
+                documents = retrieval_cache.get(cache_key)
+                span.set_attribute("rag.cache_hit", documents is not None)
+                if documents is not None:
+                    span.set_attribute("rag.results", len(documents))
+                    return documents
+
+            embedding = await asyncio.to_thread(self.get_embedding_instance().embed_query, query)
+            documents = await asyncio.to_thread(
+                self.vector_store.search,
+                product_id, embedding, k=k, mmr=mmr, fetch_k=fetch_k, lambda_mult=lambda_mult,
+            )
+            span.set_attribute("rag.results", len(documents))
+            if cache_key is not None:
+                retrieval_cache.set(cache_key, documents)
+        logger.debug(f"Retrieved {len(documents)} documents for Product ID {product_id} and query: {query}")
+        return documents
+
+    async def search_many(self, product_id: int, queries: List[str], **search_kwargs) -> List[Document]:
+        """
+        Runs several queries for a product concurrently and merges the results: documents are interleaved
+        by rank across queries and de-duplicated, so every query's best matches come first.
+        :param product_id: The product ID whose documents are searched.
+        :param queries: Query texts.
+        :param search_kwargs: k, mmr, fetch_k and lambda_mult, as for search().
+        :return: Merged list of Document objects.
+        """
+        results = await asyncio.gather(*(self.search(product_id, query, **search_kwargs) for query in queries))
+        merged, seen = [], set()
+        for rank in range(max((len(documents) for documents in results), default=0)):
+            for documents in results:
+                if rank < len(documents):
+                    document = documents[rank]
+                    key = document.metadata.get("chunk_id") or document.page_content
+                    if key not in seen:
+                        seen.add(key)
+                        merged.append(document)
+        return merged
+
+    async def get_documents_by_product_id(self, product_id: int, query: Optional[str] = None, k: int = 10) -> List[Document]:
         """
-        Retrieves all documents associated with the given product ID.
+        Retrieves the documents of the given product that best match a query.
         :param product_id: The product ID to query.
+        :param query: The query text; defaults to a general product overview query.
+        :param k: Number of documents to return.
         :return: List of relevant Document objects.
         """
         try:
             logger.debug(f"Retrieving documents for Product ID: {product_id}")
-            # Access all documents from the Chroma vector store
-            # Chroma manages its own methods for retrieval
-            retriever = self.vector_store.as_retriever()
-            retriever.search_kwargs.update({"k": 10})  # Adjust 'k' as needed
-            query = f"product_id:{product_id}"
-            filtered_documents = await asyncio.to_thread(retriever.get_relevant_documents, query)
+            filtered_documents = await self.search(product_id, query or DEFAULT_PRODUCT_QUERY, k=k)
             logger.info(f"Retrieved {len(filtered_documents)} documents for Product ID: {product_id}")
             return filtered_documents
         except Exception as e:
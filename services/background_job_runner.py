@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFullError(Exception):
+    """Raised when the runner already holds its maximum number of pending jobs."""
+
+
+class BackgroundJobRunner:
+    """
+    Runs jobs (evaluation workflows, documentation indexing) in the background of the current
+    worker process, keyed by the ID of the record they work on.
+
+    At most `max_concurrency` jobs execute at once; further jobs wait for a slot, and once
+    `max_pending` jobs are running or waiting new submissions are rejected.
+    """
+
+    def __init__(self, kind: str, max_concurrency: int, max_pending: int):
+        """
+        :param kind: Kind of job, used in log messages and task names.
+        """
+        self.kind = kind
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._running = 0
+
+    def submit(self, job_id: int, job: Callable[[], Awaitable]):
+        """
+        Schedules a job for the given record.
+
+        :param job_id: ID of the record the job belongs to (e.g. the evaluation ID).
+        :param job: Coroutine function doing the work and recording its outcome.
+        :raises JobQueueFullError: If the runner is at capacity.
+        """
+        if not self.has_capacity():
+            raise JobQueueFullError(f"{self.kind.capitalize()} job queue is full ({self.max_pending} pending jobs).")
+
+        task = asyncio.create_task(self._run(job_id, job), name=f"{self.kind}-{job_id}")
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        logger.info("Queued %s job for ID: %s", self.kind, job_id)
+
+    async def _run(self, job_id: int, job: Callable[[], Awaitable]):
+        async with self._semaphore:
+            self._running += 1
+            logger.info("Starting %s job for ID: %s", self.kind, job_id)
+            try:
+                await job()
+            except asyncio.CancelledError:
+                logger.warning("%s job cancelled for ID: %s", self.kind.capitalize(), job_id)
+                raise
+            except Exception as e:
+                # Jobs record their own failures; this only guards against errors while doing so
+                logger.error("%s job failed for ID %s: %s", self.kind.capitalize(), job_id, str(e))
+            finally:
+                self._running -= 1
+
+    def has_capacity(self) -> bool:
+        return len(self._tasks) < self.max_pending
+
+    def is_active(self, job_id: int) -> bool:
+        return job_id in self._tasks
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "running": self._running,
+            "queued": len(self._tasks) - self._running,
+            "max_concurrency": self.max_concurrency,
+            "max_pending": self.max_pending,
+        }
+
+    async def shutdown(self):
+        """
+        Cancels outstanding jobs and waits for them to finish.
+        """
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info("%s job runner shut down (%s jobs cancelled).", self.kind.capitalize(), len(tasks))
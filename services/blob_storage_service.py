@@ -2,7 +2,9 @@
 from azure.storage.blob.aio import BlobServiceClient, BlobClient
 from azure.storage.blob import ContentSettings
 import logging
+from typing import AsyncIterator, Optional
 from azure.core.exceptions import AzureError
+from tracing import start_span
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +17,10 @@ class BlobStorageService:
         self.container_name = container_name
 
     async def upload_blob(self, blob_name: str, data: bytes, content_type: str) -> str:
+        with start_span("blob.upload", **{"blob.name": blob_name, "blob.bytes": len(data)}):
+            return await self._upload_blob(blob_name, data, content_type)
+
+    async def _upload_blob(self, blob_name: str, data: bytes, content_type: str) -> str:
         try:
             container_client = self.blob_service_client.get_container_client(self.container_name)
 
@@ -32,6 +38,12 @@ class BlobStorageService:
             raise e
 
     async def download_blob(self, blob_name: str) -> bytes:
+        with start_span("blob.download", **{"blob.name": blob_name}) as span:
+            data = await self._download_blob(blob_name)
+            span.set_attribute("blob.bytes", len(data))
+            return data
+
+    async def _download_blob(self, blob_name: str) -> bytes:
         try:
             # Download the blob's content
             download_stream = await self.blob_service_client.download_blob()
@@ -49,6 +61,12 @@ class BlobStorageService:
         :param blob_url: The full URL of the blob to download.
         :return: The content of the blob as bytes.
         """
+        with start_span("blob.download", **{"blob.url": blob_url}) as span:
+            data = await self._download_blob_by_url(blob_url)
+            span.set_attribute("blob.bytes", len(data))
+            return data
+
+    async def _download_blob_by_url(self, blob_url: str) -> bytes:
         try:
             logger.debug(f"Creating BlobClient from URL: {blob_url}")
             # Initialize BlobClient using the blob URL and credentials from BlobServiceClient
@@ -68,6 +86,57 @@ class BlobStorageService:
             logger.error(f"Unexpected error downloading blob from URL {blob_url}: {e}")
             raise
 
+    async def stream_blob_by_url(self, blob_url: str, chunk_size: int = 4 * 1024 * 1024) -> AsyncIterator[bytes]:
+        """
+        Downloads a blob's content using its URL as a stream of pieces of at most chunk_size bytes,
+        so the whole blob is never held in memory.
+
+        :param blob_url: The full URL of the blob to download.
+        :param chunk_size: Bytes per ranged GET.
+        :return: Async iterator over the content.
+        """
+        with start_span("blob.stream", **{"blob.url": blob_url}) as span:
+            blob_client = BlobClient.from_blob_url(
+                blob_url,
+                credential=self.blob_service_client.credential,
+                max_single_get_size=chunk_size,
+                max_chunk_get_size=chunk_size,
+            )
+            size = 0
+            try:
+                download_stream = await blob_client.download_blob()
+                async for chunk in download_stream.chunks():
+                    size += len(chunk)
+                    yield chunk
+            except AzureError as e:
+                logger.error(f"Azure Error streaming blob from URL {blob_url}: {e}")
+                raise
+            finally:
+                span.set_attribute("blob.bytes", size)
+                await blob_client.close()
+            logger.info(f"Streamed blob from URL: {blob_url} (Size: {size} bytes)")
+
+    async def get_blob_fingerprint_by_url(self, blob_url: str) -> Optional[str]:
+        """
+        Returns a fingerprint of the blob's current content from its properties alone (Content-MD5
+        when the service computed one, the ETag otherwise), without downloading it.
+
+        :param blob_url: The full URL of the blob.
+        :return: Fingerprint string, or None if the blob has neither.
+        """
+        with start_span("blob.properties", **{"blob.url": blob_url}) as span:
+            try:
+                blob_client = BlobClient.from_blob_url(blob_url, credential=self.blob_service_client.credential)
+                properties = await blob_client.get_blob_properties()
+            except AzureError as e:
+                logger.error(f"Azure Error reading properties of blob {blob_url}: {e}")
+                raise
+            span.set_attribute("blob.bytes", properties.size or 0)
+            content_md5 = properties.content_settings.content_md5 if properties.content_settings else None
+            if content_md5:
+                return f"md5:{bytes(content_md5).hex()}"
+            return f"etag:{properties.etag}" if properties.etag else None
+
     async def close(self):
         """
         Closes the BlobServiceClient.
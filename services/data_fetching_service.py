@@ -3,6 +3,8 @@ import aiohttp
 import ssl
 import logging
 import json
+from typing import AsyncIterator
+from config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +42,7 @@ class DataFetchingService:
         :param file_key: The Figma file key.
         :return: Parsed JSON data from Figma API.
         """
-        url = f'https://api.figma.com/v1/files/{file_key}'
+        url = f'{settings.figma_api_base_url}/v1/files/{file_key}'
         headers = {
             'X-Figma-Token': figma_token
         }
@@ -62,4 +64,40 @@ class DataFetchingService:
                 raise ssl_err
             except Exception as e:
                 logger.error(f"Error while fetching Figma design: {e}")
-                raise e
\ No newline at end of file
+                raise e
+
+    async def stream_figma_design(self, figma_token: str, file_key: str, chunk_size: int = None) -> AsyncIterator[bytes]:
+        """
+        Streams the body of a Figma file from the Figma API without reading it all into memory.
+        Parse it with services.figma_stream_parser.iter_figma_events.
+
+        :param figma_token: Your Figma API token.
+        :param file_key: The Figma file key.
+        :param chunk_size: Bytes per read, settings.figma_stream_chunk_bytes by default.
+        :return: Async iterator over the JSON response body.
+        """
+        url = f'{settings.figma_api_base_url}/v1/files/{file_key}'
+        headers = {
+            'X-Figma-Token': figma_token
+        }
+        chunk_size = chunk_size or settings.figma_stream_chunk_bytes
+
+        logger.debug(f"Streaming Figma design for file key: {file_key}")
+
+        async with aiohttp.ClientSession() as session:
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status != 200:
+                        logger.error(f"Failed to fetch Figma design, Status Code: {response.status}")
+                        raise Exception(f"Failed to fetch Figma design, Status Code: {response.status}")
+                    size = 0
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        size += len(chunk)
+                        yield chunk
+                    logger.info(f"Successfully streamed Figma design for file key: {file_key} ({size} bytes)")
+            except aiohttp.ClientSSLError as ssl_err:
+                logger.error(f"SSL error while fetching Figma design: {ssl_err}")
+                raise ssl_err
+            except Exception as e:
+                logger.error(f"Error while fetching Figma design: {e}")
+                raise e
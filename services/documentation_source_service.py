@@ -4,6 +4,7 @@ from services.data_fetching_service import DataFetchingService
 from services.blob_storage_service import BlobStorageService
 from models.documentation_source import DocumentationSourceSchema
 from services.figma_data_transformer import FigmaDataTransformer
+from services.figma_stream_parser import iter_figma_events
 from pydantic import ValidationError
 import logging
 import html2text
@@ -100,11 +101,12 @@ class DocumentationSourceService:
         try:
             documentation_source_id = await self.documentation_source_repo.create(documentation_source)
             logger.info(f"Saved DocumentationSource ID: {documentation_source_id}")
-            return documentation_source_id
         except Exception as e:
             logger.error(f"Failed to save DocumentationSource to DB for URL {url}: {e}")
             raise e
 
+        return documentation_source_id
+
     async def fetch_and_store_figma_design(self, product_id: int, figma_token: str, file_key: str):
         """
         Fetches and stores Figma design data.
@@ -116,21 +118,19 @@ class DocumentationSourceService:
         """
         logger.debug(f"Processing Figma file: {file_key} for product ID: {product_id}")
 
-        # Fetch Figma data
-        try:
-            data = await self.data_fetching_service.fetch_figma_design(figma_token, file_key)
-            logger.debug(f"Fetched Figma data for file key: {file_key}")
-        except Exception as e:
-            logger.error(f"Failed to fetch Figma data for file key {file_key}: {e}")
-            raise e
-
         content_type = "application/json"
 
-        # Transform and sanitize Figma data
+        # Fetch, parse and transform the Figma file as it downloads, one frame at a time
         try:
-            transformed_data = self.figma_data_transformer.extract_useful_info(data)
+            events = iter_figma_events(self.data_fetching_service.stream_figma_design(figma_token, file_key))
+            transformed_data = await self.figma_data_transformer.extract_useful_info_stream(events)
             logger.debug(f"Transformed Figma Data: {transformed_data}")
+        except Exception as e:
+            logger.error(f"Failed to fetch and transform Figma data for file key {file_key}: {e}")
+            raise e
 
+        # Serialize Figma data
+        try:
             # Validate that transformed_data is a dictionary
             if not isinstance(transformed_data, dict):
                 logger.error("Transformed data is not a dictionary. Aborting serialization.")
@@ -172,11 +172,12 @@ class DocumentationSourceService:
         try:
             documentation_source_id = await self.documentation_source_repo.create(documentation_source)
             logger.info(f"Saved DocumentationSource ID: {documentation_source_id}")
-            return documentation_source_id
         except Exception as e:
             logger.error(f"Failed to save DocumentationSource to DB for file key {file_key}: {e}")
             raise e
 
+        return documentation_source_id
+
     def _generate_blob_name(self, identifier: str) -> str:
         """
         Generates a blob name based on a URL or file key.
@@ -0,0 +1,249 @@
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_LOW_BITS = (1 << 64) - 1
+
+
+def text_key(text: str) -> int:
+    """
+    128-bit key of a chunk text (the first half of its SHA-256).
+    """
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:16], "big")
+
+
+class _ModelCache:
+    """
+    Fixed-capacity slot store of one embedding model's vectors, as memory-mapped NumPy files:
+
+    - vectors.npy: float32 vectors by slot
+    - keys.npy: 128-bit text key of each slot as two uint64 (zero = free)
+    - last_used.npy: last hit or write time of each slot, for LRU eviction
+    - header.npy: [generation, dimension]; the generation is bumped by every write
+
+    The files are mapped shared, so every gunicorn worker sees the others' writes. Each process keeps
+    a key -> slot dict, rebuilt from keys.npy when the generation changed, and checks a slot's key
+    before and after copying its vector (seqlock style), so lookups need no lock. Writes take an
+    exclusive file lock.
+    """
+
+    def __init__(self, directory: str, capacity: int, evict_fraction: float):
+        self.directory = directory
+        self.capacity = capacity
+        self.evict_fraction = evict_fraction
+        self.vectors = self.keys = self.last_used = self.header = None
+        self.slots: Dict[int, int] = {}
+        self.generation = -1
+        self.lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.npy")
+
+    @contextmanager
+    def _file_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _open(self, dimension: Optional[int] = None) -> bool:
+        # Caller holds self.lock; creating the files also requires the file lock
+        if self.header is not None:
+            return True
+        if not os.path.exists(self._path("header")):
+            if dimension is None:
+                return False
+            shapes = {
+                "vectors": ((self.capacity, dimension), np.float32),
+                "keys": ((self.capacity, 2), np.uint64),
+                "last_used": ((self.capacity,), np.float64),
+            }
+            for name, (shape, dtype) in shapes.items():
+                np.lib.format.open_memmap(self._path(name), mode="w+", dtype=dtype, shape=shape).flush()
+            header = np.lib.format.open_memmap(self._path("header"), mode="w+", dtype=np.int64, shape=(2,))
+            header[:] = (0, dimension)
+            header.flush()
+            logger.info(f"Created embedding cache in {self.directory} ({self.capacity} vectors of {dimension} dimensions).")
+
+        self.header = np.load(self._path("header"), mmap_mode="r+")
+        self.vectors = np.load(self._path("vectors"), mmap_mode="r+")
+        self.keys = np.load(self._path("keys"), mmap_mode="r+")
+        self.last_used = np.load(self._path("last_used"), mmap_mode="r+")
+        # Another process may have created the files with a different configured capacity
+        self.capacity = len(self.keys)
+        return True
+
+    def _refresh(self):
+        generation = int(self.header[0])
+        if generation != self.generation:
+            self.slots = {
+                (high << 64) | low: slot
+                for slot, (high, low) in enumerate(self.keys.tolist())
+                if high or low
+            }
+            self.generation = generation
+
+    def _key_at(self, slot: int) -> int:
+        high, low = self.keys[slot].tolist()
+        return (high << 64) | low
+
+    def lookup(self, keys: Sequence[int]) -> List[Optional[np.ndarray]]:
+        with self.lock:
+            if not self._open():
+                return [None] * len(keys)
+            self._refresh()
+            now = time.time()
+            results = []
+            for key in keys:
+                slot = self.slots.get(key)
+                vector = None
+                # Another process may have reused the slot since the dict was built, or may be
+                # rewriting it while the vector is copied without the file lock; writers clear or
+                # change the key around the vector write, so the key is checked again after the copy
+                if slot is not None and self._key_at(slot) == key:
+                    vector = np.array(self.vectors[slot])
+                    if self._key_at(slot) == key:
+                        self.last_used[slot] = now
+                    else:
+                        vector = None
+                results.append(vector)
+            return results
+
+    def _free_slots(self, count: int) -> Tuple[List[int], int]:
+        """
+        :return: `count` slots to write to, and the number of entries evicted to free them.
+        """
+        free = np.flatnonzero((self.keys[:, 0] == 0) & (self.keys[:, 1] == 0))
+        if len(free) >= count:
+            return free[:count].tolist(), 0
+
+        # Evict the least recently used entries, a batch at a time so eviction stays rare
+        evict = min(self.capacity - len(free), max(count - len(free), int(self.capacity * self.evict_fraction)))
+        last_used = np.array(self.last_used)
+        last_used[free] = np.inf
+        victims = np.argpartition(last_used, evict - 1)[:evict]
+        for slot in victims.tolist():
+            self.slots.pop(self._key_at(slot), None)
+        self.keys[victims] = 0
+        return (free.tolist() + victims.tolist())[:count], evict
+
+    def store(self, keys: Sequence[int], vectors: Sequence[Sequence[float]]) -> Dict[str, int]:
+        with self.lock, self._file_lock():
+            vectors = np.asarray(vectors, dtype=np.float32)
+            self._open(dimension=vectors.shape[1])
+            if vectors.shape[1] != int(self.header[1]):
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the cache ({int(self.header[1])}).")
+            self._refresh()
+
+            new = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self.slots:
+                    new[key] = vector
+            new = dict(list(new.items())[:self.capacity])
+            if not new:
+                return {"writes": 0, "evictions": 0}
+            slots, evicted = self._free_slots(len(new))
+            now = time.time()
+            for (key, vector), slot in zip(new.items(), slots):
+                self.vectors[slot] = vector
+                # The key goes in after the vector, so a reader never matches a half-written slot
+                self.keys[slot] = (key >> 64, key & _LOW_BITS)
+                self.last_used[slot] = now
+                self.slots[key] = slot
+            self.header[0] += 1
+            self.generation = int(self.header[0])
+            return {"writes": len(new), "evictions": evicted}
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.slots)
+
+    def close(self):
+        with self.lock:
+            for array in (self.vectors, self.keys, self.last_used, self.header):
+                if array is not None:
+                    array.flush()
+
+
+class EmbeddingCache:
+    """
+    Persistent cache of chunk embeddings keyed by (embedding model id, hash of the chunk text), so
+    re-ingesting a page whose chunks were already seen (for any source or product) skips model
+    inference for them. Each model has its own fixed-capacity memory-mapped store under
+    `directory`; when it is full, the least recently used `evict_fraction` of it is evicted.
+    """
+
+    def __init__(self, directory: str, max_entries: int, evict_fraction: float = 0.1):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.evict_fraction = evict_fraction
+        self._models: Dict[str, _ModelCache] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _model_cache(self, model_id: str) -> _ModelCache:
+        with self._lock:
+            cache = self._models.get(model_id)
+            if cache is None:
+                name = hashlib.sha256(model_id.encode("utf-8")).hexdigest()[:16]
+                cache = _ModelCache(os.path.join(self.directory, name), self.max_entries, self.evict_fraction)
+                self._models[model_id] = cache
+            return cache
+
+    def _count(self, **counts: int):
+        with self._lock:
+            for counter, count in counts.items():
+                self._counters[counter] += count
+
+    def lookup(self, model_id: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        :return: The cached vector of each text, or None where it is not cached.
+        """
+        vectors = self._model_cache(model_id).lookup([text_key(text) for text in texts])
+        hits = sum(vector is not None for vector in vectors)
+        self._count(hits=hits, misses=len(vectors) - hits)
+        return [vector.tolist() if vector is not None else None for vector in vectors]
+
+    def store(self, model_id: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        if not texts:
+            return
+        counts = self._model_cache(model_id).store([text_key(text) for text in texts], vectors)
+        self._count(**counts)
+
+    def close(self):
+        with self._lock:
+            caches = list(self._models.values())
+        for cache in caches:
+            cache.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            caches = dict(self._models)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            "entries": {model_id: len(cache) for model_id, cache in caches.items()},
+            "max_entries": self.max_entries,
+        }
+
+
+embedding_cache = EmbeddingCache(
+    directory=settings.embedding_cache_directory,
+    max_entries=settings.embedding_cache_max_entries,
+)
@@ -0,0 +1,168 @@
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain.embeddings import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+EmbeddingKey = Tuple[str, str]
+
+
+class EmbeddingModelRegistry:
+    """
+    Process-wide registry of embedding models keyed by (model, kwargs).
+
+    Loading a sentence-transformers model takes seconds and hundreds of MB, so each model is loaded
+    once per process and shared by every RAGService. Under gunicorn the master loads the default
+    model before forking (see gunicorn.conf.py), so workers share its weights copy-on-write; each
+    worker then runs the warm-up encode itself, since torch thread pools must not be started
+    before a fork.
+    """
+
+    def __init__(self, default_model: str, default_kwargs: Optional[Dict[str, Any]] = None):
+        self.default_model = default_model
+        self.default_kwargs = default_kwargs or {}
+        self._models: Dict[EmbeddingKey, Embeddings] = {}
+        self._load_seconds: Dict[EmbeddingKey, float] = {}
+        self._warmed_up = False
+        self._lock = threading.Lock()
+        # sentence-transformers multi-process pools as (model, pool, lock), keyed by id() of the model
+        self._pools: Dict[int, Tuple[Any, Dict[str, Any], threading.Lock]] = {}
+
+    @staticmethod
+    def _key(model: str, kwargs: Dict[str, Any]) -> EmbeddingKey:
+        return model.lower(), json.dumps(kwargs, sort_keys=True, default=str)
+
+    @staticmethod
+    def _build(model: str, kwargs: Dict[str, Any]) -> Embeddings:
+        if model.lower() == "huggingface":
+            return HuggingFaceEmbeddings(**kwargs)
+        elif model.lower() == "groq":
+            # Placeholder for GroqEmbeddings, replace with actual implementation if available
+            from langchain.embeddings import GroqEmbeddings
+            return GroqEmbeddings(**kwargs)
+        else:
+            raise ValueError(f"Unsupported embedding model: {model}")
+
+    def get(self, model: Optional[str] = None, kwargs: Optional[Dict[str, Any]] = None) -> Embeddings:
+        """
+        Returns the shared embedding model for (model, kwargs), loading it on first use.
+        Arguments left as None fall back to the configured defaults.
+
+        :param model: Embedding model type (e.g., "huggingface", "groq").
+        :param kwargs: Keyword arguments for the embedding class (e.g., model_name).
+        :return: Shared Embeddings instance.
+        """
+        model = model or self.default_model
+        kwargs = self.default_kwargs if kwargs is None else kwargs
+        key = self._key(model, kwargs)
+        with self._lock:
+            embeddings = self._models.get(key)
+            if embeddings is None:
+                logger.info(f"Loading embedding model {key}")
+                started = time.perf_counter()
+                embeddings = self._build(model, kwargs)
+                self._load_seconds[key] = time.perf_counter() - started
+                self._models[key] = embeddings
+                logger.info(f"Loaded embedding model {key} in {self._load_seconds[key]:.2f}s")
+            return embeddings
+
+    def model_id(self, model: Optional[str] = None, kwargs: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Stable identifier of an embedding configuration, e.g. to tell whether stored vectors were
+        produced by the model currently in use.
+        """
+        model = model or self.default_model
+        kwargs = self.default_kwargs if kwargs is None else kwargs
+        return ":".join(self._key(model, kwargs))
+
+    def load(self):
+        """
+        Loads the default model without running it; safe to call in a process that forks afterwards.
+        """
+        self.get()
+
+    def warm_up(self):
+        """
+        Loads the default model if needed and runs one encode, so the first request does not pay
+        for lazy initialisation.
+        """
+        embeddings = self.get()
+        if not self._warmed_up:
+            embeddings.embed_query(settings.embedding_warm_up_text)
+            self._warmed_up = True
+        logger.info("Embedding model registry warmed up.")
+
+    def encode(self, embeddings: Embeddings, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """
+        Embeds documents with an explicit encoder batch size. For sentence-transformers models the
+        encode runs on the model directly, and with settings.embedding_multi_process on a persistent
+        multi-process pool that spreads batches over every core; other models use embed_documents.
+        Blocking; call it from a worker thread.
+
+        :param embeddings: The embedding model, e.g. from get().
+        :param texts: Documents to embed.
+        :param batch_size: Encoder batch size (defaults to settings.embedding_batch_size).
+        :return: One vector per text.
+        """
+        batch_size = batch_size or settings.embedding_batch_size
+        client = getattr(embeddings, "client", None)
+        if not hasattr(client, "encode_multi_process"):
+            return embeddings.embed_documents(texts)
+
+        # Same preprocessing as HuggingFaceEmbeddings, so documents match queries embedded by it
+        texts = [text.replace("\n", " ") for text in texts]
+        encode_kwargs = {k: v for k, v in (getattr(embeddings, "encode_kwargs", None) or {}).items() if k != "batch_size"}
+        if settings.embedding_multi_process:
+            _, pool, pool_lock = self._get_pool(client)
+            # A pool serves one encode at a time: results come back on a shared queue
+            with pool_lock:
+                vectors = client.encode_multi_process(
+                    texts, pool, batch_size=batch_size,
+                    normalize_embeddings=encode_kwargs.get("normalize_embeddings", False),
+                )
+        else:
+            vectors = client.encode(texts, batch_size=batch_size, **encode_kwargs)
+        return vectors.tolist()
+
+    def _get_pool(self, client):
+        with self._lock:
+            entry = self._pools.get(id(client))
+            if entry is None:
+                logger.info("Starting sentence-transformers multi-process pool.")
+                target_devices = settings.embedding_multi_process_devices or None
+                entry = (client, client.start_multi_process_pool(target_devices=target_devices), threading.Lock())
+                self._pools[id(client)] = entry
+            return entry
+
+    def close(self):
+        """
+        Stops the multi-process pools.
+        """
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for client, pool, _ in pools:
+            client.stop_multi_process_pool(pool)
+        logger.info("Embedding model registry closed.")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "models": [
+                    {"model": model, "kwargs": json.loads(kwargs), "load_seconds": round(self._load_seconds[(model, kwargs)], 3)}
+                    for model, kwargs in self._models
+                ],
+                "warmed_up": self._warmed_up,
+            }
+
+
+embedding_registry = EmbeddingModelRegistry(
+    default_model=settings.embedding_model,
+    default_kwargs=settings.embedding_model_kwargs,
+)
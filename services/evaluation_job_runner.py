@@ -0,0 +1,9 @@
+from config import settings
+from services.background_job_runner import BackgroundJobRunner, JobQueueFullError
+
+# Background evaluation workflows, keyed by evaluation ID
+evaluation_job_runner = BackgroundJobRunner(
+    kind="evaluation",
+    max_concurrency=settings.evaluation_job_concurrency,
+    max_pending=settings.evaluation_job_max_pending,
+)
@@ -1,40 +1,75 @@
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
-from langchain.chains.summarize import load_summarize_chain
+import time
+from typing import AsyncIterator, Awaitable, Dict, Any, List, Optional, Tuple
 from langchain.schema import Document
 from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
+from agents.utils.llm_registry import get_llm
+from agents.utils.token_budget import count_tokens, track_token_usage
+from services import figma_stream_parser
+from services.figma_node_index import FigmaNodeIndex
+from services.figma_stream_parser import FigmaEvent
 
 import json
 from config import settings
 from langchain_core.rate_limiters import InMemoryRateLimiter
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from tracing import start_span
 
 logger = logging.getLogger(__name__)
 
+# Shared by every transformer, so concurrent design onboardings stay within the rate limit together
+summary_rate_limiter = InMemoryRateLimiter(
+    requests_per_second=settings.figma_summary_requests_per_second,
+    check_every_n_seconds=0.1,
+    max_bucket_size=settings.figma_summary_max_burst,
+)
+
+
+async def _gather_or_cancel(awaitables: List[Awaitable[Any]]) -> List[Any]:
+    """
+    asyncio.gather that cancels the remaining calls when one fails or the caller is cancelled.
+    """
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+class _FirstLevelExtraction:
+    """
+    State of one first-level extraction: the extracted screens, the index of the nodes seen so far, and
+    the buttons whose destination is mapped to a screen name at the end.
+    """
+
+    def __init__(self):
+        self.useful_info: Dict[str, Any] = {"screens": {}}
+        self.node_index = FigmaNodeIndex()
+        self.destinations: List[Tuple[dict, str]] = []
+
+
 class FigmaDataTransformer:
     """
     Transforms Figma JSON data by extracting useful information such as screens, texts, buttons,
-    actions, and navigation. Utilizes LangChain's Map-Reduce summarization method with ChatOpenAI to ensure
-    comprehensive and relationship-preserving extraction while optimizing for performance and cost.
+    actions, and navigation. Summarizes the extraction with an async map-reduce over ChatOpenAI: chunks are
+    summarized concurrently, summaries are collapsed level by level until they fit one prompt, and the final
+    prompt combines them into structured JSON.
     """
 
     def __init__(self):
         """
         Initializes the FigmaDataTransformer with a specified LLM model and temperature.
         """
-        self.rate_limiter = InMemoryRateLimiter(
-            requests_per_second=0.5,  # Adjusted rate limiter for ChatOpenAI
-            check_every_n_seconds=0.1,
-            max_bucket_size=5,
-        )
+        # The pooled LLM is shared with other callers, so summarization calls take from this limiter
+        # themselves instead of attaching it to the client
+        self.rate_limiter = summary_rate_limiter
 
-        # Initialize ChatOpenAI LLM
-        self.llm = ChatOpenAI(
-            temperature=settings.temperature,
-            model_name="gpt-3.5-turbo",
-            openai_api_key=settings.openai_api_key
-        )
+        # Borrow the pooled ChatOpenAI LLM
+        self.model_name = "gpt-3.5-turbo"
+        self.llm = get_llm(provider="openai", model_name=self.model_name, temperature=settings.temperature)
 
         # Define the Question Prompt Template
         final_combine_prompt = """Extract and summarize the essential functional components from the following Figma design data to understand the product's workflow and functionality.
@@ -64,10 +99,10 @@ You are export figma design reader, Extract and summarize the essential function
 DesignCode:`{text}'
 Summary:
 """
-        map_prompt_template=PromptTemplate(input_variables=['text'],
-                                    template=chunks_prompt)
-        
-        final_combine_prompt_template=PromptTemplate(input_variables=['text'],
+        self.map_prompt = PromptTemplate(input_variables=['text'],
+                                         template=chunks_prompt)
+
+        self.combine_prompt = PromptTemplate(input_variables=['text'],
                                              template=final_combine_prompt)
 
         # Initialize Text Splitter
@@ -76,16 +111,7 @@ Summary:
             chunk_overlap=20
         )
 
-        # Load the summarize chain with 'map_reduce' type
-        self.chain = load_summarize_chain(
-            llm=self.llm,
-            chain_type="map_reduce",
-            map_prompt=map_prompt_template,
-            combine_prompt=final_combine_prompt_template,
-            verbose=True
-        )
-
-    def extract_useful_info(self, figma_data: dict) -> Dict[str, Any]:
+    async def extract_useful_info(self, figma_data: dict) -> Dict[str, Any]:
         """
         Extracts useful information from Figma data using a two-step process:
         initial extraction and map-reduce summarization.
@@ -96,13 +122,29 @@ Summary:
 
         # Initial extraction to filter out non-essential data while preserving structure
         initial_extracted = self._first_level_transfer(figma_data)
+        return await self._summarize_extracted(initial_extracted)
+
+    async def extract_useful_info_stream(self, events: AsyncIterator[FigmaEvent]) -> Dict[str, Any]:
+        """
+        extract_useful_info for a Figma file parsed as it downloads, so the raw file is never held in memory.
+
+        :param events: Events from services.figma_stream_parser.iter_figma_events.
+        :return: A dictionary containing the structured and refined information.
+        """
+        initial_extracted = await self._first_level_transfer_stream(events)
+        return await self._summarize_extracted(initial_extracted)
+
+    async def _summarize_extracted(self, initial_extracted: dict) -> Dict[str, Any]:
+        """
+        Map-reduce summarization of the initial extraction. Cancelling the caller cancels the calls in flight.
+
+        :param initial_extracted: Result of the first-level extraction.
+        :return: A dictionary containing the structured and refined information.
+        """
         logger.debug(f"Initial extraction result: {initial_extracted}")
 
         # Write initial_extracted to a file
-        with open('initial_extracted.json', 'w') as f:
-            json.dump(initial_extracted, f, indent=2)  # Save as JSON with indentation
-
-        print(json.dumps(initial_extracted))
+        await asyncio.to_thread(self._write_debug_file, 'initial_extracted.json', initial_extracted)
 
         # Convert the extracted data to a text format
         extracted_text = self._figma_json_to_text(initial_extracted)
@@ -112,21 +154,18 @@ Summary:
         chunks = self.text_splitter.split_text(extracted_text)
         logger.debug(f"Number of chunks created: {len(chunks)}")
 
-        documents = self.text_splitter.create_documents(chunks)
-
-        length_of_text = len(documents)
-
-        for chunk in chunks:
-            print(self.llm.get_num_tokens(chunk))
-
-        # Run the summarize chain
         try:
-            summarized_text = self.chain.run(documents)
-    
-            # Write summarized_text to a file
-            with open('summarized_text.txt', 'w') as f:
-                f.write(summarized_text)  # Save summarized text 
+            summarized_text, report = await self._map_reduce(chunks)
 
+            # Write summarized_text to a file
+            await asyncio.to_thread(self._write_debug_file, 'summarized_text.txt', summarized_text)
+
+            logger.info(
+                f"Summarized {report['chunks']} Figma chunks in {report['calls']} calls over {report['levels']} "
+                f"reduce levels: {report['seconds']}s, {report['prompt_tokens']} prompt and "
+                f"{report['completion_tokens']} completion tokens."
+            )
+            logger.debug(f"Per-call summarization report: {report['per_call']}")
             logger.debug(f"Summarized text: {summarized_text}")
             structured_data = self._parse_summary(summarized_text)
             logger.debug(f"Structured Data after parsing summary: {structured_data}")
@@ -135,14 +174,123 @@ Summary:
             logger.error(f"Error during summarization: {e}")
             return {}
 
+    @staticmethod
+    def _write_debug_file(path: str, content: Any):
+        with open(path, 'w') as f:
+            if isinstance(content, str):
+                f.write(content)
+            else:
+                json.dump(content, f, indent=2)  # Save as JSON with indentation
+
+    async def _map_reduce(self, chunks: List[str]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Summarizes the chunks concurrently (map), then collapses the summaries in groups of at most
+        settings.figma_summary_reduce_max_tokens tokens, level by level, until they fit one prompt, which
+        combines them into the final structured summary.
+
+        :return: The final summary, and a report of the run with the latency and token usage of every call.
+        """
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(settings.figma_summary_concurrency)
+        with start_span("figma.summarize", **{"figma.chunks": len(chunks)}) as span:
+            results = await _gather_or_cancel([
+                self._summarize_chunk(self.map_prompt, chunk, "map", index, semaphore)
+                for index, chunk in enumerate(chunks)
+            ])
+            summaries = [summary for summary, _ in results]
+            per_call = [call for _, call in results]
+
+            levels = 0
+            while len(summaries) > 1:
+                groups = self._reduce_groups(summaries)
+                # Done when they fit one prompt, or when no summary can be grouped with another
+                if len(groups) == 1 or len(groups) == len(summaries):
+                    break
+                levels += 1
+                results = await _gather_or_cancel([
+                    self._summarize_chunk(self.map_prompt, "\n\n".join(group), f"reduce-{levels}", index, semaphore)
+                    if len(group) > 1 else self._pass_through(group[0])
+                    for index, group in enumerate(groups)
+                ])
+                summaries = [summary for summary, _ in results]
+                per_call.extend(call for _, call in results if call is not None)
+
+            summary, call = await self._summarize_chunk(self.combine_prompt, "\n\n".join(summaries), "combine", 0, semaphore)
+            per_call.append(call)
+
+            report = {
+                "chunks": len(chunks),
+                "levels": levels,
+                "calls": len(per_call),
+                "seconds": round(time.perf_counter() - started, 3),
+                "prompt_tokens": sum(call["prompt_tokens"] for call in per_call),
+                "completion_tokens": sum(call["completion_tokens"] for call in per_call),
+                "per_call": per_call,
+            }
+            span.set_attribute("figma.reduce_levels", levels)
+            span.set_attribute("llm.calls", report["calls"])
+            span.set_attribute("llm.prompt_tokens", report["prompt_tokens"])
+            span.set_attribute("llm.completion_tokens", report["completion_tokens"])
+        return summary, report
+
+    def _reduce_groups(self, summaries: List[str]) -> List[List[str]]:
+        """
+        Splits summaries, in order, into groups of at most settings.figma_summary_reduce_max_tokens tokens.
+        """
+        groups: List[List[str]] = []
+        group_tokens = 0
+        for summary in summaries:
+            tokens = count_tokens(summary, self.model_name)
+            if groups and group_tokens + tokens <= settings.figma_summary_reduce_max_tokens:
+                groups[-1].append(summary)
+                group_tokens += tokens
+            else:
+                groups.append([summary])
+                group_tokens = tokens
+        return groups
+
+    @staticmethod
+    async def _pass_through(summary: str) -> Tuple[str, None]:
+        return summary, None
+
+    async def _summarize_chunk(self, prompt: PromptTemplate, text: str, stage: str, index: int, semaphore: asyncio.Semaphore) -> Tuple[str, Dict[str, Any]]:
+        """
+        One map, reduce or combine call, limited by the semaphore and the shared rate limiter.
+
+        :return: The summary, and the call's latency and token usage.
+        """
+        async with semaphore:
+            await self.rate_limiter.aacquire()
+            with start_span("figma.summarize.call", **{"figma.stage": stage, "figma.index": index}) as span:
+                started = time.perf_counter()
+                with track_token_usage() as usage:
+                    response = await self.llm.ainvoke(prompt.format(text=text))
+                call = {
+                    "stage": stage,
+                    "index": index,
+                    "seconds": round(time.perf_counter() - started, 3),
+                    "prompt_tokens": usage.prompt_tokens,
+                    "completion_tokens": usage.completion_tokens,
+                    "cached": usage.cached_calls > 0,
+                }
+                span.set_attribute("llm.prompt_tokens", usage.prompt_tokens)
+                span.set_attribute("llm.completion_tokens", usage.completion_tokens)
+        logger.debug(f"Figma summarization call: {call}")
+        return response.content, call
+
     def _figma_json_to_text(self, figma_data: dict) -> str:
         """
-        Converts Figma JSON data to a plain text string suitable for LLM processing.
+        Converts Figma JSON data to a plain text string suitable for LLM processing: one compact JSON
+        object per screen and line, so the text splitter cuts between screens and no tokens are spent
+        on indentation.
 
-        :param figma_data: The raw Figma JSON data.
+        :param figma_data: The extracted Figma data.
         :return: A string representation of the Figma data.
         """
-        return json.dumps(figma_data, indent=2)
+        return "\n".join(
+            json.dumps({name: screen}, separators=(",", ":"), ensure_ascii=False)
+            for name, screen in figma_data.get("screens", {}).items()
+        )
 
     def _parse_summary(self, summary: str) -> dict:
         """
@@ -166,113 +314,153 @@ Summary:
         :param figma_data: The raw Figma JSON data.
         :return: A dictionary containing the extracted useful information with preserved hierarchy.
         """
-        useful_info = {
-            "screens": {}
-        }
-
-        def traverse(node, parent_screen: Optional[str] = None):
-            node_type = node.get('type')
-            node_name = node.get('name', 'Unnamed')
-
-            # Identify screens (e.g., FRAME, PAGE, CANVAS)
-            if node_type in ['FRAME', 'PAGE', 'CANVAS', 'DOCUMENT']:
-                current_screen = node_name
-                if current_screen not in useful_info["screens"]:
-                    useful_info["screens"][current_screen] = {
-                        "children": [],
-                        "texts": [],
-                        "buttons": [],
-                        "navigations": []
-                    }
-                logger.debug(f"Identified screen: {current_screen}")
-            else:
-                current_screen = parent_screen
-
-            extracted_node = {}
-            if current_screen:
-                # Retain the node's type and name
-                extracted_node["type"] = node_type
-                extracted_node["name"] = node_name
-
-                # Extract text elements
-                if node_type == 'TEXT':
-                    text_content = node.get('characters', '').strip()
-                    if text_content:
-                        extracted_node["text"] = text_content
-                        useful_info["screens"][current_screen]["texts"].append(text_content)
-                        logger.debug(f"Extracted text: '{text_content}' on screen: {current_screen}")
-
-                # Extract interactive elements like buttons
-                elif node_type in ['BUTTON', 'COMPONENT', 'RECTANGLE', 'VECTOR', 'ELLIPSE', 'POLYGON', 'STAR']:
-                    interactions = node.get('interactions', [])
-                    for interaction in interactions:
-                        trigger = interaction.get('trigger', {}).get('type')
-                        action_type = interaction.get('action', {}).get('type')
-                        destination_id = interaction.get('action', {}).get('destinationId')
-
-                        if trigger and action_type:
-                            destination = self._map_destination(destination_id, figma_data) if destination_id else None
-                            button_info = {
-                                "name": node_name,
-                                "actions": [action_type],
-                                "navigation": destination
-                            }
-                            useful_info["screens"][current_screen]["buttons"].append(button_info)
-                            logger.debug(f"Extracted button: {button_info} on screen: {current_screen}")
-
-                # Extract navigations if available
-                navigations = node.get('navigation', [])
-                if navigations:
-                    useful_info["screens"][current_screen]["navigations"].extend(navigations)
-                    logger.debug(f"Extracted navigations: {navigations} on screen: {current_screen}")
-
-                # Retain relevant children
-                children = node.get('children', [])
-                if children:
-                    extracted_node["children"] = []
-                    for child in children:
-                        child_extracted = traverse(child, current_screen)
-                        if child_extracted:
-                            extracted_node["children"].append(child_extracted)
-
-                if extracted_node:
-                    useful_info["screens"][current_screen]["children"].append(extracted_node)
+        extraction = _FirstLevelExtraction()
+        document = figma_data.get('document', {})
+        extraction.node_index.add_tree(document)
+        self._extract_tree(extraction, document, None, None)
+        return self._finish_extraction(extraction)
+
+    async def _first_level_transfer_stream(self, events: AsyncIterator[FigmaEvent]) -> dict:
+        """
+        Same extraction as _first_level_transfer, from the events of a Figma file parsed as it
+        downloads (see services/figma_stream_parser.py), so only one frame of the raw file is in
+        memory at a time.
 
+        :param events: Events from iter_figma_events.
+        :return: A dictionary containing the extracted useful information with preserved hierarchy.
+        """
+        extraction = _FirstLevelExtraction()
+        # (screen, extracted node, owning frame id) of the document and page being streamed
+        open_nodes: List[Tuple[Optional[str], Optional[dict], Optional[str]]] = []
+        async for kind, node in events:
+            parent_screen, parent_extracted, owning_frame = open_nodes[-1] if open_nodes else (None, None, None)
+            if kind == figma_stream_parser.START:
+                extraction.node_index.add_tree(node, owning_frame)
+                current_screen, extracted_node = self._enter_node(extraction, node, parent_screen, parent_extracted)
+                open_nodes.append((current_screen, extracted_node, extraction.node_index.frame_of(node.get('id'))))
+            elif kind == figma_stream_parser.NODE:
+                extraction.node_index.add_tree(node, owning_frame)
+                self._extract_tree(extraction, node, parent_screen, parent_extracted)
             else:
-                # If not within a recognized screen, still traverse children without extraction
-                children = node.get('children', [])
-                for child in children:
-                    traverse(child, current_screen)
+                open_nodes.pop()
+                if parent_extracted is not None:
+                    self._exit_node(extraction, parent_screen, parent_extracted)
+        return self._finish_extraction(extraction)
 
-            return extracted_node if extracted_node else None
+    def _extract_tree(self, extraction: "_FirstLevelExtraction", root: dict, parent_screen: Optional[str], parent_extracted: Optional[dict]):
+        """
+        Extracts `root` and its descendants. The tree is walked with an explicit stack, so its depth is not
+        limited by the recursion limit.
+        """
+        # Entries are (node, parent screen, parent's extracted node) to enter a node, or
+        # (None, screen, extracted node) to finish one after its children
+        stack = [(root, parent_screen, parent_extracted)]
+        while stack:
+            node, parent_screen, parent_extracted = stack.pop()
+            if node is None:
+                self._exit_node(extraction, parent_screen, parent_extracted)
+                continue
+
+            current_screen, extracted_node = self._enter_node(extraction, node, parent_screen, parent_extracted)
+            children = node.get('children', [])
+            if extracted_node is not None:
+                stack.append((None, current_screen, extracted_node))
+            stack.extend((child, current_screen, extracted_node) for child in reversed(children))
+
+    def _enter_node(self, extraction: "_FirstLevelExtraction", node: dict, parent_screen: Optional[str], parent_extracted: Optional[dict]) -> Tuple[Optional[str], Optional[dict]]:
+        """
+        Extracts a node's own information, before its children.
 
-        document = figma_data.get('document', {})
-        traverse(document)
+        :return: The node's screen and extracted node, both None if it is not within a recognized screen.
+        """
+        useful_info = extraction.useful_info
+        node_type = node.get('type')
+        node_name = node.get('name', 'Unnamed')
+
+        # Identify screens (e.g., FRAME, PAGE, CANVAS)
+        if node_type in ['FRAME', 'PAGE', 'CANVAS', 'DOCUMENT']:
+            current_screen = node_name
+            if current_screen not in useful_info["screens"]:
+                useful_info["screens"][current_screen] = {
+                    "children": [],
+                    "texts": [],
+                    "buttons": [],
+                    "navigations": []
+                }
+            logger.debug(f"Identified screen: {current_screen}")
+        else:
+            current_screen = parent_screen
+
+        if not current_screen:
+            # If not within a recognized screen, children are still traversed without extraction
+            return None, None
+
+        # Retain the node's type and name
+        extracted_node = {"type": node_type, "name": node_name}
+
+        # Extract text elements
+        if node_type == 'TEXT':
+            text_content = node.get('characters', '').strip()
+            if text_content:
+                extracted_node["text"] = text_content
+                useful_info["screens"][current_screen]["texts"].append(text_content)
+                logger.debug(f"Extracted text: '{text_content}' on screen: {current_screen}")
+
+        # Extract interactive elements like buttons
+        elif node_type in ['BUTTON', 'COMPONENT', 'RECTANGLE', 'VECTOR', 'ELLIPSE', 'POLYGON', 'STAR']:
+            interactions = node.get('interactions', [])
+            for interaction in interactions:
+                trigger = interaction.get('trigger', {}).get('type')
+                action_type = interaction.get('action', {}).get('type')
+                destination_id = interaction.get('action', {}).get('destinationId')
+
+                if trigger and action_type:
+                    button_info = {
+                        "name": node_name,
+                        "actions": [action_type],
+                        "navigation": None
+                    }
+                    if destination_id:
+                        # Destinations may be further down the document; they are mapped once it is all indexed
+                        extraction.destinations.append((button_info, destination_id))
+                    useful_info["screens"][current_screen]["buttons"].append(button_info)
+                    logger.debug(f"Extracted button: {button_info} on screen: {current_screen}")
+
+        # Extract navigations if available
+        navigations = node.get('navigation', [])
+        if navigations:
+            useful_info["screens"][current_screen]["navigations"].extend(navigations)
+            logger.debug(f"Extracted navigations: {navigations} on screen: {current_screen}")
+
+        # Retain relevant children
+        if parent_extracted is not None:
+            parent_extracted.setdefault("children", []).append(extracted_node)
+
+        return current_screen, extracted_node
 
-        return useful_info
+    def _exit_node(self, extraction: "_FirstLevelExtraction", screen: str, extracted_node: dict):
+        """
+        Adds a node to its screen, after its children.
+        """
+        extraction.useful_info["screens"][screen]["children"].append(extracted_node)
 
-    def _map_destination(self, destination_id: str, figma_data: dict) -> str:
+    def _finish_extraction(self, extraction: "_FirstLevelExtraction") -> dict:
+        for button_info, destination_id in extraction.destinations:
+            button_info["navigation"] = self._map_destination(destination_id, extraction.node_index)
+        return extraction.useful_info
+
+    def _map_destination(self, destination_id: str, node_index: FigmaNodeIndex) -> str:
         """
         Maps destinationId to the corresponding screen name.
 
         :param destination_id: The destination node ID from Figma interactions.
-        :param figma_data: The raw Figma JSON data.
+        :param node_index: Index of the document's nodes.
         :return: The name of the destination screen if found, else the destination_id itself.
         """
-        # Traverse the document to find the node with the given ID
-        def find_node(node, target_id):
-            if node.get('id') == target_id:
-                return node.get('name', 'Unnamed')
-            for child in node.get('children', []):
-                result = find_node(child, target_id)
-                if result:
-                    return result
-            return None
-
-        screen_name = find_node(figma_data.get('document', {}), destination_id)
+        screen_name = node_index.resolve(destination_id)
         if screen_name:
             logger.debug(f"Mapped destination ID {destination_id} to screen: {screen_name}")
             return screen_name
         else:
             logger.warning(f"Could not map destination ID {destination_id} to any screen.")
-            return destination_id  # Fallback to ID if mapping not found
\ No newline at end of file
+            return destination_id  # Fallback to ID if mapping not found
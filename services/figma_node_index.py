@@ -0,0 +1,62 @@
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Node type whose nodes own the nodes inside them for navigation purposes
+FRAME_TYPE = "FRAME"
+
+
+class FigmaNodeIndex:
+    """
+    Index of a Figma document's nodes by id: the node's name and the id of the frame that owns it
+    (its nearest FRAME ancestor, or itself for a frame). Only names are kept, so indexing a streamed
+    document does not hold on to its nodes.
+
+    Built with an explicit stack rather than recursion, so documents of any depth are indexed in a
+    single pass, and prototype destinations are then resolved with dict lookups instead of a tree
+    search per interaction. Trees can be added piecemeal (e.g. one frame at a time).
+    """
+
+    def __init__(self):
+        self.names: Dict[str, str] = {}
+        self.owning_frames: Dict[str, str] = {}
+
+    @classmethod
+    def build(cls, root: Dict[str, Any]) -> "FigmaNodeIndex":
+        index = cls()
+        index.add_tree(root)
+        return index
+
+    def add_tree(self, root: Dict[str, Any], owning_frame: Optional[str] = None):
+        """
+        Indexes `root` and all its descendants.
+
+        :param owning_frame: Id of the frame owning `root`, if it is inside one.
+        """
+        stack = [(root, owning_frame)]
+        while stack:
+            node, frame_id = stack.pop()
+            node_id = node.get("id")
+            if node.get("type") == FRAME_TYPE and node_id is not None:
+                frame_id = node_id
+            if node_id is not None:
+                self.names[node_id] = node.get("name", "Unnamed")
+                if frame_id is not None:
+                    self.owning_frames[node_id] = frame_id
+            stack.extend((child, frame_id) for child in node.get("children", []))
+
+    def frame_of(self, node_id: str) -> Optional[str]:
+        return self.owning_frames.get(node_id)
+
+    def resolve(self, destination_id: str) -> Optional[str]:
+        """
+        Name of the screen a prototype destination leads to: the frame owning the destination node,
+        or the node itself when it is not inside a frame.
+
+        :return: The screen name, or None if the id is not in the document.
+        """
+        return self.names.get(self.frame_of(destination_id) or destination_id)
+
+    def __len__(self) -> int:
+        return len(self.names)
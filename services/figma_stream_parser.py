@@ -0,0 +1,268 @@
+import codecs
+import json
+import logging
+import re
+from typing import Any, AsyncIterator, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Event kinds yielded by iter_figma_events
+START = "start"  # A document or page begins; its fields that precede "children", without children
+NODE = "node"  # A complete top-level node of a page (usually a frame), with its whole subtree
+END = "end"  # The document or page started last ends; its fields, without children
+
+FigmaEvent = Tuple[str, Dict[str, Any]]
+
+_NON_WHITESPACE = re.compile(r"[^ \t\n\r]")
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+# A whole string, a bracket, or a lone quote when the string is cut off at the end of the buffer
+_CONTAINER_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|["\[\]{}]', re.S)
+_SCALAR_END = re.compile(r"[,\]}: \t\n\r]")
+# Characters that can continue a number the decoder stopped at (e.g. "12" of "12.5" cut after ".")
+_NUMBER_CONTINUATION = frozenset("0123456789.eE+-")
+_DECODER = json.JSONDecoder()
+
+
+def _is_complete(value: Any, text: str, end: int) -> bool:
+    """
+    Whether a value decoded from `text` up to `end` cannot continue past the end of the buffer.
+    """
+    if end == len(text):
+        return False
+    return isinstance(value, bool) or not isinstance(value, (int, float)) or text[end] not in _NUMBER_CONTINUATION
+
+
+def _scan_container(buffer: str, pos: int, depth: int) -> Tuple[int, int, bool]:
+    """
+    Scans an array or object from `pos` at nesting `depth`, skipping over strings.
+
+    :return: Where scanning stopped (after the closing bracket, at a string cut off by the end of
+        the buffer, or at the end of the buffer), the nesting there, and whether the value ended.
+    """
+    for match in _CONTAINER_TOKEN.finditer(buffer, pos):
+        character = buffer[match.start()]
+        if character == '"':
+            if match.end() - match.start() == 1:
+                return match.start(), depth, False
+        elif character in "[{":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return match.end(), depth, True
+    return len(buffer), depth, False
+
+
+class _JsonStreamReader:
+    """
+    Pull parser over a stream of UTF-8 JSON bytes that walks objects and arrays key by key. Values
+    are read whole with the C JSON decoder, retried as more of the stream arrives, or skipped by
+    scanning for their end with regular expressions. Only the current download piece and the value
+    being read are held in memory.
+    """
+
+    def __init__(self, byte_chunks: AsyncIterator[bytes]):
+        self._chunks = byte_chunks.__aiter__()
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    async def _read_piece(self) -> str:
+        if self._eof:
+            raise ValueError("Unexpected end of JSON stream.")
+        try:
+            data = await self._chunks.__anext__()
+            return self._decoder.decode(data)
+        except StopAsyncIteration:
+            self._eof = True
+            return self._decoder.decode(b"", final=True)
+
+    async def _fill(self):
+        """
+        Appends the next piece of the stream to the buffer, dropping what was consumed before it.
+        """
+        text = await self._read_piece()
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+
+    async def peek(self) -> str:
+        """
+        Skips whitespace and returns the next character without consuming it ("" at the end).
+        """
+        while True:
+            match = _NON_WHITESPACE.search(self._buffer, self._pos)
+            if match:
+                self._pos = match.start()
+                return match.group()
+            self._pos = len(self._buffer)
+            if self._eof:
+                return ""
+            await self._fill()
+
+    async def expect(self, character: str):
+        found = await self.peek()
+        if found != character:
+            raise ValueError(f"Expected {character!r} in JSON stream, found {found or 'end of stream'!r}.")
+        self._pos += 1
+
+    async def skip_value(self):
+        """
+        Consumes the next value without materializing it.
+        """
+        first = await self.peek()
+        if first == '"':
+            while True:
+                match = _STRING.match(self._buffer, self._pos)
+                if match:
+                    self._pos = match.end()
+                    return
+                await self._fill()
+        elif first in ("{", "["):
+            depth = 0
+            while True:
+                self._pos, depth, done = _scan_container(self._buffer, self._pos, depth)
+                if done:
+                    return
+                await self._fill()
+        elif first:
+            while True:
+                match = _SCALAR_END.search(self._buffer, self._pos)
+                if match:
+                    self._pos = match.start()
+                    return
+                self._pos = len(self._buffer)
+                if self._eof:
+                    return
+                await self._fill()
+        else:
+            raise ValueError("Unexpected end of JSON stream.")
+
+    async def read_value(self) -> Any:
+        """
+        Consumes and parses the next value. A value cut off by the end of the buffer is decoded again
+        each time the data read for it has doubled, so large values cost linear time. An invalid value
+        is only reported once the stream ends.
+        """
+        await self.peek()
+        try:
+            value, end = _DECODER.raw_decode(self._buffer, self._pos)
+            if _is_complete(value, self._buffer, end):
+                self._pos = end
+                return value
+        except json.JSONDecodeError:
+            pass
+
+        pieces = [self._buffer[self._pos:]]
+        size = len(pieces[0])
+        retry_size = size + 1
+        while True:
+            pieces.append(await self._read_piece())
+            size += len(pieces[-1])
+            if size < retry_size and not self._eof:
+                continue
+            text = "".join(pieces)
+            pieces = [text]
+            try:
+                value, end = _DECODER.raw_decode(text)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+                retry_size = 2 * size
+                continue
+            # A number at the end of what was read may continue in the next piece
+            if _is_complete(value, text, end) or self._eof:
+                self._buffer = text[end:]
+                self._pos = 0
+                return value
+            retry_size = size + 1
+
+    async def iter_object(self) -> AsyncIterator[str]:
+        """
+        Yields the keys of the next object; the caller must read or skip each key's value before
+        asking for the next key.
+        """
+        await self.expect("{")
+        if await self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = await self.read_value()
+            await self.expect(":")
+            yield key
+            separator = await self.peek()
+            self._pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"Expected ',' or '}}' in JSON stream, found {separator or 'end of stream'!r}.")
+
+    async def iter_array(self) -> AsyncIterator[None]:
+        """
+        Yields once per element of the next array; the caller must read or skip each element.
+        """
+        await self.expect("[")
+        if await self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield None
+            separator = await self.peek()
+            self._pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON stream, found {separator or 'end of stream'!r}.")
+
+
+async def _iter_container_events(reader: _JsonStreamReader, level: int) -> AsyncIterator[FigmaEvent]:
+    """
+    Events of the document (level 0) or a page (level 1). The document's children are pages, and
+    a page's children are emitted whole as NODE events.
+    """
+    node: Dict[str, Any] = {}
+    started = False
+    async for key in reader.iter_object():
+        if key != "children" or started:
+            node[key] = await reader.read_value()
+            continue
+        started = True
+        yield START, node
+        async for _ in reader.iter_array():
+            if level == 0 and await reader.peek() == "{":
+                async for event in _iter_container_events(reader, level + 1):
+                    yield event
+            else:
+                child = await reader.read_value()
+                if isinstance(child, dict):
+                    yield NODE, child
+    if not started:
+        yield START, node
+    yield END, node
+
+
+async def iter_figma_events(byte_chunks: AsyncIterator[bytes]) -> AsyncIterator[FigmaEvent]:
+    """
+    Parses a Figma file (GET /v1/files/:key response body) as it streams in, yielding:
+
+    - (START, fields) when the document or a page begins, with the fields that precede its children
+      (the Figma API sends id, name and type first)
+    - (NODE, node) for every child of a page, with its whole subtree
+    - (END, fields) when the document or the page started last ends
+
+    The rest of the file (components, styles, ...) is skipped without being parsed, so peak memory
+    is bounded by the largest top-level frame rather than by the size of the file.
+
+    :param byte_chunks: The response body.
+    """
+    reader = _JsonStreamReader(byte_chunks)
+    if await reader.peek() != "{":
+        raise ValueError("Figma file response is not a JSON object.")
+    async for key in reader.iter_object():
+        if key == "document":
+            async for event in _iter_container_events(reader, 0):
+                yield event
+        else:
+            await reader.skip_value()
+    if await reader.peek():
+        raise ValueError("Unexpected data after the Figma file JSON.")
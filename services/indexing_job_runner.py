@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from config import settings
+from database import PooledConnection
+from repositories.DocumentationSourceRepository import DocumentationSourceRepository
+from services.background_job_runner import BackgroundJobRunner, JobQueueFullError
+from services.RAGService import RAGService
+
+logger = logging.getLogger(__name__)
+
+# Background indexing of documentation sources, keyed by DocumentationSources ID
+indexing_job_runner = BackgroundJobRunner(
+    kind="indexing",
+    max_concurrency=settings.indexing_job_concurrency,
+    max_pending=settings.indexing_job_max_pending,
+)
+
+
+async def index_documentation_source(documentation_source_id: int):
+    """
+    Indexing job: chunks, embeds and persists one documentation source, recording its status as
+    INDEXING, then INDEXED or FAILED with the error message.
+    """
+    db = PooledConnection()
+    source_repo = DocumentationSourceRepository(db)
+    rag_service = RAGService(db)
+    try:
+        await source_repo.update_indexing_status(documentation_source_id, "INDEXING")
+        await rag_service.index_source(documentation_source_id)
+        await source_repo.update_indexing_status(documentation_source_id, "INDEXED")
+    except asyncio.CancelledError:
+        logger.warning(f"Indexing cancelled for DocumentationSource ID {documentation_source_id}")
+        await source_repo.update_indexing_status(documentation_source_id, "FAILED", "cancelled at shutdown")
+        raise
+    except Exception as e:
+        logger.error(f"Indexing failed for DocumentationSource ID {documentation_source_id}: {e}")
+        await source_repo.update_indexing_status(documentation_source_id, "FAILED", str(e))
+    finally:
+        await rag_service.close()
+
+
+async def queue_indexing(documentation_source_id: int) -> bool:
+    """
+    Queues the indexing job of a documentation source and marks it QUEUED. When the queue is full
+    the source is marked FAILED so it can be re-queued later.
+
+    :return: True if the job was queued.
+    """
+    source_repo = DocumentationSourceRepository(PooledConnection())
+    if indexing_job_runner.is_active(documentation_source_id):
+        logger.info(f"Indexing already queued for DocumentationSource ID: {documentation_source_id}")
+        return True
+    try:
+        await source_repo.update_indexing_status(documentation_source_id, "QUEUED")
+        indexing_job_runner.submit(documentation_source_id, lambda: index_documentation_source(documentation_source_id))
+        return True
+    except JobQueueFullError as e:
+        logger.warning(f"Could not queue indexing for DocumentationSource ID {documentation_source_id}: {e}")
+        await source_repo.update_indexing_status(documentation_source_id, "FAILED", str(e))
+        return False
+
+
+async def queue_unindexed_sources(product_id: Optional[int] = None, include_indexed: bool = False) -> Dict[str, int]:
+    """
+    Backfill: queues the indexing job of every source that has no ingestion ledger entry, e.g. of
+    products onboarded before sources were indexed at onboarding. With include_indexed, every
+    source is queued; unchanged sources then cost one metadata lookup each.
+
+    :param product_id: Only sources of this product; all products when omitted.
+    :return: Counts of queued sources and of sources that did not fit in the queue.
+    """
+    source_repo = DocumentationSourceRepository(PooledConnection())
+    if include_indexed:
+        source_ids = [source["id"] for source in await source_repo.get_sources_by_product_id(product_id)]
+    else:
+        source_ids = await source_repo.get_unindexed_source_ids(product_id)
+
+    counts = {"queued": 0, "queue_full": 0}
+    for source_id in source_ids:
+        counts["queued" if await queue_indexing(source_id) else "queue_full"] += 1
+    logger.info(f"Backfill indexing for Product ID {product_id}: {counts}")
+    return counts
@@ -0,0 +1,151 @@
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("float16", "int8")
+
+# Rows decoded to float32 at a time while scanning, bounding the temporary memory of a search
+SCAN_BLOCK_ROWS = 65536
+
+
+class QuantizedIndex:
+    """
+    Exhaustive L2 search over compact copies of the vectors, kept in NumPy arrays:
+
+    - float16: half-precision copies (2 bytes per dimension)
+    - int8: per-dimension scalar quantization to 256 levels between the dimension's minimum and
+      maximum (1 byte per dimension); stored as uint8 codes with a float32 scale and offset
+
+    Distances are computed on the compact vectors block by block, so a search never holds a
+    float32 copy of the corpus. The ranking is approximate; re-scoring the top candidates against
+    the float32 vectors (see rescore) restores it. The search method follows FAISS's signature so
+    the index can stand in for a FAISS index in FaissVectorStore.
+    """
+
+    def __init__(
+        self,
+        codes: np.ndarray,
+        precision: str,
+        norms: np.ndarray,
+        scale: Optional[np.ndarray] = None,
+        offset: Optional[np.ndarray] = None,
+    ):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported vector precision: {precision}")
+        self.codes = codes
+        self.precision = precision
+        self.norms = norms  # Squared norms of the decoded vectors
+        self.scale = scale
+        self.offset = offset
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, precision: str) -> "QuantizedIndex":
+        vectors = np.asarray(vectors, dtype=np.float32)
+        scale = offset = None
+        if precision == "float16":
+            codes = vectors.astype(np.float16)
+        elif precision == "int8":
+            offset = vectors.min(axis=0)
+            scale = (vectors.max(axis=0) - offset) / 255.0
+            scale[scale == 0] = 1.0  # Constant dimensions
+            codes = np.round((vectors - offset) / scale).astype(np.uint8)
+        else:
+            raise ValueError(f"Unsupported vector precision: {precision}")
+
+        index = cls(codes, precision, np.empty(len(codes), dtype=np.float32), scale, offset)
+        for start in range(0, len(codes), SCAN_BLOCK_ROWS):
+            block = index.decode(start, start + SCAN_BLOCK_ROWS)
+            index.norms[start:start + len(block)] = np.einsum("ij,ij->i", block, block)
+        return index
+
+    @property
+    def ntotal(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes held by the index: codes, norms and quantization parameters.
+        """
+        return sum(array.nbytes for array in (self.codes, self.norms, self.scale, self.offset) if array is not None)
+
+    def decode(self, start: int, end: int) -> np.ndarray:
+        """
+        Returns rows [start, end) as float32 vectors.
+        """
+        block = np.asarray(self.codes[start:end], dtype=np.float32)
+        if self.precision == "int8":
+            block = block * self.scale + self.offset
+        return block
+
+    def _distances(self, query: np.ndarray) -> np.ndarray:
+        if self.precision == "int8":
+            # x = offset + scale * code, so x.q = offset.q + code.(scale * q) without decoding
+            weights, bias = self.scale * query, float(self.offset @ query)
+        else:
+            weights, bias = query, 0.0
+        dots = np.empty(self.ntotal, dtype=np.float32)
+        for start in range(0, self.ntotal, SCAN_BLOCK_ROWS):
+            block = np.asarray(self.codes[start:start + SCAN_BLOCK_ROWS], dtype=np.float32)
+            dots[start:start + len(block)] = block @ weights
+        return self.norms - 2.0 * (dots + bias) + float(query @ query)
+
+    def search(self, queries: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param queries: Query vectors, shape (q, d).
+        :param n: Number of neighbours per query.
+        :return: Squared L2 distances and positions, shape (q, n), nearest first.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        n = min(n, self.ntotal)
+        all_distances = np.empty((len(queries), n), dtype=np.float32)
+        all_positions = np.empty((len(queries), n), dtype=np.int64)
+        for row, query in enumerate(queries):
+            distances = self._distances(query)
+            positions = np.argpartition(distances, n - 1)[:n] if n < self.ntotal else np.arange(self.ntotal)
+            positions = positions[np.argsort(distances[positions], kind="stable")]
+            all_distances[row], all_positions[row] = distances[positions], positions
+        return all_distances, all_positions
+
+    def save(self, path: str):
+        """
+        Writes the codes to `path` (.npy, memory-mappable) and the norms and quantization
+        parameters next to it (`path`.npz).
+        """
+        with open(path, "wb") as f:
+            np.save(f, self.codes)
+        parameters = {"norms": self.norms}
+        if self.precision == "int8":
+            parameters.update(scale=self.scale, offset=self.offset)
+        with open(path + ".npz", "wb") as f:
+            np.savez(f, precision=np.array(self.precision), **parameters)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "QuantizedIndex":
+        codes = np.load(path, mmap_mode="r" if mmap else None)
+        with np.load(path + ".npz") as parameters:
+            return cls(
+                codes,
+                str(parameters["precision"]),
+                parameters["norms"],
+                parameters["scale"] if "scale" in parameters else None,
+                parameters["offset"] if "offset" in parameters else None,
+            )
+
+
+def rescore(vectors: np.ndarray, query: np.ndarray, positions: Sequence[int], n: int) -> List[int]:
+    """
+    Re-ranks candidate positions by exact L2 distance to the query on the float32 vectors, reading
+    only the candidates' rows (cheap when `vectors` is memory-mapped).
+
+    :return: The n nearest candidates, nearest first.
+    """
+    positions = list(positions)
+    if not positions:
+        return []
+    candidates = np.asarray(vectors[positions], dtype=np.float32)
+    distances = np.sum((candidates - np.asarray(query, dtype=np.float32)) ** 2, axis=1)
+    return [positions[i] for i in np.argsort(distances, kind="stable")[:n]]
@@ -0,0 +1,135 @@
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain.schema import Document
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rough per-document overhead (objects, dict, list slot) added to the text sizes
+DOCUMENT_OVERHEAD_BYTES = 256
+
+
+def _documents_size(documents: List[Document]) -> int:
+    return sum(
+        sys.getsizeof(document.page_content)
+        + sum(sys.getsizeof(key) + sys.getsizeof(value) for key, value in document.metadata.items())
+        + DOCUMENT_OVERHEAD_BYTES
+        for document in documents
+    )
+
+
+def _copy(documents: List[Document]) -> List[Document]:
+    return [Document(page_content=document.page_content, metadata=dict(document.metadata)) for document in documents]
+
+
+class RetrievalCache:
+    """
+    In-process LRU of search results keyed by (namespace, product id, product index version, query,
+    search options), bounded by entry count and by the approximate bytes of the cached documents.
+
+    Each product has an index version that RAGService bumps whenever it writes or deletes the
+    product's vectors; entries of older versions are never read again and age out of the LRU.
+    These versions are per process, so keys also carry the store's own version of the product
+    (VectorStore.version, the index file's mtime for FAISS), which changes when any worker persists
+    it. Stores without one (Chroma) only show other workers' changes once entries expire after
+    `ttl_seconds`. Empty results are not cached, so a product indexed after a search is found at once.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, tuple]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+
+    def version(self, product_id: int) -> int:
+        with self._lock:
+            return self._versions.get(product_id, 0)
+
+    def bump_version(self, product_id: int):
+        """
+        Invalidates the product's cached results after its vectors changed.
+        """
+        with self._lock:
+            self._versions[product_id] = self._versions.get(product_id, 0) + 1
+            self._counters["invalidations"] += 1
+
+    def key(self, namespace: str, product_id: int, query: str, store_version: Optional[int] = None, **search_options: Any) -> Tuple:
+        """
+        :param namespace: Identifies the vector store and embedding model the results come from.
+        :param store_version: The vector store's version of the product, shared across processes.
+        :param search_options: k, mmr, fetch_k, lambda_mult and any filter, as passed to the search.
+        """
+        return (
+            namespace, product_id, self.version(product_id), store_version, query, tuple(sorted(search_options.items()))
+        )
+
+    def get(self, key: Tuple) -> Optional[List[Document]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            documents = entry[2]
+        # Callers may annotate the documents; keep the cached ones pristine
+        return _copy(documents)
+
+    def set(self, key: Tuple, documents: List[Document]):
+        if not documents:
+            return
+        size = _documents_size(documents)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, _copy(documents))
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+
+    def _remove(self, key: Tuple):
+        # Caller holds self._lock
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            entries, size = len(self._entries), self._bytes
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+
+retrieval_cache = RetrievalCache(
+    max_entries=settings.retrieval_cache_max_entries,
+    max_bytes=settings.retrieval_cache_max_bytes,
+    ttl_seconds=settings.retrieval_cache_ttl_seconds,
+)
@@ -0,0 +1,42 @@
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+
+class StreamingMetrics:
+    """
+    Keeps a rolling window of time-to-first-token samples for the streaming endpoints.
+    """
+
+    def __init__(self, window_size: int = 500):
+        self._samples: Dict[str, deque] = {}
+        self._window_size = window_size
+        self._lock = threading.Lock()
+
+    def record_time_to_first_token(self, endpoint: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self._window_size)).append(seconds)
+
+    @staticmethod
+    def _percentile(sorted_samples: list, percentile: float) -> Optional[float]:
+        if not sorted_samples:
+            return None
+        index = min(len(sorted_samples) - 1, int(round(percentile / 100 * (len(sorted_samples) - 1))))
+        return sorted_samples[index]
+
+    def summary(self) -> Dict[str, Dict]:
+        with self._lock:
+            snapshot = {endpoint: sorted(samples) for endpoint, samples in self._samples.items()}
+        return {
+            endpoint: {
+                "count": len(samples),
+                "time_to_first_token_p50_ms": self._percentile(samples, 50) * 1000,
+                "time_to_first_token_p95_ms": self._percentile(samples, 95) * 1000,
+                "time_to_first_token_max_ms": samples[-1] * 1000,
+            }
+            for endpoint, samples in snapshot.items()
+            if samples
+        }
+
+
+streaming_metrics = StreamingMetrics()
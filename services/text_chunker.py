@@ -0,0 +1,117 @@
+import asyncio
+import codecs
+import logging
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Tuple
+
+import tiktoken
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+# Preferred chunk boundaries, best first; a chunk is cut at the last one found in its second half
+SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+# Characters examined per chunk, per token of chunk size. Tokens average ~4 characters, so a window
+# this wide almost always holds a full chunk; when it does not, the window itself is the chunk.
+WINDOW_CHARS_PER_TOKEN = 8
+
+
+class StreamingTokenChunker:
+    """
+    Splits text into chunks of at most `chunk_tokens` tokens (tiktoken), overlapping by about
+    `overlap_tokens`, cut at paragraph, line, sentence or word boundaries where possible.
+
+    Text is consumed as a stream: only a window of a few chunks' worth of characters is tokenized at
+    a time, and input is released as soon as it has been chunked, so memory is bounded by the chunk
+    window plus one input piece rather than by the whole text. Bytes are decoded incrementally, so
+    multi-byte characters may straddle input pieces.
+    """
+
+    def __init__(self, chunk_tokens: int = 256, overlap_tokens: int = 50, encoding_name: str = "cl100k_base"):
+        if not 0 <= overlap_tokens < chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.encoding = tiktoken.get_encoding(encoding_name)
+        self.window_chars = chunk_tokens * WINDOW_CHARS_PER_TOKEN
+
+    def _encode(self, text: str) -> List[int]:
+        return self.encoding.encode(text, disallowed_special=())
+
+    def _cut(self, buffer: str, start: int, final: bool) -> Tuple[str, int]:
+        """
+        Cuts the next chunk from buffer[start:].
+        :return: The chunk and the buffer position of the following chunk.
+        """
+        window = buffer[start:start + self.window_chars]
+        tokens = self._encode(window)
+        end = len(self.encoding.decode(tokens[:self.chunk_tokens])) if len(tokens) > self.chunk_tokens else len(window)
+        end = min(end, len(window))
+        if final and end == len(window) and start + len(window) >= len(buffer):
+            return window, len(buffer)
+
+        for separator in SEPARATORS:
+            position = window.rfind(separator, end // 2, end)
+            if position > 0:
+                end = position + len(separator)
+                break
+        chunk = window[:end]
+
+        next_start = start + end
+        if self.overlap_tokens:
+            chunk_tokens = self._encode(chunk)
+            if len(chunk_tokens) > self.overlap_tokens:
+                next_start -= len(self.encoding.decode(chunk_tokens[-self.overlap_tokens:]))
+                # Start the overlap on a word boundary
+                boundary = buffer.find(" ", next_start, start + end)
+                if boundary != -1:
+                    next_start = boundary + 1
+        return chunk, max(next_start, start + 1)
+
+    def feed(self, state: Dict[str, Any], text: str, final: bool = False) -> Iterator[str]:
+        """
+        Adds text to a stream's state and yields the chunks that are complete; with final=True,
+        yields the remaining ones too. Prefer iter_chunks / iter_documents / aiter_documents.
+        """
+        buffer = state.get("buffer", "")[state.get("start", 0):] + text
+        start = 0
+        while start < len(buffer) and (final or len(buffer) - start >= self.window_chars):
+            chunk, start = self._cut(buffer, start, final)
+            chunk = chunk.strip()
+            if chunk:
+                yield chunk
+        state["buffer"], state["start"] = buffer, start
+
+    def iter_chunks(self, texts: Iterable[str]) -> Iterator[str]:
+        """
+        Yields the chunks of a text given as a sequence of pieces.
+        """
+        state: Dict[str, Any] = {}
+        for text in texts:
+            yield from self.feed(state, text)
+        yield from self.feed(state, "", final=True)
+
+    def iter_documents(self, byte_chunks: Iterable[bytes], metadata: Dict[str, Any]) -> Iterator[Document]:
+        """
+        Yields Documents (with a copy of `metadata` each) from UTF-8 bytes given as a sequence of pieces.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        texts = (decoder.decode(byte_chunk) for byte_chunk in byte_chunks)
+        for chunk in self.iter_chunks(texts):
+            yield Document(page_content=chunk, metadata=dict(metadata))
+        decoder.decode(b"", final=True)  # Raises on a truncated trailing character
+
+    async def aiter_documents(self, byte_chunks: AsyncIterable[bytes], metadata: Dict[str, Any]) -> AsyncIterator[Document]:
+        """
+        Async variant of iter_documents, e.g. for a blob download stream. Tokenizing runs in a
+        worker thread, one input piece at a time.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        state: Dict[str, Any] = {}
+        async for byte_chunk in byte_chunks:
+            text = decoder.decode(byte_chunk)
+            for chunk in await asyncio.to_thread(lambda: list(self.feed(state, text))):
+                yield Document(page_content=chunk, metadata=dict(metadata))
+        text = decoder.decode(b"", final=True)
+        for chunk in await asyncio.to_thread(lambda: list(self.feed(state, text, final=True))):
+            yield Document(page_content=chunk, metadata=dict(metadata))
@@ -0,0 +1,500 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import chromadb
+import faiss
+import numpy as np
+from langchain.schema import Document
+from langchain.vectorstores import Chroma
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+
+from config import settings
+from services.quantized_vectors import PRECISIONS, QuantizedIndex, rescore
+
+logger = logging.getLogger(__name__)
+
+# LangChain's default collection name, so existing Chroma directories keep their data
+CHROMA_COLLECTION_NAME = "langchain"
+
+
+class VectorStore(ABC):
+    """
+    Vector store used by RAGService. Chunks are written with precomputed embeddings and searched
+    with a query embedding, always within one product. Methods are blocking; RAGService calls them
+    from worker threads.
+    """
+
+    @abstractmethod
+    def upsert(self, product_id: int, ids: List[str], embeddings: List[List[float]], documents: List[Document]):
+        """
+        Writes chunks with their embeddings, replacing chunks with the same ids.
+        """
+
+    @abstractmethod
+    def delete(self, product_id: int, ids: List[str]):
+        """
+        Removes the product's chunks with these ids.
+        """
+
+    @abstractmethod
+    def search(
+        self,
+        product_id: int,
+        embedding: List[float],
+        k: int = 10,
+        mmr: bool = False,
+        fetch_k: Optional[int] = None,
+        lambda_mult: float = 0.5,
+    ) -> List[Document]:
+        """
+        :param product_id: The product whose chunks are searched.
+        :param embedding: Query embedding.
+        :param k: Number of documents to return.
+        :param mmr: Use maximal marginal relevance, trading some relevance for diversity.
+        :param fetch_k: Candidates considered by MMR (defaults to 4 * k).
+        :param lambda_mult: MMR relevance/diversity balance (1 = relevance only).
+        :return: Documents, best first.
+        """
+
+    @abstractmethod
+    def persist(self):
+        """
+        Writes pending changes to disk.
+        """
+
+    def version(self, product_id: int) -> Optional[int]:
+        """
+        Token that changes whenever any process persists the product's vectors, or None when the
+        store has no such shared state.
+        """
+        return None
+
+
+class ChromaVectorStore(VectorStore):
+    """
+    All products in one Chroma collection, searched through a product_id metadata filter. Chunks
+    are written through the chromadb collection itself, since the LangChain wrapper has no public
+    upsert that takes precomputed embeddings; `chroma` and `collection` must share a client.
+    """
+
+    def __init__(self, chroma: Chroma, collection: chromadb.Collection):
+        self.chroma = chroma
+        self.collection = collection
+
+    def upsert(self, product_id: int, ids: List[str], embeddings: List[List[float]], documents: List[Document]):
+        self.collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            documents=[doc.page_content for doc in documents],
+            metadatas=[doc.metadata for doc in documents],
+        )
+
+    def delete(self, product_id: int, ids: List[str]):
+        self.chroma.delete(ids=ids)
+
+    def search(self, product_id, embedding, k=10, mmr=False, fetch_k=None, lambda_mult=0.5) -> List[Document]:
+        search_filter = {"product_id": product_id}
+        if mmr:
+            return self.chroma.max_marginal_relevance_search_by_vector(
+                embedding, k=k, fetch_k=fetch_k or 4 * k, lambda_mult=lambda_mult, filter=search_filter
+            )
+        return self.chroma.similarity_search_by_vector(embedding, k=k, filter=search_filter)
+
+    def persist(self):
+        self.chroma.persist()
+
+
+class _ProductIndex:
+    """
+    In-memory state of one product's FAISS index: chunk ids, documents and vectors by position.
+
+    Vectors live in a buffer with spare capacity that grows geometrically, and ids and documents are
+    appended in place, so adding a batch costs time proportional to the batch rather than to the
+    product. A reader that took a snapshot under the lock (count, index) only uses positions below
+    its count, which appends never touch (a re-upserted chunk is updated in place); deletes replace
+    the lists and buffer instead of mutating them.
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.documents: List[Dict[str, Any]] = []
+        self.positions: Optional[Dict[str, int]] = None  # Chunk id -> position, built on first write
+        self.buffer: Optional[np.ndarray] = None  # Vectors by position, rows past `count` unused
+        self.count = 0
+        self.writable = False  # Whether buffer is ours to write (not a memory-mapped file)
+        self.index = None  # Built lazily from vectors after changes
+        self.index_mutable = False  # Built in this process, so new vectors can be added to it
+        self.trained_count = 0  # Vectors an IVF index was trained on
+        self.mtime: Optional[int] = None  # Of the metadata file the state was loaded from or saved to (ns)
+        self.changes: Dict[str, bool] = {}  # Chunk ids changed since then: True = upserted, False = deleted
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.changes)
+
+    @property
+    def vectors(self) -> Optional[np.ndarray]:
+        return self.buffer[:self.count] if self.buffer is not None else None
+
+    def set_vectors(self, vectors: Optional[np.ndarray], writable: bool = False):
+        self.buffer = vectors
+        self.count = 0 if vectors is None else len(vectors)
+        self.writable = writable and vectors is not None
+
+    def reserve(self, rows: int, dimension: int):
+        """
+        Makes room for `rows` more vectors, copying into a new buffer (twice the needed size) when
+        the current one is full or read-only.
+        """
+        needed = self.count + rows
+        if self.writable and len(self.buffer) >= needed:
+            return
+        buffer = np.empty((max(needed, 2 * self.count, 1024), dimension), dtype=np.float32)
+        if self.count:
+            buffer[:self.count] = self.buffer[:self.count]
+        self.buffer, self.writable = buffer, True
+
+
+class FaissVectorStore(VectorStore):
+    """
+    One FAISS index per product in `directory`, stored as three files:
+
+    - product_<id>.faiss: the index, read with IO_FLAG_MMAP so cold start does not load IVF lists
+    - product_<id>.npy: float32 vectors by position, memory-mapped; used for MMR, re-scoring and rebuilds
+    - product_<id>.json: chunk ids and documents (text and metadata) by position
+    - product_<id>.lock: flock taken by every process while loading (shared) or saving (exclusive)
+
+    The "float16" and "int8" index types replace the FAISS index with compact NumPy copies of the
+    vectors (product_<id>.codes.npy, memory-mapped, see services/quantized_vectors.py); with a
+    rescore_factor, rescore_factor * k candidates are found on them and re-ranked exactly against
+    the float32 vectors.
+
+    Searches only touch the product's own index and hold the store's lock, since changes are made
+    in place. Changes are kept in memory; new vectors are added to an index built in this process, and the index is otherwise rebuilt from the vectors on the
+    next search or persist() (IVF is retrained once the product has doubled since training). Indexes
+    written by another process are picked up when the metadata file changes on disk.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        index_type: str = "flat",
+        ivf_nlist: int = 100,
+        ivf_nprobe: int = 10,
+        hnsw_m: int = 32,
+        hnsw_ef_search: int = 64,
+        rescore_factor: int = 0,
+    ):
+        """
+        :param directory: Directory holding the per-product index files.
+        :param index_type: "flat" (exact search), "ivf", "hnsw", or "float16" / "int8" (compact NumPy vectors).
+        :param rescore_factor: Candidates per result re-scored exactly for float16 / int8 (0 disables).
+        """
+        if index_type not in ("flat", "ivf", "hnsw") + PRECISIONS:
+            raise ValueError(f"Unsupported FAISS index type: {index_type}")
+        self.directory = directory
+        self.index_type = index_type
+        self.ivf_nlist = ivf_nlist
+        self.ivf_nprobe = ivf_nprobe
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_search = hnsw_ef_search
+        self.rescore_factor = rescore_factor if index_type in PRECISIONS else 0
+        self._index_extension = "codes.npy" if index_type in PRECISIONS else "faiss"
+        self._products: Dict[int, _ProductIndex] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, product_id: int, extension: str) -> str:
+        return os.path.join(self.directory, f"product_{product_id}.{extension}")
+
+    def _get(self, product_id: int) -> _ProductIndex:
+        # Caller holds self._lock
+        entry = self._products.get(product_id)
+        if entry is not None and entry.dirty:
+            return entry
+        mtime = self._mtime(product_id)
+        if entry is None or entry.mtime != mtime:
+            if mtime is None:
+                loaded = _ProductIndex()
+            else:
+                with self._file_lock(product_id, fcntl.LOCK_SH):
+                    loaded = self._load(product_id)
+            if loaded is not None:
+                loaded.mtime = mtime
+                entry = loaded
+            elif entry is None:
+                entry = _ProductIndex()
+            self._products[product_id] = entry
+        return entry
+
+    def version(self, product_id: int) -> Optional[int]:
+        # The json file is replaced last by every persist, in any process
+        return self._mtime(product_id)
+
+    def _mtime(self, product_id: int) -> Optional[int]:
+        try:
+            return os.stat(self._path(product_id, "json")).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def _file_lock(self, product_id: int, operation: int = fcntl.LOCK_EX):
+        """
+        Per-product lock shared by every process using the directory: shared while loading the
+        files, exclusive while merging and writing them.
+        """
+        with open(self._path(product_id, "lock"), "a") as lock_file:
+            fcntl.flock(lock_file, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self, product_id: int) -> Optional[_ProductIndex]:
+        with open(self._path(product_id, "json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        vectors = np.load(self._path(product_id, "npy"), mmap_mode="r")
+        if vectors.shape[0] != len(meta["ids"]):
+            # Caught between two file replacements of a concurrent save; retried on next access
+            logger.warning(f"FAISS files of Product ID {product_id} are being rewritten; keeping the previous state.")
+            return None
+
+        entry = _ProductIndex()
+        entry.ids = meta["ids"]
+        entry.documents = meta["documents"]
+        entry.set_vectors(vectors)
+        index_path = self._path(product_id, self._index_extension)
+        if meta.get("index_type") == self.index_type and os.path.exists(index_path):
+            index = self._read_index(index_path)
+            if index.ntotal == len(entry.ids):
+                entry.index = self._configure(index)
+        logger.info(f"Loaded FAISS index of Product ID {product_id} ({len(entry.ids)} vectors).")
+        return entry
+
+    def _configure(self, index):
+        # Search-time parameters are not taken from the saved index
+        if self.index_type == "ivf":
+            ivf = faiss.extract_index_ivf(index)
+            ivf.nprobe = min(self.ivf_nprobe, ivf.nlist)
+        elif self.index_type == "hnsw":
+            index.hnsw.efSearch = self.hnsw_ef_search
+        return index
+
+    def _read_index(self, path: str):
+        if self.index_type in PRECISIONS:
+            return QuantizedIndex.load(path, mmap=True)
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP)
+
+    def _write_index(self, index, path: str):
+        if self.index_type in PRECISIONS:
+            index.save(path)
+        else:
+            faiss.write_index(index, path)
+
+    def _build(self, vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        dimension = vectors.shape[1]
+        if self.index_type in PRECISIONS:
+            return QuantizedIndex.build(vectors, self.index_type)
+        elif self.index_type == "ivf":
+            # FAISS wants ~39 training vectors per list; small products get fewer lists
+            nlist = max(1, min(self.ivf_nlist, len(vectors) // 39))
+            index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dimension), dimension, nlist)
+            index.train(vectors)
+        elif self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dimension, self.hnsw_m)
+        else:
+            index = faiss.IndexFlatL2(dimension)
+        index.add(vectors)
+        return self._configure(index)
+
+    def upsert(self, product_id: int, ids: List[str], embeddings: List[List[float]], documents: List[Document]):
+        new_vectors = np.asarray(embeddings, dtype=np.float32)
+        if not len(new_vectors):
+            return
+        stored = [{"page_content": document.page_content, "metadata": document.metadata} for document in documents]
+        with self._lock:
+            self._apply_upsert(product_id, self._get(product_id), ids, new_vectors, stored)
+
+    def _apply_upsert(self, product_id: int, entry: _ProductIndex, ids: List[str], new_vectors: np.ndarray, stored: List[Dict[str, Any]]):
+        # Caller holds self._lock
+        if entry.count and entry.buffer.shape[1] != new_vectors.shape[1]:
+            # Vectors of another embedding model; the ingestion ledger re-embeds their sources
+            logger.warning(f"Embedding dimension changed for Product ID {product_id}; dropping its old vectors.")
+            entry.changes.update((chunk_id, False) for chunk_id in entry.ids)
+            entry.ids, entry.documents, entry.positions = [], [], None
+            entry.set_vectors(None)
+            entry.index = None
+        if entry.positions is None:
+            entry.positions = {chunk_id: position for position, chunk_id in enumerate(entry.ids)}
+
+        entry.reserve(len(new_vectors), new_vectors.shape[1])
+        first_new = entry.count
+        replaced = False
+        for chunk_id, vector, document in zip(ids, new_vectors, stored):
+            position = entry.positions.get(chunk_id)
+            if position is None:
+                position = entry.count
+                entry.positions[chunk_id] = position
+                entry.ids.append(chunk_id)
+                entry.documents.append(document)
+                entry.count += 1
+            else:
+                entry.documents[position] = document
+                replaced = True
+            entry.buffer[position] = vector
+            entry.changes[chunk_id] = True
+
+        if entry.index is not None and entry.index_mutable and not replaced and not self._needs_retraining(entry):
+            entry.index.add(entry.buffer[first_new:entry.count])
+        else:
+            entry.index = None
+
+    def _needs_retraining(self, entry: _ProductIndex) -> bool:
+        # An IVF index is retrained once the product has doubled since training, so its lists stay balanced
+        return self.index_type == "ivf" and entry.count > 2 * entry.trained_count
+
+    def _ensure_index(self, entry: _ProductIndex):
+        # Caller holds self._lock
+        if entry.index is None:
+            entry.index = self._build(entry.vectors)
+            entry.index_mutable = self.index_type not in PRECISIONS
+            entry.trained_count = entry.count
+
+    def delete(self, product_id: int, ids: List[str]):
+        with self._lock:
+            self._apply_delete(self._get(product_id), ids)
+
+    def _apply_delete(self, entry: _ProductIndex, ids: List[str]):
+        # Caller holds self._lock
+        removed = set(ids)
+        keep = [position for position, chunk_id in enumerate(entry.ids) if chunk_id not in removed]
+        if len(keep) == len(entry.ids):
+            return
+        entry.changes.update((chunk_id, False) for chunk_id in entry.ids if chunk_id in removed)
+        entry.ids = [entry.ids[position] for position in keep]
+        entry.documents = [entry.documents[position] for position in keep]
+        entry.positions = None
+        entry.set_vectors(np.asarray(entry.vectors)[keep] if keep else None, writable=True)
+        entry.index = None
+
+    def _merge(self, product_id: int, entry: _ProductIndex) -> _ProductIndex:
+        """
+        Replays this process' unsaved changes on the product's files as another process left them.
+        Caller holds self._lock and the product's exclusive file lock.
+        """
+        merged = (self._load(product_id) if self._mtime(product_id) is not None else None) or _ProductIndex()
+        self._apply_delete(merged, [chunk_id for chunk_id, upserted in entry.changes.items() if not upserted])
+        if entry.positions is None:
+            entry.positions = {chunk_id: position for position, chunk_id in enumerate(entry.ids)}
+        upserted = [chunk_id for chunk_id, upserted in entry.changes.items() if upserted and chunk_id in entry.positions]
+        if upserted:
+            positions = [entry.positions[chunk_id] for chunk_id in upserted]
+            vectors = np.asarray(entry.buffer[positions], dtype=np.float32)
+            documents = [entry.documents[position] for position in positions]
+            self._apply_upsert(product_id, merged, upserted, vectors, documents)
+        logger.info(f"Merged unsaved FAISS changes of Product ID {product_id} with the index saved by another process.")
+        return merged
+
+    def search(self, product_id, embedding, k=10, mmr=False, fetch_k=None, lambda_mult=0.5) -> List[Document]:
+        query = np.asarray([embedding], dtype=np.float32)
+        # Held for the whole search: upserts add to the FAISS index and write the vector buffer and
+        # documents in place, and FAISS does not support searching an index while it is being added to
+        with self._lock:
+            entry = self._get(product_id)
+            if not entry.count:
+                return []
+            self._ensure_index(entry)
+            vectors = entry.vectors
+            wanted = min((fetch_k or 4 * k) if mmr else k, entry.count)
+            candidates = min(max(wanted, k * self.rescore_factor), entry.count)
+            _, found = entry.index.search(query, candidates)
+            positions = [int(position) for position in found[0] if position >= 0]
+            if self.rescore_factor:
+                positions = rescore(vectors, query[0], positions, wanted)
+            if mmr and positions:
+                selected = maximal_marginal_relevance(
+                    query[0], np.asarray(vectors[positions]), lambda_mult=lambda_mult, k=min(k, len(positions))
+                )
+                positions = [positions[i] for i in selected]
+            return [Document(**entry.documents[position]) for position in positions]
+
+    def persist(self):
+        """
+        Writes the changed products' index, vectors and metadata under the product's exclusive file
+        lock. When another process saved the product since it was loaded, this process' changes are
+        replayed on its files first, so concurrent writers never drop each other's vectors. Each file
+        is written to a temporary name and moved into place; the metadata file goes last since
+        readers reload on its change.
+        """
+        with self._lock:
+            for product_id, entry in list(self._products.items()):
+                if not entry.dirty:
+                    continue
+                with self._file_lock(product_id):
+                    if self._mtime(product_id) != entry.mtime:
+                        entry = self._merge(product_id, entry)
+                        self._products[product_id] = entry
+                    self._write(product_id, entry)
+
+    def _write(self, product_id: int, entry: _ProductIndex):
+        # Caller holds self._lock and the product's exclusive file lock
+        paths = {
+            extension: self._path(product_id, extension)
+            for extension in (self._index_extension, "npy", "json")
+        }
+        if not entry.ids:
+            for path in list(paths.values()) + [paths[self._index_extension] + ".npz"]:
+                if os.path.exists(path):
+                    os.remove(path)
+            entry.mtime, entry.changes = None, {}
+            return
+
+        self._ensure_index(entry)
+        index_path = paths[self._index_extension]
+        self._write_index(entry.index, index_path + ".tmp")
+        if self.index_type in PRECISIONS:
+            os.replace(index_path + ".tmp.npz", index_path + ".npz")
+        os.replace(index_path + ".tmp", index_path)
+        with open(paths["npy"] + ".tmp", "wb") as f:
+            np.save(f, np.asarray(entry.vectors, dtype=np.float32))
+        os.replace(paths["npy"] + ".tmp", paths["npy"])
+        with open(paths["json"] + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"index_type": self.index_type, "ids": entry.ids, "documents": entry.documents}, f)
+        os.replace(paths["json"] + ".tmp", paths["json"])
+        # Only the compact index stays resident; float32 rows are paged in when read
+        entry.set_vectors(np.load(paths["npy"], mmap_mode="r"))
+        entry.mtime, entry.changes = self._mtime(product_id), {}
+        logger.info(f"Saved FAISS index of Product ID {product_id} ({len(entry.ids)} vectors).")
+
+
+_faiss_stores: Dict[str, FaissVectorStore] = {}
+_faiss_stores_lock = threading.Lock()
+
+
+def get_faiss_vector_store(directory: Optional[str] = None) -> FaissVectorStore:
+    """
+    Returns the process-wide FAISS store for a directory (defaults to settings.faiss_index_directory),
+    so every RAGService shares the loaded product indexes.
+    """
+    directory = directory or settings.faiss_index_directory
+    with _faiss_stores_lock:
+        store = _faiss_stores.get(directory)
+        if store is None:
+            store = FaissVectorStore(
+                directory,
+                index_type=settings.faiss_index_type,
+                ivf_nlist=settings.faiss_ivf_nlist,
+                ivf_nprobe=settings.faiss_ivf_nprobe,
+                hnsw_m=settings.faiss_hnsw_m,
+                hnsw_ef_search=settings.faiss_hnsw_ef_search,
+                rescore_factor=settings.faiss_rescore_factor,
+            )
+            _faiss_stores[directory] = store
+        return store
@@ -160,3 +160,62 @@ CREATE TABLE UserAgentDefinitions (
 -- Modify UserAgentDefinitions table
 ALTER TABLE UserAgentDefinitions
 MODIFY COLUMN id INT AUTO_INCREMENT;
+
+-- Shared tier of the LLM response cache (llm_cache_persistent_backend = "mysql")
+CREATE TABLE LLMResponseCache (
+    cache_key CHAR(64) PRIMARY KEY,
+    response LONGTEXT NOT NULL,
+    created_at DOUBLE NOT NULL
+);
+
+-- Background evaluation jobs: failure status and stored results
+ALTER TABLE Evaluations
+MODIFY COLUMN status ENUM('START', 'IN_PROGRESS', 'COMPLETED', 'FAILED') DEFAULT 'START',
+ADD COLUMN result LONGTEXT,
+ADD COLUMN error TEXT;
+
+-- LangGraph checkpoints of evaluation workflows (workflow_checkpointer = "mysql"), thread_id = evaluation id
+CREATE TABLE WorkflowCheckpoints (
+    thread_id VARCHAR(64) NOT NULL,
+    checkpoint_ns VARCHAR(255) NOT NULL DEFAULT '',
+    checkpoint_id VARCHAR(64) NOT NULL,
+    parent_checkpoint_id VARCHAR(64),
+    type VARCHAR(32),
+    checkpoint LONGBLOB,
+    metadata_type VARCHAR(32),
+    metadata LONGBLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+
+CREATE TABLE WorkflowCheckpointWrites (
+    thread_id VARCHAR(64) NOT NULL,
+    checkpoint_ns VARCHAR(255) NOT NULL DEFAULT '',
+    checkpoint_id VARCHAR(64) NOT NULL,
+    task_id VARCHAR(64) NOT NULL,
+    idx INT NOT NULL,
+    channel VARCHAR(255) NOT NULL,
+    type VARCHAR(32),
+    value LONGBLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+
+-- Ingestion ledger: what has been embedded for each documentation source (see RAGService.load_knowledge_base)
+CREATE TABLE DocumentationSourceIngestions (
+    source_id INT PRIMARY KEY,
+    product_id INT,
+    content_hash CHAR(64) NOT NULL,
+    fingerprint VARCHAR(128),
+    embedding_model VARCHAR(512) NOT NULL,
+    chunk_ids LONGTEXT,
+    chunk_count INT DEFAULT 0,
+    ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (source_id) REFERENCES DocumentationSources(id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_product_id ON DocumentationSourceIngestions(product_id);
+
+-- Background indexing of documentation sources queued at onboarding (see services/indexing_job_runner.py)
+ALTER TABLE DocumentationSources
+ADD COLUMN indexing_status ENUM('PENDING', 'QUEUED', 'INDEXING', 'INDEXED', 'FAILED') DEFAULT 'PENDING',
+ADD COLUMN indexing_error TEXT,
+ADD COLUMN indexed_at TIMESTAMP NULL;
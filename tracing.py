@@ -0,0 +1,161 @@
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+import aiomysql
+import wrapt
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Span, Status, StatusCode
+
+from agents.utils.token_budget import is_cache_hit, reported_token_usage
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Resolves to the configured provider once setup_tracing() has run, and is a no-op before that
+tracer = trace.get_tracer("evaluation-service")
+
+# Set when tracing_exporter is "memory"; tests read finished spans from it
+in_memory_exporter: Optional[InMemorySpanExporter] = None
+
+_tracing_configured = False
+
+
+def _build_span_processor():
+    global in_memory_exporter
+    exporter_name = settings.tracing_exporter.lower()
+    if exporter_name == "console":
+        return SimpleSpanProcessor(ConsoleSpanExporter())
+    elif exporter_name == "memory":
+        in_memory_exporter = InMemorySpanExporter()
+        return SimpleSpanProcessor(in_memory_exporter)
+    elif exporter_name == "otlp":
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        return BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint))
+    else:
+        raise ValueError(f"Unsupported tracing exporter: {settings.tracing_exporter}")
+
+
+def instrument_app(app):
+    """
+    Adds a span per route to the FastAPI app. Only wraps the app, so it is safe at import time in
+    the gunicorn master: the spans go through the global tracer provider, which setup_tracing()
+    installs later in each worker.
+    """
+    if settings.tracing_exporter.lower() == "none":
+        return
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    FastAPIInstrumentor.instrument_app(app)
+
+
+def setup_tracing():
+    """
+    Installs the tracer provider with the exporter selected by settings.tracing_exporter
+    ("none", "console", "otlp" or "memory") and instruments aiomysql queries. Does nothing when
+    tracing is disabled or already set up. Call it per process after the fork (the OTLP exporter's
+    gRPC channel cannot be shared with forked workers).
+    """
+    global _tracing_configured
+    if settings.tracing_exporter.lower() == "none" or _tracing_configured:
+        return
+
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.tracing_service_name}))
+    provider.add_span_processor(_build_span_processor())
+    trace.set_tracer_provider(provider)
+    _instrument_aiomysql()
+    _tracing_configured = True
+    logger.info(f"Tracing enabled with the {settings.tracing_exporter} exporter.")
+
+
+def shutdown_tracing():
+    """
+    Flushes pending spans.
+    """
+    provider = trace.get_tracer_provider()
+    if isinstance(provider, TracerProvider):
+        provider.shutdown()
+
+
+@contextmanager
+def start_span(name: str, **attributes: Any):
+    """
+    Starts a span as the current span, recording an exception raised inside the block as an error:
+
+        with start_span("blob.download", **{"blob.url": url}) as span:
+            data = ...
+            span.set_attribute("blob.bytes", len(data))
+    """
+    with tracer.start_as_current_span(name, attributes=attributes) as span:
+        yield span
+
+
+async def _traced_execute(wrapped, instance, args, kwargs):
+    query = args[0] if args else kwargs.get("query", "")
+    with tracer.start_as_current_span(
+        "mysql.query",
+        kind=trace.SpanKind.CLIENT,
+        attributes={"db.system": "mysql", "db.name": settings.mysql_db, "db.statement": " ".join(str(query).split())},
+    ) as span:
+        result = await wrapped(*args, **kwargs)
+        span.set_attribute("db.rows", instance.rowcount)
+        return result
+
+
+def _instrument_aiomysql():
+    # Every cursor class (including DictCursor) inherits Cursor.execute, so this covers all
+    # repository queries regardless of the connection they were issued on.
+    wrapt.wrap_function_wrapper(aiomysql.cursors, "Cursor.execute", _traced_execute)
+
+
+class LLMTracingCallback(BaseCallbackHandler):
+    """
+    Callback attached to every pooled chat model; opens a span per model call as a child of the
+    caller's current span (e.g. the workflow node) and records the call's token usage on it.
+    """
+
+    # Run in the caller's context so the current span is the parent
+    run_inline = True
+
+    def __init__(self):
+        self._spans: Dict[UUID, Span] = {}
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], *, run_id: UUID, **kwargs: Any
+    ):
+        invocation_params = kwargs.get("invocation_params") or {}
+        model_name = invocation_params.get("model_name") or invocation_params.get("model") or "unknown"
+        self._spans[run_id] = tracer.start_span(
+            "llm.ainvoke",
+            kind=trace.SpanKind.CLIENT,
+            attributes={"llm.model": model_name, "llm.messages": sum(len(batch) for batch in messages)},
+        )
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        span.set_attribute("llm.cache_hit", is_cache_hit(response))
+        usage = reported_token_usage(response)
+        if usage is not None:
+            span.set_attribute("llm.prompt_tokens", usage[0])
+            span.set_attribute("llm.completion_tokens", usage[1])
+        span.end()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        span.record_exception(error)
+        span.set_status(Status(StatusCode.ERROR, str(error)))
+        span.end()
+
+
+llm_tracing_callback = LLMTracingCallback()
@@ -0,0 +1,258 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+
+from config import settings
+from database import PooledConnection
+
+logger = logging.getLogger(__name__)
+
+
+class SQLCheckpointSaver(BaseCheckpointSaver, ABC):
+    """
+    LangGraph checkpoint saver storing checkpoints and pending writes in the WorkflowCheckpoints and
+    WorkflowCheckpointWrites tables, one thread per evaluation (thread_id = evaluation id).
+
+    Queries are written with %s placeholders and REPLACE INTO, which both MySQL and SQLite accept;
+    subclasses only provide query execution. Only the async API is implemented since the workflow
+    is always run with ainvoke.
+    """
+
+    @abstractmethod
+    async def _execute(self, query: str, params_list: List[tuple]):
+        """
+        Runs a write query once per parameter tuple.
+        """
+
+    @abstractmethod
+    async def _fetchall(self, query: str, params: tuple) -> List[tuple]:
+        """
+        Runs a read query and returns its rows.
+        """
+
+    @staticmethod
+    def _thread_config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+
+    async def _load_tuple(self, row: tuple) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata_type, metadata = row
+        writes = await self._fetchall(
+            "SELECT task_id, channel, type, value FROM WorkflowCheckpointWrites "
+            "WHERE thread_id = %s AND checkpoint_ns = %s AND checkpoint_id = %s ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        )
+        return CheckpointTuple(
+            config=self._thread_config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                self._thread_config(thread_id, checkpoint_ns, parent_checkpoint_id)
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, channel, value_type, value in writes
+            ],
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = config["configurable"]
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = configurable.get("checkpoint_id")
+
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            "metadata_type, metadata FROM WorkflowCheckpoints WHERE thread_id = %s AND checkpoint_ns = %s"
+        )
+        params: tuple = (thread_id, checkpoint_ns)
+        if checkpoint_id:
+            query += " AND checkpoint_id = %s"
+            params += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+
+        rows = await self._fetchall(query, params)
+        return await self._load_tuple(rows[0]) if rows else None
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            "metadata_type, metadata FROM WorkflowCheckpoints"
+        )
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = %s")
+            params.append(str(config["configurable"]["thread_id"]))
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                clauses.append("checkpoint_ns = %s")
+                params.append(checkpoint_ns)
+        if before is not None:
+            clauses.append("checkpoint_id < %s")
+            params.append(before["configurable"]["checkpoint_id"])
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        returned = 0
+        for row in await self._fetchall(query, tuple(params)):
+            checkpoint_tuple = await self._load_tuple(row)
+            if filter and any(checkpoint_tuple.metadata.get(key) != value for key, value in filter.items()):
+                continue
+            yield checkpoint_tuple
+            returned += 1
+            if limit is not None and returned >= limit:
+                break
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        configurable = config["configurable"]
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        type_, serialized_checkpoint = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(metadata)
+        await self._execute(
+            "REPLACE INTO WorkflowCheckpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata_type, metadata) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+            [(
+                thread_id,
+                checkpoint_ns,
+                checkpoint["id"],
+                configurable.get("checkpoint_id"),
+                type_,
+                serialized_checkpoint,
+                metadata_type,
+                serialized_metadata,
+            )],
+        )
+        logger.debug("Saved checkpoint %s for thread %s", checkpoint["id"], thread_id)
+        return self._thread_config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+    ) -> None:
+        configurable = config["configurable"]
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = configurable["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, serialized_value = self.serde.dumps_typed(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, value_type, serialized_value))
+        if rows:
+            await self._execute(
+                "REPLACE INTO WorkflowCheckpointWrites (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, "
+                "channel, type, value) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                rows,
+            )
+
+
+class MySQLCheckpointSaver(SQLCheckpointSaver):
+    """
+    Checkpoint saver backed by the shared aiomysql pool. Each operation borrows a connection only
+    for the duration of its queries.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.db = PooledConnection()
+
+    async def _execute(self, query: str, params_list: List[tuple]):
+        async with self.db.cursor() as cur:
+            for params in params_list:
+                await cur.execute(query, params)
+
+    async def _fetchall(self, query: str, params: tuple) -> List[tuple]:
+        async with self.db.cursor() as cur:
+            await cur.execute(query, params)
+            return list(await cur.fetchall())
+
+
+class SQLiteCheckpointSaver(SQLCheckpointSaver):
+    """
+    Local stand-in for MySQLCheckpointSaver (tests, development) using a SQLite file or ":memory:".
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS WorkflowCheckpoints ("
+        "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL DEFAULT '', checkpoint_id TEXT NOT NULL, "
+        "parent_checkpoint_id TEXT, type TEXT, checkpoint BLOB, metadata_type TEXT, metadata BLOB, "
+        "PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id))",
+        "CREATE TABLE IF NOT EXISTS WorkflowCheckpointWrites ("
+        "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL DEFAULT '', checkpoint_id TEXT NOT NULL, "
+        "task_id TEXT NOT NULL, idx INTEGER NOT NULL, channel TEXT NOT NULL, type TEXT, value BLOB, "
+        "PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx))",
+    )
+
+    def __init__(self, path: str = ":memory:"):
+        super().__init__()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            for statement in self.SCHEMA:
+                self.conn.execute(statement)
+            self.conn.commit()
+
+    def _run(self, query: str, params_list: List[tuple], fetch: bool):
+        query = query.replace("%s", "?")
+        with self._lock:
+            if fetch:
+                return self.conn.execute(query, params_list[0]).fetchall()
+            self.conn.executemany(query, params_list)
+            self.conn.commit()
+
+    async def _execute(self, query: str, params_list: List[tuple]):
+        await asyncio.to_thread(self._run, query, params_list, False)
+
+    async def _fetchall(self, query: str, params: tuple) -> List[tuple]:
+        return await asyncio.to_thread(self._run, query, [params], True)
+
+
+def create_checkpointer() -> Optional[BaseCheckpointSaver]:
+    """
+    Builds the checkpoint saver selected by settings.workflow_checkpointer.
+    """
+    backend = settings.workflow_checkpointer.lower()
+    if backend == "none":
+        return None
+    elif backend == "mysql":
+        return MySQLCheckpointSaver()
+    elif backend == "sqlite":
+        return SQLiteCheckpointSaver(settings.workflow_checkpoint_sqlite_path)
+    else:
+        raise ValueError(f"Unsupported workflow checkpointer: {settings.workflow_checkpointer}")
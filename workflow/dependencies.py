@@ -0,0 +1,17 @@
+from typing import Any
+from langchain_core.runnables import RunnableConfig
+
+
+def get_dependency(config: RunnableConfig, name: str) -> Any:
+    """
+    Returns a per-run dependency (agent, RAGService, ...) passed to the compiled graph through
+    config["configurable"], so the graph itself can be compiled once and shared between runs.
+
+    :param config: Run config handed to the node by LangGraph.
+    :param name: Name of the dependency.
+    :return: The dependency object.
+    """
+    try:
+        return config["configurable"][name]
+    except (KeyError, TypeError):
+        raise ValueError(f"Workflow dependency '{name}' was not provided in the run config.")
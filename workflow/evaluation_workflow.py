@@ -1,22 +1,15 @@
 import asyncio
-from typing import Dict, Optional
-from langgraph.graph import StateGraph
+from typing import Dict, List, Optional
 import logging
 
 from workflow.state import EvaluationState
-from workflow.nodes.define_scope_node import DefineScopeNode
-from workflow.nodes.fetch_product_info_node import FetchProductInfoNode
-from workflow.nodes.simulate_user_interaction_node import InteractionSimulationNode
-from workflow.nodes.features_suggestion_prioritization import FeatureSuggestionPrioritizationNode
-from workflow.nodes.technical_feasibility_assessment import TechnicalFeasibilityAssessmentNode
-from workflow.nodes.final_report_generation import FinalReportGenerationNode
-from workflow.nodes.ai_feature_ideation_node import AIFeatureIdeationNode
+from workflow.graph_registry import evaluation_graph_registry
 
 from agents.product_manager_agent import ProductManagerAgent
-from agents.user_agent import UserAgent
 from agents.ai_features_ideation_agent import AIFeatureIdeationAgent
 from agents.developer_agent import DeveloperAgent
 
+from agents.utils.llm_cache import no_llm_cache
 from services.RAGService import RAGService
 from models.Evaluation import Evaluation
 
@@ -27,77 +20,106 @@ async def run_evaluation_workflow(
     evaluation_type: str,
     rag_service: RAGService,
     product_manager_agent: ProductManagerAgent,
-    user_agent: UserAgent,
+    personas: List[Dict],
     ai_feature_ideation_agent: AIFeatureIdeationAgent,
     developer_agent: DeveloperAgent
 ) -> Optional[Dict]:
     """
-    Runs the evaluation workflow using LangGraph.
+    Runs the evaluation workflow using LangGraph. Every persona is simulated concurrently in a
+    single run; the other steps run once on the merged pain points.
+    The graph is compiled once per evaluation type; this run's agents and RAGService are
+    passed to the nodes through the run config.
+
+    :param personas: Persona definitions as {"id", "name", "characteristics"} dicts.
     """
-    # Initialize workflow with state_schema
-    workflow = StateGraph(state_schema=EvaluationState)
-
-    # Instantiate node classes
-    define_scope = DefineScopeNode()
-    fetch_product_info = FetchProductInfoNode(rag_service)
-    interaction_simulation = InteractionSimulationNode(user_agent)
-    ai_feature_ideation = AIFeatureIdeationNode(ai_feature_ideation_agent)
-    feature_suggestion_prioritization = FeatureSuggestionPrioritizationNode(product_manager_agent)
-    technical_feasibility_assessment = TechnicalFeasibilityAssessmentNode(developer_agent)
-    final_report_generation = FinalReportGenerationNode(product_manager_agent)
-
-    # Add nodes to the workflow
-    workflow.add_node("define_scope", define_scope)
-    workflow.add_node("fetch_product_info", fetch_product_info)
-    workflow.add_node("interaction_simulation", interaction_simulation)
-    workflow.add_node("ai_feature_ideation", ai_feature_ideation)
-    workflow.add_node("feature_suggestion_prioritization", feature_suggestion_prioritization)
-    workflow.add_node("technical_feasibility_assessment", technical_feasibility_assessment)
-    workflow.add_node("final_report_generation", final_report_generation)
-
-    # Set entry and finish points
-    workflow.set_entry_point("define_scope")  # Set entry point
-    workflow.set_finish_point("final_report_generation")  # Set finish point
-
-    # Define edges
-    workflow.add_edge("define_scope", "fetch_product_info")
-    workflow.add_edge("fetch_product_info", "interaction_simulation")
-    workflow.add_edge("interaction_simulation", "ai_feature_ideation")
-    workflow.add_edge("ai_feature_ideation", "feature_suggestion_prioritization")
-    workflow.add_edge("feature_suggestion_prioritization", "technical_feasibility_assessment")
-    workflow.add_edge("technical_feasibility_assessment", "final_report_generation")
+    compiled_workflow = evaluation_graph_registry.get()
 
     # Initialize state
     initial_state: EvaluationState = {
-        "evaluation": evaluation,
+        "evaluation_id": evaluation.id,
+        "personas": personas,
         "evaluation_type": evaluation_type,
-        "user_agent": user_agent,
-        "rag_service": rag_service,
-        "ai_feature_ideation_agent": ai_feature_ideation_agent,
-        "developer_agent": developer_agent,
-        "product_manager_agent": product_manager_agent,
         "evaluation_scope": evaluation_type,
         "product_info": "",
         "interaction_result": {},
+        "interaction_results": [],
         "ideated_features": [],
         "prioritized_features": [],
-        "feasibility_reports": {},
+        "feasibility_reports": [],
         "final_report": "",
+        "token_usage": {},
         "product_id": evaluation.product_id
     }
 
-    # Compile the workflow
-    compiled_workflow = workflow.compile()
-
-    try:
-        # Save the graph to a file for debugging
-        graph_image_path = "workflow_graph.png"  # Specify the file path
-        compiled_workflow.get_graph().draw_mermaid_png(graph_image_path)  # Save the graph as an image
-        logger.info("Workflow graph saved to %s", graph_image_path)
-    except Exception as e:
-        logger.warning("Could not save workflow graph. Error: %s", str(e))
+    config = build_run_config(
+        evaluation.id, rag_service, product_manager_agent, ai_feature_ideation_agent, developer_agent
+    )
 
-    final_state = await compiled_workflow.ainvoke(initial_state)
+    final_state = await compiled_workflow.ainvoke(initial_state, config=config)
     logger.info("Workflow finished successfully for Evaluation ID: %s", evaluation.id)
     logger.debug(f"Final Report: {final_state.get('final_report')}")
-    return final_state
\ No newline at end of file
+    return final_state
+
+
+def build_run_config(
+    evaluation_id: int,
+    rag_service: RAGService,
+    product_manager_agent: ProductManagerAgent,
+    ai_feature_ideation_agent: AIFeatureIdeationAgent,
+    developer_agent: DeveloperAgent
+) -> Dict:
+    """
+    Builds the run config: the evaluation id is the checkpointer thread, and the per-run
+    dependencies are passed to the nodes without being checkpointed.
+    """
+    return {
+        "configurable": {
+            "thread_id": str(evaluation_id),
+            "rag_service": rag_service,
+            "product_manager_agent": product_manager_agent,
+            "ai_feature_ideation_agent": ai_feature_ideation_agent,
+            "developer_agent": developer_agent,
+        }
+    }
+
+
+async def get_checkpointed_state(evaluation_id: int) -> Optional[Dict]:
+    """
+    Returns the last checkpointed state of an evaluation's workflow, or None if checkpointing
+    is disabled or the evaluation has no checkpoint.
+    """
+    checkpointer = evaluation_graph_registry.checkpointer
+    if checkpointer is None:
+        return None
+    checkpoint_tuple = await checkpointer.aget_tuple({"configurable": {"thread_id": str(evaluation_id)}})
+    if checkpoint_tuple is None:
+        return None
+    return checkpoint_tuple.checkpoint["channel_values"]
+
+
+async def resume_evaluation_workflow(
+    evaluation_id: int,
+    rag_service: RAGService,
+    product_manager_agent: ProductManagerAgent,
+    ai_feature_ideation_agent: AIFeatureIdeationAgent,
+    developer_agent: DeveloperAgent
+) -> Optional[Dict]:
+    """
+    Resumes an evaluation's workflow from its last checkpoint: completed nodes are not run
+    again, the node that failed and the ones after it are. The LLM response cache is bypassed,
+    since a node that failed on an unusable response would otherwise get the same response back.
+    """
+    checkpointed_state = await get_checkpointed_state(evaluation_id)
+    if checkpointed_state is None:
+        raise ValueError(f"No checkpoint found for evaluation ID: {evaluation_id}")
+
+    compiled_workflow = evaluation_graph_registry.get()
+    config = build_run_config(
+        evaluation_id, rag_service, product_manager_agent, ai_feature_ideation_agent, developer_agent
+    )
+
+    logger.info("Resuming workflow for Evaluation ID: %s", evaluation_id)
+    with no_llm_cache():
+        final_state = await compiled_workflow.ainvoke(None, config=config)
+    logger.info("Workflow finished successfully for Evaluation ID: %s", evaluation_id)
+    return final_state
@@ -0,0 +1,101 @@
+import logging
+import threading
+from typing import Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.graph import StateGraph
+from langgraph.graph.state import CompiledStateGraph
+
+from workflow.state import EvaluationState
+from workflow.node_instrumentation import InstrumentedNode
+from workflow.nodes.define_scope_node import DefineScopeNode
+from workflow.nodes.fetch_product_info_node import FetchProductInfoNode
+from workflow.nodes.simulate_user_interaction_node import InteractionSimulationNode
+from workflow.nodes.features_suggestion_prioritization import FeatureSuggestionPrioritizationNode
+from workflow.nodes.technical_feasibility_assessment import TechnicalFeasibilityAssessmentNode
+from workflow.nodes.final_report_generation import FinalReportGenerationNode
+from workflow.nodes.ai_feature_ideation_node import AIFeatureIdeationNode
+
+logger = logging.getLogger(__name__)
+
+
+def build_evaluation_graph() -> StateGraph:
+    """
+    Builds the (uncompiled) evaluation graph. Every evaluation type runs the same graph; the type
+    only reaches the nodes through state["evaluation_type"]. Nodes hold no per-run state; agents
+    and the RAGService reach them through the run config. Every node records its token usage in
+    state["token_usage"] and runs in its own trace span.
+
+    :return: StateGraph ready to be compiled.
+    """
+    # Initialize workflow with state_schema
+    workflow = StateGraph(state_schema=EvaluationState)
+
+    # Add nodes to the workflow
+    workflow.add_node("define_scope", InstrumentedNode("define_scope", DefineScopeNode()))
+    workflow.add_node("fetch_product_info", InstrumentedNode("fetch_product_info", FetchProductInfoNode()))
+    workflow.add_node("interaction_simulation", InstrumentedNode("interaction_simulation", InteractionSimulationNode()))
+    workflow.add_node("ai_feature_ideation", InstrumentedNode("ai_feature_ideation", AIFeatureIdeationNode()))
+    workflow.add_node("feature_suggestion_prioritization", InstrumentedNode("feature_suggestion_prioritization", FeatureSuggestionPrioritizationNode()))
+    workflow.add_node("technical_feasibility_assessment", InstrumentedNode("technical_feasibility_assessment", TechnicalFeasibilityAssessmentNode()))
+    workflow.add_node("final_report_generation", InstrumentedNode("final_report_generation", FinalReportGenerationNode()))
+
+    # Set entry and finish points
+    workflow.set_entry_point("define_scope")
+    workflow.set_finish_point("final_report_generation")
+
+    # Define edges
+    workflow.add_edge("define_scope", "fetch_product_info")
+    workflow.add_edge("fetch_product_info", "interaction_simulation")
+    workflow.add_edge("interaction_simulation", "ai_feature_ideation")
+    workflow.add_edge("ai_feature_ideation", "feature_suggestion_prioritization")
+    workflow.add_edge("feature_suggestion_prioritization", "technical_feasibility_assessment")
+    workflow.add_edge("technical_feasibility_assessment", "final_report_generation")
+
+    return workflow
+
+
+class EvaluationGraphRegistry:
+    """
+    Compiles the evaluation graph once per process and hands out the compiled graph. When a
+    checkpointer is configured, the graph is compiled with it so the state is saved after every
+    node under the run's thread_id (the evaluation id) and failed runs can be resumed.
+    """
+
+    def __init__(self, checkpointer: Optional[BaseCheckpointSaver] = None):
+        self.checkpointer = checkpointer
+        self._graph: Optional[CompiledStateGraph] = None
+        self._lock = threading.Lock()
+
+    def configure(self, checkpointer: Optional[BaseCheckpointSaver]):
+        """
+        Sets the checkpointer the graph is compiled with, dropping a graph compiled without it.
+        Called from the app lifespan so the checkpointer's connection is opened in the worker process.
+        """
+        with self._lock:
+            self.checkpointer = checkpointer
+            self._graph = None
+
+    def get(self) -> CompiledStateGraph:
+        """
+        Returns the compiled graph, compiling it on first use.
+        """
+        with self._lock:
+            if self._graph is None:
+                logger.info("Compiling evaluation graph")
+                self._graph = build_evaluation_graph().compile(checkpointer=self.checkpointer)
+            return self._graph
+
+    def warm_up(self):
+        self.get()
+        logger.info("Evaluation graph compiled")
+
+    def draw_mermaid(self) -> str:
+        """
+        Renders the graph as Mermaid source locally, without calling a remote rendering service.
+        """
+        return self.get().get_graph().draw_mermaid()
+
+
+# The checkpointer is configured in the app lifespan (see main.py)
+evaluation_graph_registry = EvaluationGraphRegistry()
@@ -0,0 +1,42 @@
+import inspect
+import logging
+from typing import Any, Callable, Dict
+
+from langchain_core.runnables import RunnableConfig
+
+from agents.utils.token_budget import track_token_usage
+from tracing import start_span
+from workflow.state import EvaluationState
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedNode:
+    """
+    Wraps a workflow node so it runs in its own trace span, and the prompt and completion tokens
+    of its LLM calls, along with its token budget outcome, are recorded under
+    state["token_usage"][name] and on the span.
+    """
+
+    def __init__(self, name: str, node: Callable):
+        self.name = name
+        self.node = node
+        self._accepts_config = "config" in inspect.signature(node.__call__).parameters
+
+    async def __call__(self, state: EvaluationState, config: RunnableConfig) -> Dict[str, Any]:
+        with start_span(f"workflow.node {self.name}", **{"workflow.node": self.name}) as span:
+            with track_token_usage() as usage:
+                if self._accepts_config:
+                    result = await self.node(state, config)
+                else:
+                    result = await self.node(state)
+
+            node_usage = usage.as_dict()
+            span.set_attribute("llm.calls", node_usage["calls"])
+            span.set_attribute("llm.cached_calls", node_usage["cached_calls"])
+            span.set_attribute("llm.prompt_tokens", node_usage["prompt_tokens"])
+            span.set_attribute("llm.completion_tokens", node_usage["completion_tokens"])
+
+        logger.debug(f"Token usage for node {self.name}: {node_usage}")
+        result["token_usage"] = {**(state.get("token_usage") or {}), self.name: node_usage}
+        return result
@@ -1,15 +1,17 @@
 import logging
 from typing import Dict, List
 from workflow.state import EvaluationState
+from langchain_core.runnables import RunnableConfig
 from agents.ai_features_ideation_agent import AIFeatureIdeationAgent
+from workflow.dependencies import get_dependency
+from agents.utils.token_budget import TokenBudget, record_budget
+from workflow.retrieval import retrieve_for_node
 
 logger = logging.getLogger(__name__)
 
 class AIFeatureIdeationNode:
-    def __init__(self, ai_feature_ideation_agent: AIFeatureIdeationAgent):
-        self.ai_feature_ideation_agent = ai_feature_ideation_agent
-
-    async def __call__(self, state: EvaluationState) -> EvaluationState:
+    async def __call__(self, state: EvaluationState, config: RunnableConfig) -> EvaluationState:
+        ai_feature_ideation_agent: AIFeatureIdeationAgent = get_dependency(config, "ai_feature_ideation_agent")
         interaction_result = state.get("interaction_result", {})
         pain_points: List[str] = interaction_result.get("pain_points", [])
         product_info: str = state.get("product_info", "")
@@ -24,9 +26,21 @@ class AIFeatureIdeationNode:
             state["ideated_features"] = []
             return state
 
+        # Pain points are kept first (in the order they were reported); product info gets the rest
+        budget = TokenBudget.for_node("ai_feature_ideation")
+        pain_points = budget.select(pain_points)
+
+        # Documentation relevant to each pain point, searched concurrently, goes ahead of the general product info
+        pain_point_docs = await retrieve_for_node(
+            get_dependency(config, "rag_service"), "ai_feature_ideation", state.get("product_id"), pain_points
+        )
+        relevant_chunks = [doc.page_content for doc in pain_point_docs if doc.page_content not in product_info]
+        product_info = budget.truncate("\n".join(relevant_chunks + [product_info]))
+        record_budget(budget)
+
         logger.debug(f"Starting AI Feature Ideation Node with product_info: {product_info}")
 
-        ideated_features = await self.ai_feature_ideation_agent.ideate_features(pain_points, product_info)
+        ideated_features = await ai_feature_ideation_agent.ideate_features(pain_points, product_info)
         logger.debug(f"Ideated features: {ideated_features}")
 
         state["ideated_features"] = ideated_features
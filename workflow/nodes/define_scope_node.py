@@ -11,11 +11,11 @@ class DefineScopeNode:
         pass
 
     async def __call__(self, state: EvaluationState) -> Dict:
-        evaluation = state["evaluation"]
+        evaluation_id = state["evaluation_id"]
         evaluation_type = state["evaluation_type"]
         
         # Log evaluation details
-        logging.debug(f"Starting evaluation with ID: {evaluation.id}, Type: {evaluation_type}")
+        logging.debug(f"Starting evaluation with ID: {evaluation_id}, Type: {evaluation_type}")
         
         # Directly assign evaluation_scope from evaluation_type
         evaluation_scope = evaluation_type
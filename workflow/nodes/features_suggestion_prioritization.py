@@ -1,15 +1,16 @@
 import logging
 from typing import Dict, List
 from workflow.state import EvaluationState
+from langchain_core.runnables import RunnableConfig
 from agents.product_manager_agent import ProductManagerAgent
+from workflow.dependencies import get_dependency
+from agents.utils.token_budget import TokenBudget, record_budget
 
 logger = logging.getLogger(__name__)
 
 class FeatureSuggestionPrioritizationNode:
-    def __init__(self, product_manager_agent: ProductManagerAgent):
-        self.product_manager_agent = product_manager_agent
-
-    async def __call__(self, state: EvaluationState) -> EvaluationState:
+    async def __call__(self, state: EvaluationState, config: RunnableConfig) -> EvaluationState:
+        product_manager_agent: ProductManagerAgent = get_dependency(config, "product_manager_agent")
         ideated_features: List[Dict] = state.get("ideated_features", [])
         pain_points: List[str] = state.get("interaction_result", {}).get("pain_points", [])
         user_feedback: Dict = state.get("interaction_result", {}).get("user_feedback", {})
@@ -19,7 +20,16 @@ class FeatureSuggestionPrioritizationNode:
             state["prioritized_features"] = []
             return state
 
-        prioritized_features = await self.product_manager_agent.prioritize_features(
+        # Features are rendered as in the prioritization prompt; pain points and feedback get the rest
+        budget = TokenBudget.for_node("feature_suggestion_prioritization")
+        ideated_features = budget.select(
+            ideated_features, render=lambda feature: f"- {feature.get('feature_name')}: {feature.get('description')}"
+        )
+        pain_points = budget.select(pain_points, render=lambda point: f"- {point}")
+        user_feedback = dict(budget.select(list(user_feedback.items()), render=lambda item: f"- {item[0]}: {item[1]}"))
+        record_budget(budget)
+
+        prioritized_features = await product_manager_agent.prioritize_features(
             features=ideated_features,
             pain_points=pain_points,
             user_feedback=user_feedback
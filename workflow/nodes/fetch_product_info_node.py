@@ -1,42 +1,31 @@
 from typing import Dict
-from services.RAGService import RAGService
+from langchain_core.runnables import RunnableConfig
+from services.RAGService import RAGService, DEFAULT_PRODUCT_QUERY
+from workflow.retrieval import retrieve_for_node
+from workflow.dependencies import get_dependency
 from workflow.state import EvaluationState
+from agents.utils.token_budget import TokenBudget, record_budget
 import logging
 import asyncio
 
 logger = logging.getLogger(__name__)
 
 class FetchProductInfoNode:
-    def __init__(self, rag_service: RAGService):
-        """
-        Initializes the FetchProductInfoNode with an instance of RAGService.
-        
-        :param rag_service: Instance of RAGService for retrieval operations.
-        """
-        self.rag_service = rag_service
-        self._knowledge_base_loaded = False  # Flag to prevent multiple loadings
+    """
+    Retrieves product information through the run's RAGService, which is passed in the run config
+    because the compiled graph, and therefore this node instance, is shared between runs. Reads the
+    index built when the product's sources were onboarded.
+    """
 
-    async def _load_knowledge_base_if_needed(self, product_id: int):
-        """
-        Loads the knowledge base by downloading and chunking documents for the given product_id if not already loaded.
-        
-        :param product_id: The product ID for which to load the knowledge base.
-        """
-        if not self._knowledge_base_loaded:
-            logger.debug(f"Loading knowledge base for Product ID: {product_id}...")
-            await self.rag_service.load_knowledge_base(product_id=product_id)
-            self._knowledge_base_loaded = True
-            logger.debug("Knowledge base loaded successfully.")
-        else:
-            logger.debug("Knowledge base already loaded. Skipping re-load.")
-
-    async def __call__(self, state: EvaluationState) -> Dict:
+    async def __call__(self, state: EvaluationState, config: RunnableConfig) -> Dict:
         """
         Executes the node to fetch product information based on the provided EvaluationState.
         
         :param state: The current evaluation state containing the product_id.
+        :param config: Run config carrying the RAGService.
         :return: Updated EvaluationState with fetched product_info.
         """
+        rag_service: RAGService = get_dependency(config, "rag_service")
         product_id = state.get("product_id")
         if not product_id:
             logger.error("Product ID not found in state.")
@@ -44,16 +33,26 @@ class FetchProductInfoNode:
 
         logger.debug(f"Fetching product info for Product ID: {product_id}")
 
-        # Ensure the knowledge base is loaded for the specific product
-        await self._load_knowledge_base_if_needed(product_id)
-
-        # Retrieve relevant product documents
-        product_info_docs = await self.rag_service.get_documents_by_product_id(product_id)
+        # Sources are indexed in the background when they are onboarded, so the index is only read here.
+        # Retrieve the product's documents for a general overview and for the evaluation scope
+        product_info_docs = await retrieve_for_node(
+            rag_service, "fetch_product_info", product_id,
+            [DEFAULT_PRODUCT_QUERY, state.get("evaluation_scope")]
+        )
         if not product_info_docs:
             logger.warning(f"No documents found for Product ID: {product_id}")
             state["product_info"] = "No product information available."
         else:
-            product_info = "\n".join([doc.page_content for doc in product_info_docs])
+            # Keep the best-ranked chunks that fit the token budget; cut the top chunk if none fits
+            budget = TokenBudget.for_node("fetch_product_info")
+            chunks = budget.select([doc.page_content for doc in product_info_docs])
+            if not chunks:
+                chunks = [budget.truncate(product_info_docs[0].page_content)]
+            record_budget(budget)
+            if budget.trimmed:
+                logger.info(f"Product info for Product ID {product_id} trimmed to its token budget: {budget.summary()}")
+
+            product_info = "\n".join(chunks)
             state["product_info"] = product_info
             logger.debug("Product info fetched successfully.")
 
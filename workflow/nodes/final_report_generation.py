@@ -1,26 +1,34 @@
 import logging
 from typing import Dict
 from workflow.state import EvaluationState
+from langchain_core.runnables import RunnableConfig
 from agents.product_manager_agent import ProductManagerAgent  # Corrected import
+from workflow.dependencies import get_dependency
+from agents.utils.token_budget import TokenBudget, record_budget
 
 logger = logging.getLogger(__name__)
 
 class FinalReportGenerationNode:
-    def __init__(self, product_manager_agent: ProductManagerAgent):
-        self.product_manager_agent = product_manager_agent
-
-    async def __call__(self, state: EvaluationState) -> Dict:
-        feasibility_reports = state.get("feasibility_reports", {})
+    async def __call__(self, state: EvaluationState, config: RunnableConfig) -> Dict:
+        product_manager_agent: ProductManagerAgent = get_dependency(config, "product_manager_agent")
+        # Checkpoints saved before the reports were typed as a list hold {} when nothing was assessed
+        feasibility_reports = state.get("feasibility_reports") or []
         pain_points = state.get("interaction_result", {}).get("pain_points", [])
         solutions = state.get("solutions", [])  # Corrected to retrieve solutions appropriately
         prioritized_tasks = state.get("prioritized_features", [])
 
         logger.debug("Starting Final Report Generation Node.")
 
+        # Keep the highest-priority tasks first, then their feasibility reports, then pain points
+        budget = TokenBudget.for_node("final_report_generation")
+        prioritized_tasks = budget.select(prioritized_tasks)
+        feasibility_reports = budget.select(feasibility_reports)
+        pain_points = budget.select(pain_points)
+        record_budget(budget)
 
         # Generate the final report using the ProductManagerAgent
         try:
-            final_report = await self.product_manager_agent.generate_final_report(
+            final_report = await product_manager_agent.generate_final_report(
                 pain_points=pain_points,
                 solutions=solutions,
                 feasibility_reports=feasibility_reports,
@@ -1,28 +1,83 @@
-from typing import Dict
+from typing import Dict, List
 from agents.user_agent import UserAgent
+from langchain_core.runnables import RunnableConfig
 from workflow.state import EvaluationState
+from agents.utils.token_budget import TokenBudget, record_budget
+from config import settings
+import asyncio
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 class InteractionSimulationNode:
-    def __init__(self, user_agent: UserAgent):
-        self.user_agent = user_agent
-
-    async def __call__(self, state: EvaluationState) -> Dict:
-        product_info = state["product_info"]
-        logger.debug("Starting interaction simulation node.")
-        
-        interaction_result_json = await self.user_agent.simulate_interaction(product_info)
-        logger.debug(f"Received interaction result: {interaction_result_json}")
-        
+    def __init__(self, max_concurrency: int = None):
+        """
+        :param max_concurrency: Maximum number of persona simulations running at once.
+        """
+        self.max_concurrency = max_concurrency or settings.persona_simulation_concurrency
+
+    async def _simulate(self, user_agent: UserAgent, product_info: str, semaphore: asyncio.Semaphore) -> Dict:
+        async with semaphore:
+            logger.debug(f"Simulating interaction for persona: {user_agent.name}")
+            try:
+                interaction_result_json = await user_agent.simulate_interaction(product_info)
+            except Exception as e:
+                logger.error(f"Interaction simulation failed for persona {user_agent.name}: {e}")
+                return {"error": str(e)}
+
+        logger.debug(f"Received interaction result for persona {user_agent.name}: {interaction_result_json}")
         try:
             interaction_result = json.loads(interaction_result_json)
-            logger.debug("Parsed interaction result successfully. interaction_result: {interaction_result}")
+            logger.debug(f"Parsed interaction result successfully for persona: {user_agent.name}")
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse interaction result: {e}")
+            logger.error(f"Failed to parse interaction result for persona {user_agent.name}: {e}")
             interaction_result = {"error": "Invalid response format."}
-        
-        state["interaction_result"] = interaction_result
-        return state
\ No newline at end of file
+        return interaction_result
+
+    @staticmethod
+    def _merge_results(persona_results: List[Dict]) -> Dict:
+        """
+        Merges the per-persona results into one interaction result, de-duplicating list fields
+        while keeping the order in which they were first reported. A persona whose output is not
+        a JSON object is left out of the merge and counted as failed.
+        """
+        merged: Dict = {"pain_points": [], "frustrating_features": [], "positive_features": []}
+        for entry in persona_results:
+            result = entry["result"]
+            if not isinstance(result, dict):
+                logger.warning(f"Skipping interaction result of persona {entry['persona']}: expected an object, got {type(result).__name__}")
+                continue
+            for key in merged:
+                values = result.get(key, [])
+                if isinstance(values, list):
+                    merged[key].extend(value for value in values if value not in merged[key])
+        merged["persona_results"] = persona_results
+        if all(not isinstance(entry["result"], dict) or "error" in entry["result"] for entry in persona_results):
+            merged["error"] = "Invalid response format."
+        return merged
+
+    async def __call__(self, state: EvaluationState, config: RunnableConfig) -> Dict:
+        # One UserAgent per persona taking part in the evaluation, built from the serializable
+        # persona definitions kept in the state
+        user_agents = [
+            UserAgent(agent_characteristics=persona["characteristics"], name=persona.get("name"))
+            for persona in state["personas"]
+        ]
+        budget = TokenBudget.for_node("interaction_simulation")
+        product_info = budget.truncate(state["product_info"])
+        record_budget(budget)
+        logger.debug(f"Starting interaction simulation node for {len(user_agents)} personas.")
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(
+            *(self._simulate(user_agent, product_info, semaphore) for user_agent in user_agents)
+        )
+        persona_results = [
+            {"persona": user_agent.name, "result": result}
+            for user_agent, result in zip(user_agents, results)
+        ]
+
+        state["interaction_results"] = persona_results
+        state["interaction_result"] = self._merge_results(persona_results)
+        return state
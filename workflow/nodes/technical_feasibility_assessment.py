@@ -1,29 +1,111 @@
-
+import asyncio
+import json
 import logging
-from typing import Dict
+from typing import Dict, List
+from langchain_core.runnables import RunnableConfig
 from workflow.state import EvaluationState
 from agents.developer_agent import DeveloperAgent
+from agents.utils.llm_cache import no_llm_cache
+from workflow.dependencies import get_dependency
+from agents.utils.token_budget import TokenBudget, record_budget
+from config import settings
 
 logger = logging.getLogger(__name__)
 
+NODE_NAME = "technical_feasibility_assessment"
+
 class TechnicalFeasibilityAssessmentNode:
-    def __init__(self, developer_agent: DeveloperAgent):
-        self.developer_agent = developer_agent
+    def __init__(self, mode: str = None, max_concurrency: int = None, max_retries: int = None):
+        """
+        :param mode: "batch" assesses all features in one prompt, "per_feature" in one call per feature.
+        :param max_concurrency: Maximum number of concurrent per-feature assessments.
+        :param max_retries: Extra attempts for a feature whose assessment fails.
+        """
+        self.mode = mode or settings.feasibility_assessment_mode
+        self.max_concurrency = max_concurrency or settings.feasibility_assessment_concurrency
+        self.max_retries = settings.feasibility_assessment_max_retries if max_retries is None else max_retries
+
+    async def _assess_feature(self, developer_agent: DeveloperAgent, feature: Dict, semaphore: asyncio.Semaphore) -> Dict:
+        feature_name = feature.get("feature") or feature.get("feature_name") or "Unnamed feature"
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    if attempt == 0:
+                        report = await developer_agent.assess_feature(feature)
+                    else:
+                        # A cached bad response would fail again, so retries go to the model
+                        with no_llm_cache():
+                            report = await developer_agent.assess_feature(feature)
+                    report["status"] = "assessed"
+                    return report
+                except Exception as e:
+                    logger.warning(f"Feasibility assessment failed for feature '{feature_name}' (attempt {attempt + 1}): {e}")
+                    error = str(e)
+
+        logger.error(f"Giving up on feasibility assessment for feature: {feature_name}")
+        return {
+            "feature": feature_name,
+            "feasibility_report": "Could not assess feasibility for this feature.",
+            "development_effort": "Unknown",
+            "status": "failed",
+            "error": error
+        }
+
+    async def _assess_per_feature(self, developer_agent: DeveloperAgent, features: List[Dict]) -> List[Dict]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return list(await asyncio.gather(
+            *(self._assess_feature(developer_agent, feature, semaphore) for feature in features)
+        ))
+
+    def _fit_features(self, features: List[Dict]) -> List[Dict]:
+        """
+        Fits each feature into the node's budget on its own, truncating the description of a feature
+        whose prompt would exceed it. The recorded budget outcome is that of the largest prompt.
+        """
+        fitted = []
+        largest = TokenBudget.for_node(NODE_NAME)
+        for feature in features:
+            budget = TokenBudget.for_node(NODE_NAME)
+            description = feature.get("description")
+            if isinstance(description, str) and budget.remaining is not None and budget.count(json.dumps(feature)) > budget.remaining:
+                budget.used += budget.count(json.dumps({**feature, "description": ""}))
+                feature = {**feature, "description": budget.truncate(description)}
+                logger.info(f"Truncated the description of feature '{feature.get('feature') or feature.get('feature_name')}' to the token budget.")
+            else:
+                budget.used += budget.count(json.dumps(feature))
+            largest.used = max(largest.used, budget.used)
+            largest.truncated = largest.truncated or budget.truncated
+            fitted.append(feature)
+        record_budget(largest)
+        return fitted
 
-    async def __call__(self, state: EvaluationState) -> Dict:
+    async def __call__(self, state: EvaluationState, config: RunnableConfig) -> Dict:
+        developer_agent: DeveloperAgent = get_dependency(config, "developer_agent")
         prioritized_features = state.get("prioritized_features", [])
-        feasibility_reports = {}
 
         if not prioritized_features:
             logger.warning("No prioritized features to assess feasibility.")
-            state["feasibility_reports"] = {}
+            state["feasibility_reports"] = []
             return state
 
-        logger.debug("Starting Technical Feasibility Assessment Node.")
+        logger.debug(f"Starting Technical Feasibility Assessment Node in {self.mode} mode.")
 
+        if self.mode == "per_feature":
+            # Every feature goes in its own prompt, so each one gets the whole budget
+            prioritized_features = self._fit_features(prioritized_features)
+            reports = await self._assess_per_feature(developer_agent, prioritized_features)
+        else:
+            # Features are ranked, so the lowest-priority ones are left out when over budget
+            budget = TokenBudget.for_node(NODE_NAME)
+            prioritized_features = budget.select(prioritized_features, render=json.dumps)
+            record_budget(budget)
+            if budget.dropped_items:
+                logger.info(f"Skipping feasibility assessment of {budget.dropped_items} features over the token budget.")
+            reports = await developer_agent.assess_feasibility_and_effort(prioritized_features)
+            if isinstance(reports, dict):
+                # The model answered with a single report object instead of the requested list
+                reports = [reports]
 
-        reports = await self.developer_agent.assess_feasibility_and_effort(prioritized_features)   
-        
         logger.debug(f"Feasibility reports: {reports}")
         state["feasibility_reports"] = reports
-        return state
\ No newline at end of file
+        return state
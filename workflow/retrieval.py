@@ -0,0 +1,39 @@
+import logging
+from typing import List
+
+from langchain.schema import Document
+
+from config import settings
+from services.RAGService import RAGService
+
+logger = logging.getLogger(__name__)
+
+# Search options a node may set in settings.node_retrieval
+SEARCH_OPTIONS = ("k", "mmr", "fetch_k", "lambda_mult")
+
+
+async def retrieve_for_node(rag_service: RAGService, node_name: str, product_id: int, queries: List[str]) -> List[Document]:
+    """
+    Retrieves the product's documents for a node's queries, run concurrently with the node's
+    k / MMR options from settings.node_retrieval. Retrieval problems are logged and yield no
+    documents, so the node can carry on with what it has.
+
+    :param rag_service: The run's RAGService.
+    :param node_name: Node name, used to look up its search options.
+    :param product_id: The product whose documents are searched.
+    :param queries: Query texts; empty ones are ignored.
+    :return: Merged documents, best matches of every query first.
+    """
+    queries = [query for query in queries if query]
+    if not queries:
+        return []
+
+    options = settings.node_retrieval.get(node_name, {})
+    search_kwargs = {key: options[key] for key in SEARCH_OPTIONS if key in options}
+    try:
+        documents = await rag_service.search_many(product_id, queries, **search_kwargs)
+    except Exception as e:
+        logger.error(f"Retrieval failed for node {node_name} (Product ID {product_id}): {e}")
+        return []
+    logger.debug(f"Node {node_name} retrieved {len(documents)} documents for {len(queries)} queries.")
+    return documents
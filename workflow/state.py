@@ -1,27 +1,19 @@
 from typing import Annotated, TypedDict, List, Dict, Optional
-from agents.user_agent import UserAgent
-from agents.product_manager_agent import ProductManagerAgent
-from agents.ai_features_ideation_agent import AIFeatureIdeationAgent
-from agents.developer_agent import DeveloperAgent
-from agents.product_manager_agent import ProductManagerAgent
-from services.RAGService import RAGService
-from models.Evaluation import Evaluation
 
+# Only JSON-like values belong in the state: it is saved by the checkpointer after every node.
+# Agents, services and connections are passed through the run config instead.
 class EvaluationState(TypedDict, total=False):
     evaluation_scope: str
-    user_agent: UserAgent
-    rag_service: RAGService
     scenario: str
     product_info: str
     interaction_result: Dict
-    evaluation: Evaluation
+    interaction_results: List[Dict]
+    evaluation_id: int
+    personas: List[Dict]
     evaluation_type: str
-    product_manager_agent: ProductManagerAgent
-    ai_feature_ideation_agent: AIFeatureIdeationAgent
-    developer_agent: DeveloperAgent
-    product_manager_agent: ProductManagerAgent
     product_id: int
     ideated_features: List[Dict]
     prioritized_features: List[Dict]
-    feasibility_reports: Dict[str, Dict]
+    feasibility_reports: List[Dict]  # One report per assessed feature, in priority order
     final_report: str
+    token_usage: Dict[str, Dict]